@@ -1,12 +1,28 @@
+from array import array
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+import markov
+from board import BOARD, STREET, RAILROAD, UTILITY
 from game import Game
+from logstore import GAME_COL, NOTES_COL, Columns, iter_log, read_log
+from onlinestats import GameStats
 
 class Analyser:
-    def __init__(self, game: Game):
+    def __init__(self, game: Game | None=None, path: str | None=None):
+        # either a finished game or a log file/dataset directory with any number of games
         self.game = game
-        self.df = pd.read_csv(game.file_name)
+        self.games: list[int] | None = None
+        if game is not None:
+            self.path = game.file_name if game.writer is None else game.writer.path
+            self.games = None if game.writer is None else [game.game_id]
+        else:
+            self.path = path
+        self._df: pd.DataFrame | None = None
+        self.schemas: dict[int, Game] = {}
 
         plt.style.use('dark_background')
 
@@ -16,13 +32,251 @@ class Analyser:
             'size': 16,
         }
 
-        self.plot_bank_money()
-    
-    def plot_bank_money(self):
+    @property
+    def df(self) -> pd.DataFrame:
+        # the whole log, only loaded when asked for
+        if self._df is None:
+            self._df = read_log(self.path, games=self.games)
+        return self._df
+
+    def schema(self, num_players: int) -> Game:
+        # labels and final position evaluation for a player count
+        if num_players not in self.schemas:
+            self.schemas[num_players] = Game(num_players, verbose=False)
+        return self.schemas[num_players]
+
+    def label_bank_money(self) -> str: return self.schema(1).label_bank_money()
+    def label_round(self) -> str: return self.schema(1).label_round()
+
+    def num_players(self, columns: pd.Index) -> int:
+        label = self.schema(1).label_player_money
+        n = 0
+        while label(n+1) in columns:
+            n += 1
+        return n
+
+    #** Streaming **#
+
+    def iter_games(self, columns: Columns) -> Iterator[pd.DataFrame]:
+        # chunks holding only complete games; games are contiguous in a log, so only the last
+        # game of a chunk can continue into the next one
+        carry: pd.DataFrame | None = None
+        for chunk in iter_log(self.path, columns, self.games):
+            if carry is not None:
+                if list(carry.columns) == list(chunk.columns):
+                    chunk = pd.concat([carry, chunk], ignore_index=True)
+                else:
+                    yield carry
+            ids = chunk[GAME_COL].to_numpy()
+            other = np.flatnonzero(ids != ids[-1])
+            start = other[-1] + 1 if len(other) else 0
+            carry = chunk.iloc[start:]
+            if start:
+                yield chunk.iloc[:start]
+        if carry is not None:
+            yield carry
+
+    def final_columns(self, col: str) -> bool:
+        # what winner() needs: money, owners and levels, plus the round
+        return not (col == NOTES_COL or col.endswith(' Pos') or col in (
+            self.schema(1).label_dice_value(), self.schema(1).label_player_idx()))
+
+    def iter_finals(self) -> Iterator[tuple[int, pd.DataFrame]]:
+        # last row of every game with its player count
+        for chunk in self.iter_games(self.final_columns):
+            yield self.num_players(chunk.columns), chunk.groupby(GAME_COL, sort=False).tail(1)
+
+    #** Statistics **#
+
+    def bank_money_by_turn(self) -> pd.DataFrame:
+        bank = self.label_bank_money()
+        cnt, tot, sq = np.zeros(0), np.zeros(0), np.zeros(0)
+        for chunk in self.iter_games([bank]):
+            turn = chunk.groupby(GAME_COL, sort=False).cumcount().to_numpy()
+            money = chunk[bank].to_numpy(np.float64)
+            n = max(len(cnt), turn.max()+1)
+            cnt, tot, sq = (np.pad(a, (0, n-len(a))) for a in (cnt, tot, sq))
+            cnt += np.bincount(turn, minlength=n)
+            tot += np.bincount(turn, money, n)
+            sq += np.bincount(turn, money**2, n)
+        mean = tot / np.maximum(cnt, 1)
+        std = np.sqrt(np.maximum(sq / np.maximum(cnt, 1) - mean**2, 0))
+        return pd.DataFrame({'Games': cnt.astype(int), 'Mean': mean, 'Std': std}).rename_axis('Turn')
+
+    def winners(self) -> pd.DataFrame:
+        # evaluated from the final rows with the same rules as Game.winner
+        rows: list[tuple[int, int, int, int]] = []
+        for n, finals in self.iter_finals():
+            g = self.schema(n)
+            cols = [c if c in finals else None for c in g.cols]
+            for r in finals.itertuples(index=False, name=None):
+                d = dict(zip(finals.columns, r))
+                g.row = array('i', [int(d[c]) if c is not None else 0 for c in cols])
+                g.reindex()
+                rows.append((d[GAME_COL], n, g.winner(), g.get_round()))
+        return pd.DataFrame(rows, columns=[GAME_COL, 'Players', 'Winner', 'Rounds'])
+
+    def win_rates(self) -> pd.DataFrame:
+        w = self.winners()
+        rates = pd.crosstab(w['Players'], w['Winner'], normalize='index')
+        rates.columns = [f'Player {p}' for p in rates.columns]
+        rates.insert(0, 'Games', w.groupby('Players').size())
+        return rates
+
+    def survival(self) -> pd.DataFrame:
+        # fraction of games still running and of players never yet below zero money at the start of each round
+        rnd = self.label_round()
+        counts: dict[tuple[str, int], np.ndarray] = {} # rounds at which games ended/players went bankrupt
+        totals: dict[tuple[str, int], int] = {}
+        for chunk in self.iter_games(lambda c: c == rnd or c.endswith(' Money')):
+            n = self.num_players(chunk.columns)
+            g = self.schema(n)
+            by_game = chunk.groupby(GAME_COL, sort=False)
+            ends = by_game[rnd].max().to_numpy()
+            bankrupt = [chunk[rnd].where(chunk[g.label_player_money(p)] < 0).groupby(chunk[GAME_COL]).min()
+                        for p in range(1, n+1)]
+            bankrupt = np.concatenate([b.dropna().to_numpy(np.int64) for b in bankrupt])
+            for key, v, tot in ((('Games', n), ends, len(ends)), (('Solvent', n), bankrupt, n*len(ends))):
+                c = np.bincount(v)
+                prev = counts.get(key, np.zeros(0, np.int64))
+                m = max(len(prev), len(c))
+                counts[key] = np.pad(prev, (0, m-len(prev))) + np.pad(c, (0, m-len(c)))
+                totals[key] = totals.get(key, 0) + tot
+        horizon = max((len(c) for c in counts.values()), default=1)
+        cols: dict[str, np.ndarray] = {}
+        for (label, n), c in sorted(counts.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+            c = np.pad(c, (0, horizon-len(c)))
+            cols[f'{label} ({n}p)'] = 1 - np.cumsum(c)[:-1] / totals[(label, n)]
+        return pd.DataFrame(cols, index=pd.RangeIndex(1, horizon, name='Round'))
+
+    #** Plots **#
+
+    def show(self, fig, file_name: str | None=None) -> None:
+        # save instead of show for headless runs
+        if file_name is None:
+            plt.show()
+        else:
+            fig.savefig(file_name)
+            plt.close(fig)
+
+    def plot_bank_money(self, file_name: str | None=None):
+        bank = self.label_bank_money()
+        df = read_log(self.path, [bank], self.games)
         fig = plt.figure(figsize=(16, 7))
         ax = plt.axes()
-        plt.plot(self.df[self.game.label_bank_money()], '-o')
+        plt.plot(df[bank], '-o')
         plt.ylabel('Bank money', fontdict=self.font)
         ax.set(xticklabels=[])
         ax.tick_params(bottom=False)
-        plt.show()
\ No newline at end of file
+        self.show(fig, file_name)
+
+    def plot_bank_money_mean(self, file_name: str | None=None):
+        df = self.bank_money_by_turn()
+        fig = plt.figure(figsize=(16, 7))
+        plt.plot(df.index, df['Mean'])
+        plt.fill_between(df.index, df['Mean'] - df['Std'], df['Mean'] + df['Std'], alpha=0.3)
+        plt.xlabel('Turn', fontdict=self.font)
+        plt.ylabel('Bank money', fontdict=self.font)
+        self.show(fig, file_name)
+
+    def plot_survival(self, file_name: str | None=None):
+        df = self.survival()
+        fig = plt.figure(figsize=(16, 7))
+        for col in df.columns:
+            plt.step(df.index, df[col], where='post', label=col)
+        plt.xlabel('Round', fontdict=self.font)
+        plt.ylabel('Surviving fraction', fontdict=self.font)
+        plt.legend()
+        self.show(fig, file_name)
+
+    #** Running statistics **#
+
+    # plots of a GameStats summary, for batches too large to keep their logs
+
+    def plot_bank_money_quantiles(self, stats: GameStats, file_name: str | None=None):
+        q = stats.bank_quantiles()
+        turns = np.arange(len(q))
+        fig = plt.figure(figsize=(16, 7))
+        plt.plot(turns, q[:, 2], label='Median')
+        plt.fill_between(turns, q[:, 1], q[:, 3], alpha=0.4, label='25-75%')
+        plt.fill_between(turns, q[:, 0], q[:, 4], alpha=0.2, label='5-95%')
+        plt.xlabel('Turn', fontdict=self.font)
+        plt.ylabel('Bank money', fontdict=self.font)
+        plt.legend()
+        self.show(fig, file_name)
+
+    def plot_money_by_round(self, stats: GameStats, num_players: int, file_name: str | None=None):
+        mean, std = stats.money_mean[num_players], stats.money_std(num_players)
+        rounds = np.arange(1, len(mean) + 1)
+        fig = plt.figure(figsize=(16, 7))
+        for i in range(num_players):
+            plt.plot(rounds, mean[:, i], label=f'Player {i+1}')
+            plt.fill_between(rounds, mean[:, i] - std[:, i], mean[:, i] + std[:, i], alpha=0.2)
+        plt.xlabel('Round', fontdict=self.font)
+        plt.ylabel('Money', fontdict=self.font)
+        plt.legend()
+        self.show(fig, file_name)
+
+    #** Markov chain **#
+
+    def landing_probabilities(self, jail_free_in_deck: bool=False) -> pd.DataFrame:
+        l = markov.landings(jail_free_in_deck)
+        return pd.DataFrame({
+            'Square': [sq.id or sq.kind for sq in BOARD],
+            'Start': l.stationary[:40],
+            'Landings': l.landing,
+            'Rent': markov.expected_rent(jail_free_in_deck=jail_free_in_deck),
+        })
+
+    def plot_landing_probabilities(self, file_name: str | None=None):
+        df = self.landing_probabilities()
+        fig = plt.figure(figsize=(16, 7))
+        ax = plt.axes()
+        plt.bar(df.index, df['Landings'])
+        plt.ylabel('Landings per turn', fontdict=self.font)
+        ax.set_xticks(df.index, df['Square'], rotation=90)
+        self.show(fig, file_name)
+
+    def plot_expected_income(self, file_name: str | None=None):
+        # expected rent per opponent turn for each property, unimproved and with a hotel
+        props = [sq for sq in BOARD if sq.kind in (STREET, RAILROAD, UTILITY)]
+        base = markov.expected_rent(railroads_owned=4, utilities_owned=2)
+        hotel = markov.expected_rent({sq.pos: 6 for sq in props if sq.kind == STREET}, 4, 2)
+        fig = plt.figure(figsize=(16, 7))
+        ax = plt.axes()
+        x = range(len(props))
+        plt.bar(x, [hotel[sq.pos] for sq in props], label='Hotel')
+        plt.bar(x, [base[sq.pos] for sq in props], label='Unimproved')
+        plt.ylabel('Expected rent per opponent turn', fontdict=self.font)
+        ax.set_xticks(x, [sq.id for sq in props])
+        plt.legend()
+        self.show(fig, file_name)
+
+if __name__ == '__main__':
+    # headless summary of a log file, a dataset directory or saved statistics
+    import argparse
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    parser = argparse.ArgumentParser(description='Summarize a game log, a dataset directory or saved statistics.')
+    parser.add_argument('path', help='log file or dataset directory, or a statistics file with --stats')
+    parser.add_argument('plot_dir', nargs='?', default=None, help='save the plots into this directory')
+    parser.add_argument('--stats', action='store_true', help='path holds statistics saved by batch.py --stats')
+    args = parser.parse_args()
+
+    if args.stats:
+        stats = GameStats.load(args.path)
+        print(stats.report())
+        if args.plot_dir:
+            a = Analyser()
+            a.plot_bank_money_quantiles(stats, f'{args.plot_dir}/bank_money_quantiles.png')
+            for n in stats.games:
+                a.plot_money_by_round(stats, n, f'{args.plot_dir}/money_{n}p.png')
+    else:
+        a = Analyser(path=args.path)
+        print(a.win_rates().to_string())
+        print(a.survival().iloc[::5].to_string())
+        if args.plot_dir:
+            a.plot_bank_money_mean(f'{args.plot_dir}/bank_money.png')
+            a.plot_survival(f'{args.plot_dir}/survival.png')
@@ -0,0 +1,281 @@
+from typing import TYPE_CHECKING, Iterable, Iterator, NamedTuple
+
+import argparse
+import csv
+import math
+import multiprocessing as mp
+import random
+import time
+
+from board import PROPERTY_POSITIONS, BOARD
+from game import Game, AntitheticRandom
+from profiling import PhaseProfile
+from resultcache import ResultCache, config_key
+from strategy import STRATEGIES, make_strategy
+
+# numpy based, only imported by workers that log or keep statistics
+if TYPE_CHECKING:
+    from logstore import LogWriter
+    from onlinestats import GameStats
+
+class GameResult(NamedTuple):
+    game_id: int
+    seed: int
+    num_players: int
+    winner: int
+    rounds: int
+    turns: int
+    money: tuple[int, ...] # by player, idx 0 is player 1
+    owners: tuple[int, ...] # by PROPERTY_POSITIONS, 0 if unowned
+    strategies: tuple[str, ...] = () # by seat, empty for the built in rules
+
+class BatchTask(NamedTuple):
+    game_id: int
+    seed: int
+    num_players: int
+    max_rounds: int
+    strategies: tuple[str, ...] = () # strategy names by seat
+    antithetic: bool = False # mirrored dice of the same seed
+
+#** Seeds **#
+
+def game_seeds(master_seed: int, num_games: int) -> list[int]:
+    rng = random.Random(master_seed)
+    return [rng.getrandbits(63) for _ in range(num_games)]
+
+def seat_strategies(strategies: Iterable[str], num_players: int) -> tuple[str, ...]:
+    # names are repeated in order to fill all seats
+    strategies = list(strategies)
+    return tuple(strategies[i % len(strategies)] for i in range(num_players)) if strategies else ()
+
+def make_tasks(num_games: int, players: Iterable[int], master_seed: int=0, max_rounds: int=30,
+               strategies: Iterable[str]=()) -> list[BatchTask]:
+    players = list(players)
+    strategies = list(strategies)
+    seeds = game_seeds(master_seed, num_games * len(players))
+    return [BatchTask(i, seeds[i], n, max_rounds, seat_strategies(strategies, n))
+            for i, n in enumerate(n for n in players for _ in range(num_games))]
+
+#** Caching **#
+
+def task_key(task: BatchTask) -> str:
+    # the game id only orders results, it does not change them
+    return config_key('game', {'players': task.num_players, 'seed': task.seed, 'max_rounds': task.max_rounds,
+                               'strategies': list(task.strategies), 'antithetic': task.antithetic})
+
+def result_from_json(task: BatchTask, d: list) -> GameResult:
+    seed, num_players, winner, rounds, turns, money, owners, strategies = d
+    return GameResult(task.game_id, seed, num_players, winner, rounds, turns, tuple(money), tuple(owners), tuple(strategies))
+
+#** Running **#
+
+def play(task: BatchTask, writer: 'LogWriter | None'=None, profile: PhaseProfile | None=None,
+         stats: 'GameStats | None'=None) -> GameResult:
+    strategies = [make_strategy(name) for name in task.strategies] or None
+    rng = AntitheticRandom(task.seed) if task.antithetic else None
+    g = Game(task.num_players, log_mode='none', seed=task.seed, max_rounds=task.max_rounds, verbose=False,
+             rng=rng, writer=writer, game_id=task.game_id, strategies=strategies, profile=profile, stats=stats)
+    g.run(save=False)
+    return GameResult(
+        game_id=task.game_id,
+        seed=task.seed,
+        num_players=task.num_players,
+        winner=g.winner(),
+        rounds=g.get_round(),
+        turns=len(g.data),
+        money=tuple(g.get_player_money(p) for p in range(1, task.num_players+1)),
+        owners=tuple(g.get_card_owner(pos) for pos in PROPERTY_POSITIONS),
+        strategies=task.strategies,
+    )
+
+Chunk = tuple[list[GameResult], PhaseProfile | None, 'GameStats | None']
+
+def play_chunk(job: tuple[list[BatchTask], str | None, str, bool, bool]) -> Chunk:
+    # one dataset part per chunk of games, named after its first game so workers never collide,
+    # and one profile and statistics per chunk to be merged by the caller
+    tasks, log_dir, log_format, profiled, with_stats = job
+    profile = PhaseProfile() if profiled else None
+    stats = None
+    if with_stats:
+        from onlinestats import GameStats
+        stats = GameStats()
+    if log_dir is None:
+        return [play(t, None, profile, stats) for t in tasks], profile, stats
+    from logstore import make_writer
+    with make_writer(log_format, log_dir, prefix=f'games{tasks[0].game_id:09d}') as w:
+        return [play(t, w, profile, stats) for t in tasks], profile, stats
+
+def iter_batch(tasks: list[BatchTask], workers: int | None=None, chunksize: int=64,
+               log_dir: str | None=None, log_format: str='npz', profile: PhaseProfile | None=None,
+               cache: ResultCache | None=None, stats: 'GameStats | None'=None) -> Iterator[GameResult]:
+    if cache is not None and log_dir is None and profile is None and stats is None:
+        # only games that were never played with this code run; logged, profiled or summarized games always run
+        todo: dict[int, BatchTask] = {}
+        for t in tasks:
+            d = cache.get_json(task_key(t))
+            if d is None:
+                todo[t.game_id] = t
+            else:
+                yield result_from_json(t, d)
+        if todo:
+            for r in iter_batch(list(todo.values()), workers, chunksize):
+                cache.put_json(task_key(todo[r.game_id]), list(r)[1:])
+                yield r
+        return
+    if log_dir is not None or profile is not None or stats is not None:
+        jobs = [(tasks[i:i+chunksize], log_dir, log_format, profile is not None, stats is not None)
+                for i in range(0, len(tasks), chunksize)]
+        for results, p, st in iter_jobs(play_chunk, jobs, workers, 1):
+            if p is not None:
+                profile.merge(p)
+            if st is not None:
+                stats.merge(st)
+            yield from results
+    else:
+        yield from iter_jobs(play, tasks, workers, chunksize)
+
+def iter_jobs(func, jobs: list, workers: int | None, chunksize: int) -> Iterator:
+    if workers == 1:
+        yield from map(func, jobs)
+        return
+    with mp.Pool(workers) as pool:
+        yield from pool.imap_unordered(func, jobs, chunksize)
+
+def run_batch(num_games: int, players: Iterable[int]=(4,), master_seed: int=0, max_rounds: int=30,
+              workers: int | None=None, log_dir: str | None=None, log_format: str='npz',
+              strategies: Iterable[str]=(), cache: ResultCache | None=None) -> list[GameResult]:
+    tasks = make_tasks(num_games, players, master_seed, max_rounds, strategies)
+    return sorted(iter_batch(tasks, workers, log_dir=log_dir, log_format=log_format, cache=cache),
+                  key=lambda r: r.game_id)
+
+#** Aggregation **#
+
+class BatchSummary:
+    def __init__(self):
+        self.num_games: dict[int, int] = {}
+        self.wins: dict[int, list[int]] = {}
+        self.rounds: dict[int, list[int]] = {} # [sum, sum of squares]
+        self.money: dict[int, list[int]] = {}
+        self.owners: dict[int, list[list[int]]] = {} # [property][player] counts
+        self.strategy_seats: dict[str, int] = {} # seats played by each strategy
+        self.strategy_wins: dict[str, int] = {}
+
+    def add(self, r: GameResult) -> None:
+        n = r.num_players
+        if n not in self.num_games:
+            self.num_games[n] = 0
+            self.wins[n] = [0] * (n+1)
+            self.rounds[n] = [0, 0]
+            self.money[n] = [0] * n
+            self.owners[n] = [[0] * (n+1) for _ in PROPERTY_POSITIONS]
+        self.num_games[n] += 1
+        self.wins[n][r.winner] += 1
+        self.rounds[n][0] += r.rounds
+        self.rounds[n][1] += r.rounds**2
+        for i, m in enumerate(r.money):
+            self.money[n][i] += m
+        for i, owner in enumerate(r.owners):
+            self.owners[n][i][owner] += 1
+        for seat, name in enumerate(r.strategies, 1):
+            self.strategy_seats[name] = self.strategy_seats.get(name, 0) + 1
+            self.strategy_wins[name] = self.strategy_wins.get(name, 0) + (seat == r.winner)
+
+    def report(self) -> str:
+        lines: list[str] = []
+        for n, cnt in sorted(self.num_games.items()):
+            mean = self.rounds[n][0] / cnt
+            std = math.sqrt(max(self.rounds[n][1] / cnt - mean**2, 0))
+            lines.append(f'{n} players, {cnt} games, rounds {mean:.2f} +/- {std:.2f}')
+            for p in range(1, n+1):
+                lines.append(f'  player {p}: win rate {self.wins[n][p]/cnt:.3f}, mean money {self.money[n][p-1]/cnt:.1f}')
+            owned = [f'c{pos}({BOARD[pos].id}):{1 - c[0]/cnt:.2f}' for pos, c in zip(PROPERTY_POSITIONS, self.owners[n])]
+            lines.append('  owned at end: ' + ' '.join(owned))
+        for name, seats in sorted(self.strategy_seats.items()):
+            lines.append(f'strategy {name}: {seats} seats, win rate per seat {self.strategy_wins[name]/seats:.3f}')
+        return '\n'.join(lines)
+
+    def to_dict(self) -> dict:
+        # JSON friendly version of report()
+        ret: dict = {'players': {}, 'strategies': {}}
+        for n, cnt in sorted(self.num_games.items()):
+            mean = self.rounds[n][0] / cnt
+            ret['players'][n] = {
+                'games': cnt,
+                'rounds_mean': mean,
+                'rounds_std': math.sqrt(max(self.rounds[n][1] / cnt - mean**2, 0)),
+                'win_rate': [self.wins[n][p] / cnt for p in range(1, n+1)],
+                'mean_money': [m / cnt for m in self.money[n]],
+            }
+        for name, seats in sorted(self.strategy_seats.items()):
+            ret['strategies'][name] = {'seats': seats, 'win_rate': self.strategy_wins[name] / seats}
+        return ret
+
+def write_results(results: Iterable[GameResult], path: str) -> None:
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['Game', 'Seed', 'Players', 'Winner', 'Rounds', 'Turns', 'Money', 'Owners', 'Strategies'])
+        for r in results:
+            w.writerow([r.game_id, r.seed, r.num_players, r.winner, r.rounds, r.turns,
+                        ' '.join(map(str, r.money)), ' '.join(map(str, r.owners)), ' '.join(r.strategies)])
+
+def read_results(path: str) -> list[GameResult]:
+    # the inverse of write_results
+    def ints(s: str) -> tuple[int, ...]: return tuple(map(int, s.split()))
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))[1:]
+    return [GameResult(int(game), int(seed), int(n), int(winner), int(rounds), int(turns), ints(money), ints(owners),
+                       tuple(strategies.split()))
+            for game, seed, n, winner, rounds, turns, money, owners, strategies in rows]
+
+#** CLI **#
+
+def main(argv: list[str] | None=None) -> None:
+    from logstore import WRITERS
+    from onlinestats import GameStats
+
+    parser = argparse.ArgumentParser(description='Run a batch of Monopoly games over a process pool.')
+    parser.add_argument('-n', '--games', type=int, default=1000, help='games per player count')
+    parser.add_argument('-p', '--players', type=int, nargs='+', default=[4])
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed')
+    parser.add_argument('-r', '--rounds', type=int, default=30, help='round limit per game')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('-o', '--out', default=None, help='write one summary row per game to this CSV')
+    parser.add_argument('-l', '--log', default=None, help='stream every turn of every game into this dataset directory')
+    parser.add_argument('-f', '--log-format', choices=list(WRITERS), default='npz')
+    parser.add_argument('-c', '--cache', default=None,
+                        help='reuse results of games already played, kept in this sqlite file')
+    parser.add_argument('--stats', default=None,
+                        help='aggregate running statistics of all games into this .npz (see analysis.py --stats)')
+    parser.add_argument('-P', '--profile', action='store_true', help='report time spent per game phase')
+    parser.add_argument('-S', '--strategies', nargs='+', choices=list(STRATEGIES), default=[],
+                        help='strategy names by seat, repeated to fill all seats')
+    args = parser.parse_args(argv)
+
+    tasks = make_tasks(args.games, args.players, args.seed, args.rounds, args.strategies)
+    summary = BatchSummary()
+    profile = PhaseProfile() if args.profile else None
+    cache = ResultCache(args.cache) if args.cache else None
+    stats = GameStats() if args.stats else None
+    results: list[GameResult] = []
+    t = time.perf_counter()
+    for r in iter_batch(tasks, args.workers, log_dir=args.log, log_format=args.log_format, profile=profile, cache=cache, stats=stats):
+        summary.add(r)
+        if args.out:
+            results.append(r)
+    elapsed = time.perf_counter() - t
+
+    if args.out:
+        results.sort(key=lambda r: r.game_id)
+        write_results(results, args.out)
+    print(summary.report())
+    if profile is not None:
+        print(profile.report())
+    if cache is not None:
+        print(f'cache: {cache.hits} hits, {cache.misses} misses')
+    if stats is not None:
+        stats.save(args.stats)
+        print(stats.report())
+    print(f'{len(tasks)} games in {elapsed:.2f}s ({len(tasks)/elapsed:.0f} games/s)')
+
+if __name__ == '__main__':
+    main()
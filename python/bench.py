@@ -0,0 +1,211 @@
+from typing import Callable, NamedTuple
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from board import PROPERTY_POSITIONS
+from game import Game
+from analysis import Analyser
+from logstore import make_writer
+
+class Metric(NamedTuple):
+    value: float
+    unit: str
+    higher_is_better: bool
+
+#** Helpers **#
+
+def best_of(func: Callable[[], None], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+def play(num_players: int, seed: int, **kwargs) -> Game:
+    g = Game(num_players, seed=seed, verbose=False, **kwargs)
+    g.run(save=False)
+    return g
+
+def mid_game(seed: int=0) -> Game:
+    # a 4 player game stopped after ten rounds, with most properties owned
+    g = Game(4, seed=seed, verbose=False)
+    while g.get_round() <= 10 and not g.finished():
+        g.step()
+    return g
+
+#** Benchmarks **#
+
+def bench_calibration(metrics: dict[str, Metric]) -> None:
+    # fixed pure python workload, used to factor out the speed of the machine when comparing
+    def work():
+        d = {}
+        for i in range(200000):
+            d[i % 97] = d.get(i % 97, 0) + i
+    metrics['calibration_ms'] = Metric(best_of(work, 5) * 1e3, 'ms', False)
+
+def bench_games(metrics: dict[str, Metric], games: int, repeat: int) -> None:
+    for n in range(2, 9):
+        t = best_of(lambda: [play(n, seed) for seed in range(games)], repeat)
+        metrics[f'games_per_sec_{n}p'] = Metric(games / t, 'games/s', True)
+
+def bench_turns(metrics: dict[str, Metric], games: int) -> None:
+    lat: list[int] = []
+    for seed in range(games):
+        g = Game(4, seed=seed, verbose=False)
+        while not g.finished():
+            t = time.perf_counter_ns()
+            g.step()
+            lat.append(time.perf_counter_ns() - t)
+    lat.sort()
+    metrics['turn_latency_mean'] = Metric(statistics.fmean(lat) / 1e3, 'us', False)
+    metrics['turn_latency_p50'] = Metric(lat[len(lat)//2] / 1e3, 'us', False)
+    metrics['turn_latency_p99'] = Metric(lat[len(lat)*99//100] / 1e3, 'us', False)
+
+def bench_micro(metrics: dict[str, Metric], number: int) -> None:
+    g = mid_game()
+    owned = [pos for pos in PROPERTY_POSITIONS if g.get_card_owner(pos) > 0]
+    labels = g.cols
+    cases: dict[str, Callable[[], object]] = {
+        'rent': lambda: [g.rent(pos) for pos in owned],
+        'pos_to_card': lambda: [g.pos_to_card(pos) for pos in PROPERTY_POSITIONS],
+        'get_data': lambda: [g.get_data(label) for label in labels],
+    }
+    sizes = {'rent': len(owned), 'pos_to_card': len(PROPERTY_POSITIONS), 'get_data': len(labels)}
+    for name, func in cases.items():
+        t = min(timeit.repeat(func, number=number, repeat=5))
+        metrics[f'{name}_ns'] = Metric(t / number / sizes[name] * 1e9, 'ns/call', False)
+
+def bench_io(metrics: dict[str, Metric], games: int, repeat: int) -> None:
+    tmp = tempfile.mkdtemp()
+    try:
+        g = play(4, 0)
+        g.file_name = os.path.join(tmp, 'game.csv')
+        metrics['save_csv_ms'] = Metric(best_of(g.save, repeat) * 1e3, 'ms', False)
+        metrics['analyser_load_csv_ms'] = Metric(best_of(lambda: Analyser(g).df, repeat) * 1e3, 'ms', False)
+
+        path = os.path.join(tmp, 'dataset')
+        def stream():
+            shutil.rmtree(path, ignore_errors=True)
+            with make_writer('npz', path) as w:
+                for seed in range(games):
+                    play(4, seed, log_mode='delta', writer=w, game_id=seed)
+        t = best_of(stream, repeat)
+        metrics['stream_npz_games_per_sec'] = Metric(games / t, 'games/s', True)
+        a = Analyser(path=path)
+        metrics['analyser_load_dataset_ms'] = Metric(best_of(lambda: Analyser(path=path).df, repeat) * 1e3, 'ms', False)
+        metrics['analyser_win_rates_ms'] = Metric(best_of(a.win_rates, repeat) * 1e3, 'ms', False)
+    finally:
+        shutil.rmtree(tmp)
+
+def bench_memory(metrics: dict[str, Metric], games: int) -> None:
+    for mode in ('full', 'delta'):
+        peaks: list[int] = []
+        for seed in range(games):
+            tracemalloc.start()
+            play(4, seed, log_mode=mode)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        metrics[f'peak_mem_{mode}_kib'] = Metric(statistics.fmean(peaks) / 1024, 'KiB/game', False)
+
+def run_suite(quick: bool=False) -> dict[str, Metric]:
+    scale = 5 if quick else 1
+    metrics: dict[str, Metric] = {}
+    bench_calibration(metrics)
+    bench_games(metrics, 100 // scale, 3)
+    bench_turns(metrics, 50 // scale)
+    bench_micro(metrics, 2000 // scale)
+    bench_io(metrics, 100 // scale, 3)
+    bench_memory(metrics, 20 // scale)
+    return metrics
+
+#** Results **#
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+def to_json(metrics: dict[str, Metric]) -> dict:
+    return {
+        'meta': {
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+        },
+        'metrics': {k: m._asdict() for k, m in metrics.items()},
+    }
+
+def load(path: str) -> dict[str, Metric]:
+    with open(path) as f:
+        return {k: Metric(**m) for k, m in json.load(f)['metrics'].items()}
+
+def compare(baseline: dict[str, Metric], current: dict[str, Metric], threshold: float,
+            normalize: bool=False) -> list[str]:
+    # names of metrics that got worse by more than threshold (relative); with normalize, timings are
+    # scaled by the calibration ratio so results from a slower or busier machine stay comparable
+    speed = 1.0
+    if normalize and 'calibration_ms' in baseline and 'calibration_ms' in current:
+        speed = current['calibration_ms'].value / baseline['calibration_ms'].value
+    regressions: list[str] = []
+    for name in sorted(baseline.keys() & current.keys() - {'calibration_ms'}):
+        b, c = baseline[name], current[name]
+        value = c.value
+        if not c.unit.startswith('KiB'):
+            value = value * speed if c.higher_is_better else value / speed
+        change = (value - b.value) / b.value if b.value else 0.0
+        worse = -change if b.higher_is_better else change
+        flag = 'REGRESSION' if worse > threshold else ('improved' if -worse > threshold else '')
+        print(f'{name:<28} {b.value:12.2f} -> {value:12.2f} {c.unit:<9} {change:+7.1%} {flag}')
+        if worse > threshold:
+            regressions.append(name)
+    return regressions
+
+#** CLI **#
+
+def main(argv: list[str] | None=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the simulator hot paths.')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    run = sub.add_parser('run', help='run the suite')
+    run.add_argument('-o', '--out', default=None, help='write results to this JSON file')
+    run.add_argument('-q', '--quick', action='store_true', help='fewer games, for a smoke test')
+    run.add_argument('-b', '--baseline', default=None, help='compare against this results file')
+    run.add_argument('-t', '--threshold', type=float, default=0.1, help='relative change counted as a regression')
+    run.add_argument('-n', '--normalize', action='store_true', help='scale timings by the calibration ratio')
+    cmp = sub.add_parser('compare', help='compare two results files')
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('-t', '--threshold', type=float, default=0.1, help='relative change counted as a regression')
+    cmp.add_argument('-n', '--normalize', action='store_true', help='scale timings by the calibration ratio')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'compare':
+        return 1 if compare(load(args.baseline), load(args.current), args.threshold, args.normalize) else 0
+
+    metrics = run_suite(args.quick)
+    for name, m in metrics.items():
+        print(f'{name:<28} {m.value:12.2f} {m.unit}')
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(to_json(metrics), f, indent=2)
+    if args.baseline:
+        return 1 if compare(load(args.baseline), metrics, args.threshold, args.normalize) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
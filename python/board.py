@@ -0,0 +1,129 @@
+from typing import NamedTuple
+
+#** Square kinds **#
+
+STREET: str = 'Street'
+RAILROAD: str = 'Railroad'
+UTILITY: str = 'Utility'
+GO: str = 'Go'
+JAIL: str = 'Jail'
+FREE_PARKING: str = 'Free Parking'
+GO_TO_JAIL: str = 'Go To Jail'
+CHANCE: str = 'Chance'
+COMMUNITY_CHEST: str = 'Community Chest'
+TAX: str = 'Tax'
+
+COLORS: tuple[str, ...] = ('b', 'l', 'p', 'o', 'r', 'y', 'g', 'd')
+
+class Square(NamedTuple):
+    pos: int
+    kind: str
+    id: str = '' # card id used in labels and notes, e.g. 'b1', 'r3', 'u2'
+    color: str = ''
+    idx: int = 0 # 1-based index within its group
+    price: int = 0 # purchase price, or amount due for tax squares
+    rent: tuple[int, ...] = () # by street level, railroads owned or utility multiplier
+    mortgage: int = 0
+    house_price: int = 0
+    group: tuple[int, ...] = () # positions of all squares in the same group
+
+#** Static tables **#
+
+# pos: (id, price, rent by level)
+STREETS: dict[int, tuple[str, int, tuple[int, ...]]] = {
+    1: ('b1', 60, (2, 4, 10, 30, 90, 160, 250)),
+    3: ('b2', 60, (4, 8, 20, 60, 180, 320, 450)),
+    6: ('l1', 100, (6, 12, 30, 90, 270, 400, 550)),
+    8: ('l2', 100, (6, 12, 30, 90, 270, 400, 550)),
+    9: ('l3', 120, (8, 16, 40, 100, 300, 450, 600)),
+    11: ('p1', 140, (10, 20, 50, 150, 450, 625, 750)),
+    13: ('p2', 140, (10, 20, 50, 150, 450, 625, 750)),
+    14: ('p3', 160, (12, 24, 60, 180, 500, 700, 900)),
+    16: ('o1', 180, (14, 28, 70, 200, 550, 750, 950)),
+    18: ('o2', 180, (14, 28, 70, 200, 550, 750, 950)),
+    19: ('o3', 200, (16, 32, 80, 220, 600, 800, 1000)),
+    21: ('r1', 220, (18, 36, 90, 250, 700, 875, 1050)),
+    23: ('r2', 220, (18, 36, 90, 250, 700, 875, 1050)),
+    24: ('r3', 240, (20, 40, 100, 300, 750, 925, 1100)),
+    26: ('y1', 260, (22, 44, 110, 330, 800, 975, 1150)),
+    27: ('y2', 260, (22, 44, 110, 330, 800, 975, 1150)),
+    29: ('y3', 280, (24, 48, 120, 360, 850, 1025, 1200)),
+    31: ('g1', 300, (26, 52, 130, 390, 900, 1100, 1275)),
+    32: ('g2', 300, (26, 52, 130, 390, 900, 1100, 1275)),
+    34: ('g3', 320, (28, 56, 150, 450, 1000, 1200, 1400)),
+    37: ('d1', 350, (35, 70, 175, 500, 1100, 1300, 1500)),
+    39: ('d2', 400, (50, 100, 200, 600, 1400, 1700, 2000)),
+}
+
+RAILROADS: tuple[int, ...] = (5, 15, 25, 35)
+RAILROAD_PRICE: int = 200
+RAILROAD_RENT: tuple[int, ...] = (25, 50, 100, 200)
+
+UTILITIES: tuple[int, ...] = (12, 28)
+UTILITY_PRICE: int = 150
+UTILITY_RENT: tuple[int, ...] = (4, 10) # dice multiplier by utilities owned
+
+TAXES: dict[int, tuple[str, int]] = {4: ('it', 200), 38: ('lt', 100)}
+CHANCES: tuple[int, ...] = (7, 22, 36)
+COMMUNITY_CHESTS: tuple[int, ...] = (2, 17, 33)
+OTHERS: dict[int, str] = {0: GO, 10: JAIL, 20: FREE_PARKING, 30: GO_TO_JAIL}
+
+#** Board **#
+
+def house_hotel_price(color: str) -> int: return 50*((COLORS.index(color)//2)+1)
+
+def build_board() -> tuple[Square, ...]:
+    groups: dict[str, tuple[int, ...]] = {
+        c: tuple(p for p, (id, _, _) in STREETS.items() if id[0] == c) for c in COLORS
+    }
+    board: list[Square] = []
+    for pos in range(40):
+        if pos in STREETS:
+            id, price, rent = STREETS[pos]
+            sq = Square(pos, STREET, id, id[0], int(id[1]), price, rent, price//2,
+                        house_hotel_price(id[0]), groups[id[0]])
+        elif pos in RAILROADS:
+            n = RAILROADS.index(pos) + 1
+            sq = Square(pos, RAILROAD, f'r{n}', '', n, RAILROAD_PRICE, RAILROAD_RENT,
+                        RAILROAD_PRICE//2, 0, RAILROADS)
+        elif pos in UTILITIES:
+            n = UTILITIES.index(pos) + 1
+            sq = Square(pos, UTILITY, f'u{n}', '', n, UTILITY_PRICE, UTILITY_RENT,
+                        UTILITY_PRICE//2, 0, UTILITIES)
+        elif pos in TAXES:
+            id, amt = TAXES[pos]
+            sq = Square(pos, TAX, id, price=amt)
+        elif pos in CHANCES:
+            sq = Square(pos, CHANCE)
+        elif pos in COMMUNITY_CHESTS:
+            sq = Square(pos, COMMUNITY_CHEST)
+        else:
+            sq = Square(pos, OTHERS[pos])
+        board.append(sq)
+    return tuple(board)
+
+BOARD: tuple[Square, ...] = build_board()
+PROPERTY_POSITIONS: tuple[int, ...] = tuple(sq.pos for sq in BOARD if sq.kind in (STREET, RAILROAD, UTILITY))
+STREET_POSITIONS: tuple[int, ...] = tuple(sq.pos for sq in BOARD if sq.kind == STREET)
+
+#** Cards **#
+
+CARD_JAIL_FREE: int = 1
+NUM_CARDS: int = 16
+CH_MOVE_TO: dict[int, int] = {2: 39, 3: 0, 4: 24, 5: 11, 6: 5} # card: destination
+CH_NEAREST_RAILROAD_CARDS: tuple[int, ...] = (7, 8)
+CH_NEAREST_UTILITY_CARD: int = 9
+CH_BACK_CARD: int = 12
+CH_GO_TO_JAIL_CARD: int = 13
+NEAREST_RAILROAD: dict[int, int] = {7: 15, 22: 25, 36: 5} # chance square: destination
+NEAREST_UTILITY: dict[int, int] = {7: 12, 22: 28, 36: 12}
+CC_MOVE_TO: dict[int, int] = {2: 0}
+CC_GO_TO_JAIL_CARD: int = 14
+CH_COLLECT: dict[int, int] = {10: 50, 11: 150} # card: amount collected from the bank
+CH_STREET_REPAIRS_CARD: int = 14
+CH_PAY: dict[int, int] = {15: 15} # card: amount paid to the bank
+CH_PAY_EACH_PLAYER_CARD: int = 16
+CC_COLLECT: dict[int, int] = {3: 200, 4: 50, 5: 100, 6: 20, 7: 100, 8: 25, 9: 10, 10: 100}
+CC_PAY: dict[int, int] = {11: 50, 12: 100, 13: 50}
+CC_COLLECT_EACH_PLAYER_CARD: int = 15
+CC_STREET_REPAIRS_CARD: int = 16
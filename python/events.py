@@ -0,0 +1,143 @@
+from array import array
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+from board import BOARD, CARD_JAIL_FREE, NUM_CARDS, CH_MOVE_TO, CH_NEAREST_RAILROAD_CARDS, CH_NEAREST_UTILITY_CARD
+from board import CH_COLLECT, CH_BACK_CARD, CH_GO_TO_JAIL_CARD, CH_STREET_REPAIRS_CARD, CH_PAY, CH_PAY_EACH_PLAYER_CARD
+from board import CC_MOVE_TO, CC_COLLECT, CC_PAY, CC_GO_TO_JAIL_CARD, CC_COLLECT_EACH_PLAYER_CARD, CC_STREET_REPAIRS_CARD
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+class Event(IntEnum):
+    PAY = 0 # plain transfer, e.g. card money
+    RENT = 1
+    CARD_RENT = 2 # rent from a nearest railroad/utility card
+    TAX = 3
+    SALARY = 4 # passing go
+    JAIL_FEE = 5
+    BUY = 6
+    GO_TO_JAIL = 7 # square is where the player was sent from
+    CHANCE = 8 # square is where the card was drawn
+    COMMUNITY_CHEST = 9
+    PASS = 10
+    BUILD = 11
+    SELL_HOUSE = 12
+    MORTGAGE = 13
+    UNMORTGAGE = 14
+    TRADE = 15 # a square changing hands, actor gives it to counterparty
+    TRADE_CASH = 16
+    JAIL_CARD = 17 # get out of jail free card used
+
+# one record per event: kind, actor, counterparty, amount, square, card
+FIELDS: tuple[str, ...] = ('Kind', 'Actor', 'Counterparty', 'Amount', 'Square', 'Card')
+NUM_FIELDS: int = len(FIELDS)
+FIELD_DTYPES: tuple[str, ...] = ('int8', 'int8', 'int8', 'int32', 'int8', 'int8')
+
+#** Legacy notes **#
+
+def card_notes(moves: dict[int, int], collect: dict[int, int], pay: dict[int, int],
+               other: dict[int, str]) -> tuple[str, ...]:
+    notes = [''] * (NUM_CARDS+1)
+    notes[CARD_JAIL_FREE] = 'gjf'
+    for d, fmt in ((moves, 'mv{}'), (collect, 'g{}'), (pay, 'p{}')):
+        for card, val in d.items():
+            notes[card] = fmt.format(val)
+    for card, note in other.items():
+        notes[card] = note
+    return tuple(notes)
+
+CH_NOTES: tuple[str, ...] = card_notes(CH_MOVE_TO, CH_COLLECT, CH_PAY, {
+    **{c: 'nrr' for c in CH_NEAREST_RAILROAD_CARDS},
+    CH_NEAREST_UTILITY_CARD: 'nu',
+    CH_BACK_CARD: 'bk3',
+    CH_GO_TO_JAIL_CARD: 'gtj',
+    CH_STREET_REPAIRS_CARD: 'rep',
+    CH_PAY_EACH_PLAYER_CARD: 'pep',
+})
+CC_NOTES: tuple[str, ...] = card_notes(CC_MOVE_TO, CC_COLLECT, CC_PAY, {
+    CC_GO_TO_JAIL_CARD: 'gtj',
+    CC_COLLECT_EACH_PLAYER_CARD: 'cep',
+    CC_STREET_REPAIRS_CARD: 'rep',
+})
+
+PAY_DESC: dict[int, str] = {Event.PAY: '', Event.CARD_RENT: '', Event.RENT: '(r)', Event.SALARY: '(g)',
+                            Event.JAIL_FEE: '(j)', Event.BUILD: '(h)', Event.SELL_HOUSE: '(sh)',
+                            Event.MORTGAGE: '(m)', Event.UNMORTGAGE: '(um)', Event.TRADE_CASH: '(t)'}
+
+def render_event(kind: int, actor: int, counterparty: int, amount: int, square: int, card: int) -> str:
+    if kind in PAY_DESC:
+        return f'p{PAY_DESC[kind]}.p{actor}>p{counterparty}.${amount};'
+    if kind == Event.TAX:
+        return f'p({BOARD[square].id}).p{actor}>p{counterparty}.${amount};'
+    if kind == Event.BUY:
+        return f'b.p{actor}.c{square}({BOARD[square].id});'
+    if kind == Event.GO_TO_JAIL:
+        return f'gtj.p{actor};'
+    if kind == Event.TRADE:
+        return f't.p{actor}>p{counterparty}.c{square}({BOARD[square].id});'
+    if kind == Event.JAIL_CARD:
+        return f'ujf.p{actor};'
+    if kind == Event.CHANCE:
+        return f'ch.p{actor}.{CH_NOTES[card]};'
+    if kind == Event.COMMUNITY_CHEST:
+        return f'cc.p{actor}.{CC_NOTES[card]};'
+    return 'pass;'
+
+#** Event log **#
+
+class EventLog:
+    # without history only the events of the last ended row are kept, as LastLog keeps only its row
+    def __init__(self, history: bool=True):
+        self.history: bool = history
+        self.records: array = array('i') # NUM_FIELDS ints per event
+        self.offsets: array = array('I', [0]) # row i owns events offsets[i]:offsets[i+1]
+
+    def add(self, kind: int, actor: int=0, counterparty: int=0, amount: int=0, square: int=-1, card: int=0) -> None:
+        self.records.extend((kind, actor, counterparty, amount, square, card))
+
+    def end_row(self) -> None:
+        if not self.history and len(self.offsets) > 1:
+            del self.records[:self.offsets[-1]*NUM_FIELDS]
+            self.offsets = array('I', [0])
+        self.offsets.append(len(self.records)//NUM_FIELDS)
+
+    def num_events(self) -> int: return len(self.records)//NUM_FIELDS
+    def __len__(self) -> int: return len(self.offsets) - 1
+
+    def note(self, row: int) -> str:
+        # the legacy note string of a row, only built on export
+        if row < 0:
+            row += len(self)
+        r = self.records
+        return ''.join(render_event(*r[i*NUM_FIELDS:(i+1)*NUM_FIELDS])
+                       for i in range(self.offsets[row], self.offsets[row+1]))
+
+    def notes(self) -> list[str]: return [self.note(i) for i in range(len(self))]
+
+    def frame(self) -> 'pd.DataFrame':
+        # one row per event with the turn log row it belongs to
+        import numpy as np
+        import pandas as pd
+        n = self.num_events()
+        rec = np.frombuffer(self.records, dtype=np.int32).reshape(n, NUM_FIELDS)
+        offsets = np.frombuffer(self.offsets, dtype=np.uint32)
+        d = {'Row': np.repeat(np.arange(len(self), dtype=np.int32), np.diff(offsets))}
+        for i, (field, dtype) in enumerate(zip(FIELDS, FIELD_DTYPES)):
+            d[field] = rec[:, i].astype(dtype)
+        return pd.DataFrame(d)
+
+#** Cash flows **#
+
+def payments(events: 'pd.DataFrame') -> 'pd.DataFrame':
+    return events[events['Kind'].isin(list(PAY_DESC) + [Event.TAX])]
+
+def rent_by_square(events: 'pd.DataFrame') -> 'pd.Series':
+    # rent paid on each square, card rent included
+    rent = events[events['Kind'].isin([Event.RENT, Event.CARD_RENT])]
+    return rent.groupby('Square')['Amount'].sum()
+
+def cash_flow_totals(events: 'pd.DataFrame') -> 'pd.Series':
+    # total amount moved by each kind of payment
+    p = payments(events)
+    return p.groupby(p['Kind'].map(lambda k: Event(k).name))['Amount'].sum()
@@ -0,0 +1,134 @@
+from typing import Callable, Iterable, NamedTuple
+
+import argparse
+import math
+import statistics
+import time
+
+from batch import BatchTask, GameResult, game_seeds, iter_batch, seat_strategies
+from strategy import STRATEGIES
+
+# common random numbers: both arms of a pair play the same seed, so they share the deck order
+# and the dice stream, and the noise the two games have in common cancels in their difference.
+# Dice are consumed in order rather than per player, so the arms stay in step until their
+# decisions change how often the dice are rolled.
+DESIGNS: tuple[str, ...] = ('independent', 'crn', 'antithetic')
+
+# metric name -> value of a finished game for the seat under study
+METRICS: dict[str, Callable[[GameResult, int], float]] = {
+    'win': lambda r, seat: float(r.winner == seat),
+    'money': lambda r, seat: float(r.money[seat-1]),
+    'rounds': lambda r, seat: float(r.rounds),
+}
+
+class Estimate(NamedTuple):
+    metric: str
+    mean_a: float
+    mean_b: float
+    diff: float # a - b
+    lo: float
+    hi: float
+    reduction: float # variance of an independent design with as many games over this one
+
+def unit_games(design: str) -> int:
+    # games per paired observation: a and b, and their antithetic twins
+    return 4 if design == 'antithetic' else 2
+
+class Experiment:
+    # arm a against arm b, each a strategy per seat, on num_pairs paired observations
+    def __init__(self, arm_a: Iterable[str], arm_b: Iterable[str], num_players: int=2, num_pairs: int=1000,
+                 design: str='crn', master_seed: int=0, max_rounds: int=30, seat: int=1, confidence: float=0.95):
+        if design not in DESIGNS:
+            raise ValueError(f'unknown design {design!r}, expected one of {list(DESIGNS)}')
+        if not 1 <= seat <= num_players:
+            raise ValueError(f'seat {seat} not in a {num_players} player game')
+        self.arm_a: tuple[str, ...] = seat_strategies(arm_a, num_players)
+        self.arm_b: tuple[str, ...] = seat_strategies(arm_b, num_players)
+        self.num_players: int = num_players
+        self.num_pairs: int = num_pairs
+        self.design: str = design
+        self.master_seed: int = master_seed
+        self.max_rounds: int = max_rounds
+        self.seat: int = seat
+        self.z: float = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        self.results: list[GameResult] = []
+
+    def tasks(self) -> list[BatchTask]:
+        # game id = unit * games per unit + a, b, antithetic a, antithetic b
+        g = unit_games(self.design)
+        seeds = game_seeds(self.master_seed, 2 * self.num_pairs if self.design == 'independent' else self.num_pairs)
+        ret: list[BatchTask] = []
+        for i in range(self.num_pairs):
+            seed_a = seeds[i]
+            seed_b = seeds[self.num_pairs + i] if self.design == 'independent' else seed_a
+            ret.append(BatchTask(i*g, seed_a, self.num_players, self.max_rounds, self.arm_a))
+            ret.append(BatchTask(i*g+1, seed_b, self.num_players, self.max_rounds, self.arm_b))
+            if self.design == 'antithetic':
+                ret.append(BatchTask(i*g+2, seed_a, self.num_players, self.max_rounds, self.arm_a, True))
+                ret.append(BatchTask(i*g+3, seed_b, self.num_players, self.max_rounds, self.arm_b, True))
+        return ret
+
+    def run(self, workers: int | None=None) -> None:
+        self.results = sorted(iter_batch(self.tasks(), workers), key=lambda r: r.game_id)
+
+    #** Estimators **#
+
+    def estimate(self, metric: str) -> Estimate:
+        # mean of the paired differences with a normal interval; an antithetic unit averages the
+        # difference of the plain and the mirrored pair
+        value = METRICS[metric]
+        g = unit_games(self.design)
+        a = [value(r, self.seat) for r in self.results if r.game_id % 2 == 0]
+        b = [value(r, self.seat) for r in self.results if r.game_id % 2 == 1]
+        d = [statistics.fmean(x - y for x, y in zip(a[i:i+g//2], b[i:i+g//2])) for i in range(0, len(a), g//2)]
+        n = len(d)
+        diff = statistics.fmean(d)
+        var_d = statistics.variance(d) if n > 1 else math.inf
+        half = self.z * math.sqrt(var_d / n)
+        # an independent design splits the same n*g games evenly between the arms
+        var_ind = 2 * (statistics.variance(a) + statistics.variance(b)) / g if n > 1 else math.inf
+        reduction = var_ind / var_d if var_d > 0 else math.inf
+        return Estimate(metric, statistics.fmean(a), statistics.fmean(b), diff, diff - half, diff + half, reduction)
+
+    def report(self) -> str:
+        lines = [f'{" ".join(self.arm_a)} vs {" ".join(self.arm_b)}, seat {self.seat}: {self.num_pairs} pairs, '
+                 f'{len(self.results)} games, {self.design} design']
+        lines.append(f'{"metric":<8} {"a":>10} {"b":>10} {"a - b":>10} {"interval":>23} {"var. red.":>9}')
+        for m in METRICS:
+            e = self.estimate(m)
+            lines.append(f'{m:<8} {e.mean_a:>10.3f} {e.mean_b:>10.3f} {e.diff:>10.3f} '
+                         f'{f"[{e.lo:.3f}, {e.hi:.3f}]":>23} {e.reduction:>8.1f}x')
+        return '\n'.join(lines)
+
+#** CLI **#
+
+def main(argv: list[str] | None=None) -> None:
+    parser = argparse.ArgumentParser(description='Compare two strategy assignments on paired games.')
+    parser.add_argument('-a', '--arm-a', nargs='+', required=True, help='strategy names by seat for arm a')
+    parser.add_argument('-b', '--arm-b', nargs='+', required=True, help='strategy names by seat for arm b')
+    parser.add_argument('-p', '--players', type=int, default=2)
+    parser.add_argument('-n', '--pairs', type=int, default=1000, help='paired observations')
+    parser.add_argument('-d', '--design', choices=DESIGNS, default='crn',
+                        help='independent seeds, common random numbers, or common plus antithetic dice')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed')
+    parser.add_argument('-r', '--rounds', type=int, default=30, help='round limit per game')
+    parser.add_argument('--seat', type=int, default=1, help='seat the metrics are measured for')
+    parser.add_argument('-c', '--confidence', type=float, default=0.95)
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+    for name in args.arm_a + args.arm_b:
+        if name not in STRATEGIES:
+            parser.error(f'unknown strategy {name!r}, expected one of {list(STRATEGIES)}')
+    if not 1 <= args.seat <= args.players:
+        parser.error(f'seat {args.seat} not in a {args.players} player game')
+
+    e = Experiment(args.arm_a, args.arm_b, args.players, args.pairs, args.design, args.seed, args.rounds,
+                   args.seat, args.confidence)
+    start = time.perf_counter()
+    e.run(args.workers)
+    elapsed = time.perf_counter() - start
+    print(e.report())
+    print(f'{len(e.results)} games in {elapsed:.2f}s ({len(e.results)/elapsed:.0f} games/s)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import html
+import inspect
+import math
+import os
+import re
+import sys
+import time
+
+from batch import BatchTask, iter_jobs, make_tasks, play
+from game import Game
+from strategy import STRATEGIES
+
+# Game methods drawn on the flowchart, by line; their nodes are the source lines that ran, so the
+# chart follows the code without being edited by hand
+TRACED: tuple[str, ...] = ('run', 'step', 'get_out_of_jail', 'move_and_evaluate', 'eval_pos', 'eval_ch', 'eval_cc')
+SCHEME_PATH: str = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scheme', 'run.dot'))
+ENTRY: int = 0 # line number of the call node of a method
+RETURN: int = -1
+
+Node = tuple[str, int] # method, line
+
+class FlowTrace:
+    # line to line transitions inside the traced methods, calls between them and the time from
+    # each line to the next one of the same call (so including the methods it calls)
+    def __init__(self):
+        self.edges: dict[tuple[Node, Node], int] = {}
+        self.calls: dict[tuple[Node, Node], int] = {}
+        self.ns: dict[Node, int] = {}
+        self.games: int = 0
+
+    def tracer(self):
+        codes = {getattr(Game, name).__code__: name for name in TRACED}
+        edges, calls, ns = self.edges, self.calls, self.ns
+        clock = time.perf_counter_ns
+
+        def local_tracer(name: str):
+            last, t = (name, ENTRY), clock()
+            def local(frame, event, arg):
+                nonlocal last, t
+                if event == 'line' or event == 'return':
+                    now = clock()
+                    node = (name, frame.f_lineno if event == 'line' else RETURN)
+                    edges[last, node] = edges.get((last, node), 0) + 1
+                    ns[last] = ns.get(last, 0) + now - t
+                    last, t = node, now
+                return local
+            return local
+
+        def tracer(frame, event, arg):
+            name = codes.get(frame.f_code)
+            if name is None:
+                return None
+            # from the line of the nearest traced caller, e.g. eval_pos calls eval_ch through ch
+            caller = frame.f_back
+            while caller is not None and caller.f_code not in codes:
+                caller = caller.f_back
+            if caller is not None:
+                key = ((codes[caller.f_code], caller.f_lineno), (name, ENTRY))
+                calls[key] = calls.get(key, 0) + 1
+            return local_tracer(name)
+        return tracer
+
+    def play(self, task: BatchTask) -> None:
+        sys.settrace(self.tracer())
+        try:
+            play(task)
+        finally:
+            sys.settrace(None)
+        self.games += 1
+
+    def merge(self, other: 'FlowTrace') -> None:
+        for mine, theirs in ((self.edges, other.edges), (self.calls, other.calls), (self.ns, other.ns)):
+            for k, v in theirs.items():
+                mine[k] = mine.get(k, 0) + v
+        self.games += other.games
+
+    def run_ns(self) -> int: return max(sum(v for (f, _), v in self.ns.items() if f == 'run'), 1)
+
+    def visits(self) -> dict[Node, int]:
+        # entries are counted leaving, they are not always called from a traced method (run never is)
+        ret: dict[Node, int] = {}
+        for (a, b), n in self.edges.items():
+            ret[b] = ret.get(b, 0) + n
+            if a[1] == ENTRY:
+                ret[a] = ret.get(a, 0) + n
+        return ret
+
+    #** Reports **#
+
+    def report(self, top: int=15) -> str:
+        # hottest lines by time and the split of every branch taken both ways
+        src = source_lines()
+        total = self.run_ns()
+        visits = self.visits()
+        lines = [f'{self.games} games traced, {total/1e6:.0f} ms in run (with tracing overhead)',
+                 f'{"method":<18} {"line":>5} {"visits":>9} {"ms":>8} {"%":>6}  source']
+        for node in sorted(self.ns, key=lambda n: -self.ns[n])[:top]:
+            lines.append(f'{node[0]:<18} {node[1]:>5} {visits.get(node, 0):>9} {self.ns[node]/1e6:>8.1f} '
+                         f'{self.ns[node]/total:>6.1%}  {src.get(node, "")}')
+        lines.append('branches:')
+        out: dict[Node, list[tuple[Node, int]]] = {}
+        for (a, b), n in self.edges.items():
+            out.setdefault(a, []).append((b, n))
+        for a, succ in sorted(out.items()):
+            if len(succ) > 1 and is_branch(src.get(a, '')):
+                total_a = sum(n for _, n in succ)
+                split = ', '.join(f'line {b[1] if b[1] != RETURN else "return"} {n/total_a:.1%}'
+                                  for b, n in sorted(succ, key=lambda s: -s[1]))
+                lines.append(f'  {a[0]}:{a[1]} {src.get(a, "")}: {split}')
+        return '\n'.join(lines)
+
+    def to_dot(self) -> str:
+        src = source_lines()
+        visits = self.visits()
+        run_ns = self.run_ns()
+        max_edge = max(list(self.edges.values()) + list(self.calls.values()) + [1])
+
+        ids = node_ids(src)
+        def node_id(n: Node) -> str: return ids[n]
+        def width(count: int) -> float: return round(1 + 5 * math.log1p(count) / math.log1p(max_edge), 2)
+
+        out = ['digraph run_scheme {',
+               '    // generated by python/flowtrace.py from traced games, do not edit',
+               '    compound = true;',
+               '    fontname = "Handlee";',
+               '    node [fontname = "Handlee"];',
+               '    edge [fontname = "Handlee"; fontsize = 10;];',
+               f'    label = <{self.games} games, edge labels are transitions per game, node colour is the share of run time>;',
+               '']
+        per_game = max(self.games, 1)
+        for name in TRACED:
+            nodes = sorted({n for n in visits if n[0] == name}, key=lambda n: (n[1] == RETURN, n[1]))
+            if not nodes:
+                continue
+            out += [f'    subgraph cluster_{name} {{',
+                    '        bgcolor = "cornsilk";',
+                    f'        label = <<FONT FACE="Monaco" POINT-SIZE="14.0">Game.{name}()</FONT>>;']
+            for n in nodes:
+                share = self.ns.get(n, 0) / run_ns
+                stats = f'{visits[n]/per_game:.1f}/game'
+                if n[1] not in (ENTRY, RETURN):
+                    stats += f', {self.ns.get(n, 0)/1e6/per_game:.3f} ms/game ({share:.1%})'
+                if n[1] == ENTRY:
+                    label, shape, color = f'self.{name}()', 'oval', 'lawngreen'
+                elif n[1] == RETURN:
+                    label, shape, color = 'Return', 'oval', 'tomato'
+                else:
+                    label = src.get(n, '')
+                    shape = 'diamond' if is_branch(label) else 'rect'
+                    # white to red by share of run time
+                    color = f'0.000 {min(share * 4, 1):.3f} 1.000'
+                out.append(f'        {node_id(n)} [label = <<FONT FACE="Monaco" POINT-SIZE="11.0">{html.escape(label, False)}'
+                           f'</FONT><BR/><FONT POINT-SIZE="9.0">{stats}</FONT>>; shape = {shape}; '
+                           f'fillcolor = "{color}"; style = filled;];')
+            out += ['    }', '']
+        out.append('    // EDGES')
+        out_counts: dict[Node, int] = {}
+        for (a, b), n in self.edges.items():
+            out_counts[a] = out_counts.get(a, 0) + n
+        for (a, b), n in sorted(self.edges.items()):
+            label = f'{n/per_game:.1f}'
+            if out_counts[a] != n:
+                label += f' ({n/out_counts[a]:.0%})'
+            out.append(f'    {node_id(a)} -> {node_id(b)} [label = "  {label}"; penwidth = {width(n)};];')
+        for (a, b), n in sorted(self.calls.items()):
+            out.append(f'    {node_id(a)} -> {node_id(b)} [label = "  {n/per_game:.1f}"; penwidth = {width(n)}; '
+                       f'style = dashed; color = "blue";];')
+        out.append('}')
+        return '\n'.join(out) + '\n'
+
+def source_lines() -> dict[Node, str]:
+    ret: dict[Node, str] = {}
+    for name in TRACED:
+        lines, start = inspect.getsourcelines(getattr(Game, name))
+        for i, line in enumerate(lines):
+            ret[name, start + i] = line.strip()
+    return ret
+
+def node_ids(src: dict[Node, str]) -> dict[Node, str]:
+    # method and statement text rather than line numbers, so the ids of run.dot only change with the
+    # statements themselves; a statement repeated in a method is numbered in source order
+    ret: dict[Node, str] = {}
+    used: set[str] = set()
+    for name, line in sorted(src):
+        slug = re.sub(r'\W+', '_', src[name, line], flags=re.ASCII).strip('_')[:48] or 'blank'
+        key, i = f'{name}__s_{slug}', 1
+        while key in used:
+            i += 1
+            key = f'{name}__s_{slug}_{i}'
+        used.add(key)
+        ret[name, line] = key
+    for name in TRACED:
+        ret[name, ENTRY] = f'{name}__call'
+        ret[name, RETURN] = f'{name}__return'
+    return ret
+
+def is_branch(line: str) -> bool: return line.startswith(('if ', 'elif ', 'for ', 'while ', 'match ', 'case '))
+
+def trace_chunk(tasks: list[BatchTask]) -> FlowTrace:
+    t = FlowTrace()
+    for task in tasks:
+        t.play(task)
+    return t
+
+def trace_batch(tasks: list[BatchTask], workers: int | None=None, chunksize: int=16) -> FlowTrace:
+    ret = FlowTrace()
+    chunks = [tasks[i:i+chunksize] for i in range(0, len(tasks), chunksize)]
+    for t in iter_jobs(trace_chunk, chunks, workers, 1):
+        ret.merge(t)
+    return ret
+
+#** CLI **#
+
+def main(argv: list[str] | None=None) -> None:
+    parser = argparse.ArgumentParser(description='Trace a batch of games and draw the run loop with its hot paths.')
+    parser.add_argument('-n', '--games', type=int, default=200, help='games per player count')
+    parser.add_argument('-p', '--players', type=int, nargs='+', default=[4])
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed')
+    parser.add_argument('-r', '--rounds', type=int, default=30, help='round limit per game')
+    parser.add_argument('-S', '--strategies', nargs='+', choices=list(STRATEGIES), default=[],
+                        help='strategy names by seat, repeated to fill all seats')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('-o', '--out', default=SCHEME_PATH, help='flowchart to write (default: scheme/run.dot)')
+    args = parser.parse_args(argv)
+
+    tasks = make_tasks(args.games, args.players, args.seed, args.rounds, args.strategies)
+    start = time.perf_counter()
+    t = trace_batch(tasks, args.workers)
+    elapsed = time.perf_counter() - start
+    with open(args.out, 'w') as f:
+        f.write(t.to_dot())
+    print(t.report())
+    print(f'{len(tasks)} games traced in {elapsed:.2f}s, flowchart in {args.out}')
+
+if __name__ == '__main__':
+    main()
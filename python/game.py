@@ -1,74 +1,149 @@
-import pandas as pd
-import numpy as np
+from array import array
+from typing import TYPE_CHECKING, Callable, NamedTuple
 
-from typing import Callable
-
-import sys
 import random
-import datetime
-import re
+
+from turnlog import FullLog, DeltaLog, LastLog, make_log
+from events import Event, EventLog
+from snapshot import Snapshot
+from state import GameState
+from profiling import PhaseProfile
+import snapshot
+from strategy import Strategy, StateView, Trade, JAIL_STAY, JAIL_PAY, JAIL_CARD, JAIL_ROLL_DOUBLE
+from board import BOARD, COLORS, PROPERTY_POSITIONS, Square
+from board import CARD_JAIL_FREE, CH_MOVE_TO, NEAREST_RAILROAD, NEAREST_UTILITY, CH_COLLECT, CH_PAY, CC_COLLECT, CC_PAY
+from board import STREET, RAILROAD, UTILITY, GO, JAIL, FREE_PARKING, GO_TO_JAIL, CHANCE, COMMUNITY_CHEST, TAX
+
+# the simulation itself only needs the standard library; numpy and pandas are imported by the
+# writers, statistics and exports that use them
+if TYPE_CHECKING:
+    from logstore import LogWriter
+    from onlinestats import GameStats
+
+class ColumnLayout(NamedTuple):
+    round: int
+    player_idx: int
+    dice_value: int
+    money: tuple[int, ...] # idx 0 is the bank
+    pos: tuple[int, ...] # idx 0 unused
+    card_owner: tuple[int, ...] # by board position
+    street_level: tuple[int, ...] # by board position, -1 if not a street
+    street_level_by_id: dict[str, int]
+    railroad_owner: tuple[int, ...]
+    utility_owner: tuple[int, ...]
+    owner_cols: tuple[tuple[str, int], ...]
+    cc_jail_free_owner: int
+    ch_jail_free_owner: int
+
+DIE_FACES: tuple[int, ...] = (1, 2, 3, 4, 5, 6)
+
+class AntitheticRandom(random.Random):
+    # rolls every die of random.Random(seed) mirrored (d -> 7-d), decks are shuffled the same;
+    # only uniform draws are mirrored exactly, which is all the dice use
+    def randint(self, a: int, b: int) -> int: return a + b - super().randint(a, b)
+
+    def choices(self, population, weights=None, *, cum_weights=None, k=1):
+        return super().choices(population[::-1], weights, cum_weights=cum_weights, k=k)
 
 class Game:
-    def __init__(self, num_players: int, run: bool=False):
-        self.card_type_street: str = 'Street'
-        self.card_type_railroad: str = 'Railroad'
-        self.card_type_utility: str = 'Utility'
+    # the same for every game, so kept once on the class
+    card_type_street: str = STREET
+    card_type_railroad: str = RAILROAD
+    card_type_utility: str = UTILITY
 
-        self.jail_exit_method_stay: int = -1
-        self.jail_exit_method_pay: int = 0
-        self.jail_exit_method_card: int = 1
-        self.jail_exit_method_roll_double: int = 2
+    jail_exit_method_stay: int = JAIL_STAY
+    jail_exit_method_pay: int = JAIL_PAY
+    jail_exit_method_card: int = JAIL_CARD
+    jail_exit_method_roll_double: int = JAIL_ROLL_DOUBLE
 
-        self.colors: list[str] = ['b', 'l', 'p', 'o', 'r', 'y', 'g', 'd']
+    colors: tuple[str, ...] = COLORS
 
-        self.num_players: int = num_players
-        self.active_players: list[int] = list(range(1, self.num_players+1))
-
-        # self.seed = random.randrange(sys.maxsize)
-        self.seed = 0
-        random.seed(self.seed)
+    # columns, their indexes and the layout by player count, shared by all games of a size
+    schemas: dict[int, tuple[list[str], dict[str, int], ColumnLayout]] = {}
 
-        self.cols: list[str] = [
-            self.label_round(),
-            self.label_player_idx(),
-            self.label_dice_value(),
-            self.label_bank_money()
-        ]
-        self.cols += [self.label_player_money(i+1) for i in range(num_players)]
-        self.cols += [self.label_player_pos(i+1) for i in range(num_players)]
-
-        for s in self.all_street_ids():
-            self.cols += [self.label_street_owner(s), self.label_street_level(s)]
-        for i in range(4):
-            self.cols.append(self.label_railroad_owner(i+1))
-        for i in range(2):
-            self.cols.append(self.label_utility_owner(i+1))
+    def __init__(self, num_players: int, run: bool=False, log_mode: str='full', seed: int=0,
+                 max_rounds: int=30, verbose: bool=True, rng=None, dice_block: int=0,
+                 writer: 'LogWriter | None'=None, game_id: int=0, strategies: Strategy | list[Strategy] | None=None,
+                 profile: PhaseProfile | None=None, stats: 'GameStats | None'=None):
+        self.num_players: int = num_players
+        self.active_players: array = array('b', range(1, self.num_players+1))
 
-        self.cols += [self.label_cc_jail_free_owner(), self.label_ch_jail_free_owner()]
+        self.max_rounds: int = max_rounds
+        self.verbose: bool = verbose
 
-        self.get_label_index: Callable[[str], int] = lambda label: self.cols.index(label)
+        # self.seed = random.randrange(sys.maxsize)
+        self.seed: int = seed
+        self.rng = random.Random(self.seed) if rng is None else rng # random.Random or numpy Generator
+        self.dice_block: int = dice_block
+        self.dice_buf: list[int] = []
+        self.dice_buf_pos: int = 0
+
+        if num_players not in Game.schemas:
+            Game.schemas[num_players] = self.build_schema()
+        self.cols: list[str]
+        self.col_idx: dict[str, int]
+        self.layout: ColumnLayout
+        self.cols, self.col_idx, self.layout = Game.schemas[num_players]
+        self.get_label_index: Callable[[str], int] = self.col_idx.__getitem__
+
+        # decisions per player, idx 0 unused; players whose strategy never builds, trades or
+        # mortgages skip those phases entirely
+        if strategies is None:
+            strategies = Strategy()
+        if isinstance(strategies, Strategy):
+            strategies = [strategies] * num_players
+        if len(strategies) != num_players:
+            raise ValueError(f'expected {num_players} strategies, got {len(strategies)}')
+        self.strategies: list[Strategy | None] = [None] + list(strategies)
+        self.passive: list[bool] = [True] + [all(getattr(type(s), m) is getattr(Strategy, m)
+                                                 for m in ('build', 'raise_cash', 'unmortgage', 'trade'))
+                                             for s in strategies]
+        self.view: StateView = StateView(self)
+        self.mortgaged: bytearray = bytearray(40) # by board position
 
         start_player: int = self.get_start_player_idx()
+        self.start_player: int = start_player
+
+        self.data: FullLog | DeltaLog | LastLog = make_log(log_mode)
+        self.events: EventLog = EventLog(log_mode != 'none') # one batch of events per committed row
 
-        self.data: list[list[int]] = []
-        self.notes: list[str] = []
-        self.note_entry: str = ''
+        # optional stream of committed rows, e.g. into a columnar dataset shared by many games
+        self.game_id: int = game_id
+        self.writer: 'LogWriter | None' = writer
+        if writer is not None:
+            writer.set_columns(self.cols, self.column_dtypes())
 
         r: list[int] = [1, start_player, 0, 20580-num_players*1500]
         r += [1500] * num_players
         r += [0] * num_players
         r += [0] * (len(self.cols)-len(r))
 
-        self.data.append(r)
+        self.row: array = array('i', r) # the live state, updated in place for the whole game
 
-        self.ch_lst: list[int] = list(range(1,17))
-        random.shuffle(self.ch_lst)
-        self.cc_lst: list[int] = list(range(1,17))
-        random.shuffle(self.cc_lst)
+        # per player (idx 0 for unowned) indexes over the row, kept up to date by the set methods
+        self.owned: list[set[int]] = []
+        self.group_owned: list[list[int]] = [] # by the first position of a group
+        self.houses: list[int] = []
+        self.hotels: list[int] = []
+        self.property_value: list[int] = [] # mortgage value of unmortgaged squares plus buildings at cost
+        self.reindex()
+
+        self.ch_lst: array = array('b', range(1,17))
+        self.rng.shuffle(self.ch_lst)
+        self.cc_lst: array = array('b', range(1,17))
+        self.rng.shuffle(self.cc_lst)
 
         self.save_dir = './log'
         self.file_name = f'{self.save_dir}/data_ranseed{self.seed}_strtplyr{start_player}.csv'
 
+        # optional running statistics fed with every committed row
+        self.stats: 'GameStats | None' = stats
+
+        # opt-in timing per phase, nothing is wrapped without it
+        self.profile: PhaseProfile | None = profile
+        if profile is not None:
+            profile.instrument(self)
+
         if run:
             self.run()
 
@@ -101,69 +176,170 @@ class Game:
                 ret.append(f'{c}{j}')
         return ret
 
+    #** Layout methods **#
+
+    def build_schema(self) -> tuple[list[str], dict[str, int], ColumnLayout]:
+        cols = [
+            self.label_round(),
+            self.label_player_idx(),
+            self.label_dice_value(),
+            self.label_bank_money()
+        ]
+        cols += [self.label_player_money(i+1) for i in range(self.num_players)]
+        cols += [self.label_player_pos(i+1) for i in range(self.num_players)]
+
+        for s in self.all_street_ids():
+            cols += [self.label_street_owner(s), self.label_street_level(s)]
+        for i in range(4):
+            cols.append(self.label_railroad_owner(i+1))
+        for i in range(2):
+            cols.append(self.label_utility_owner(i+1))
+
+        cols += [self.label_cc_jail_free_owner(), self.label_ch_jail_free_owner()]
+
+        self.col_idx = {label: i for i, label in enumerate(cols)}
+        return cols, self.col_idx, self.build_layout()
+
+    def build_layout(self) -> ColumnLayout:
+        idx = self.col_idx
+        players = range(1, self.num_players+1)
+        street_ids = self.all_street_ids()
+        street_level_by_id = {s: idx[self.label_street_level(s)] for s in street_ids}
+
+        card_owner: list[int] = [-1] * 40
+        street_level: list[int] = [-1] * 40
+        for pos in PROPERTY_POSITIONS:
+            card_owner[pos] = idx[self.pos_to_card(pos)]
+            if BOARD[pos].kind == STREET:
+                street_level[pos] = street_level_by_id[BOARD[pos].id]
+
+        owner_labels = [self.label_street_owner(s) for s in street_ids]
+        owner_labels += [self.label_railroad_owner(i+1) for i in range(4)]
+        owner_labels += [self.label_utility_owner(i+1) for i in range(2)]
+
+        return ColumnLayout(
+            round=idx[self.label_round()],
+            player_idx=idx[self.label_player_idx()],
+            dice_value=idx[self.label_dice_value()],
+            money=tuple([idx[self.label_bank_money()]] + [idx[self.label_player_money(p)] for p in players]),
+            pos=tuple([-1] + [idx[self.label_player_pos(p)] for p in players]),
+            card_owner=tuple(card_owner),
+            street_level=tuple(street_level),
+            street_level_by_id=street_level_by_id,
+            railroad_owner=tuple(idx[self.label_railroad_owner(i+1)] for i in range(4)),
+            utility_owner=tuple(idx[self.label_utility_owner(i+1)] for i in range(2)),
+            owner_cols=tuple((label, idx[label]) for label in owner_labels),
+            cc_jail_free_owner=idx[self.label_cc_jail_free_owner()],
+            ch_jail_free_owner=idx[self.label_ch_jail_free_owner()],
+        )
+
+    def column_dtypes(self) -> list[str]:
+        # smallest integer type that holds each column
+        dtypes = ['int8'] * len(self.cols)
+        dtypes[self.layout.round] = 'int16'
+        for i in self.layout.money:
+            dtypes[i] = 'int32'
+        return dtypes
+
     #** Get methods **#
 
-    def get_data(self, label: str, idx: int=-1) -> int: return self.data[idx][self.get_label_index(label)]
-    def get_round(self, idx: int=-1) -> int: return self.get_data(self.label_round(), idx)
-    def get_money(self, plyr_idx: int, idx: int=-1) -> int: return self.get_data(self.label_bank_money() if plyr_idx == 0 else self.label_player_money(plyr_idx), idx)
+    def get_row(self, idx: int=-1) -> list[int]: return self.row if idx == -1 else self.data[idx]
+    def get_data(self, label: str, idx: int=-1) -> int: return self.get_row(idx)[self.get_label_index(label)]
+    def get_round(self, idx: int=-1) -> int: return self.get_row(idx)[self.layout.round]
+    def get_money(self, plyr_idx: int, idx: int=-1) -> int: return self.get_row(idx)[self.layout.money[plyr_idx]]
     def get_bank_money(self, idx: int=-1) -> int: return self.get_money(0, idx)
     def get_player_money(self, plyr_idx: int, idx: int=-1) -> int: return self.get_money(plyr_idx, idx)
-    def get_player_idx(self, idx: int=-1) -> int: return self.get_data(self.label_player_idx(), idx)
-    def get_dice_value(self, idx: int=-1) -> int: return self.get_data(self.label_dice_value(), idx)
-    def get_player_pos(self, plyr_idx: int, idx: int=-1) -> int: return self.get_data(self.label_player_pos(plyr_idx), idx)
-    def get_card_owner(self, pos: int, idx: int=-1) -> int: return self.get_data(self.pos_to_card(pos), idx)
-    def get_cc_jail_free_owner(self, idx: int=-1) -> int: return self.get_data(self.label_cc_jail_free_owner(), idx)
-    def get_ch_jail_free_owner(self, idx: int=-1) -> int: return self.get_data(self.label_ch_jail_free_owner(), idx)
+    def get_player_idx(self, idx: int=-1) -> int: return self.get_row(idx)[self.layout.player_idx]
+    def get_dice_value(self, idx: int=-1) -> int: return self.get_row(idx)[self.layout.dice_value]
+    def get_player_pos(self, plyr_idx: int, idx: int=-1) -> int: return self.get_row(idx)[self.layout.pos[plyr_idx]]
+    def get_card_owner(self, pos: int, idx: int=-1) -> int: return self.get_row(idx)[self.layout.card_owner[pos]]
+    def get_cc_jail_free_owner(self, idx: int=-1) -> int: return self.get_row(idx)[self.layout.cc_jail_free_owner]
+    def get_ch_jail_free_owner(self, idx: int=-1) -> int: return self.get_row(idx)[self.layout.ch_jail_free_owner]
+    def get_railroad_owner(self, n: int, idx: int=-1) -> int: return self.get_row(idx)[self.layout.railroad_owner[n-1]]
+    def get_utility_owner(self, n: int, idx: int=-1) -> int: return self.get_row(idx)[self.layout.utility_owner[n-1]]
 
     def get_street_level(self, id_pos: str | int, idx: int=-1) -> int:
         if type(id_pos) == int:
-            id = self.extract_card_id(self.pos_to_card(id_pos))
-            return self.get_data(self.label_street_level(id), idx)
+            return self.get_row(idx)[self.layout.street_level[id_pos]]
         elif type(id_pos) == str:
-            return self.get_data(self.label_street_level(id_pos), idx)
+            return self.get_row(idx)[self.layout.street_level_by_id[id_pos]]
         else:
             raise TypeError
 
-    def get_card_level(self, label: str) -> int:
-        if self.extract_card_type(label) == self.card_type_street:
-            self.get_street_level(self.extract_card_id(label))
+    def get_card_level(self, pos: int, idx: int=-1) -> int:
+        if BOARD[pos].kind == STREET:
+            return self.get_street_level(pos, idx)
         else:
             return 0
 
     def get_all_card_owner_data(self, idx: int=-1) -> dict[str, int]:
-        label = self.label_street_owner('').split()
-        cols = [x for x in self.cols if x.split()[::2] == label]
-        cols += [x for x in self.cols if self.extract_card_type(x) == self.card_type_railroad]
-        cols += [x for x in self.cols if self.extract_card_type(x) == self.card_type_utility]
-        return {k: self.get_data(k, idx) for k in cols}
+        row = self.get_row(idx)
+        return {label: row[i] for label, i in self.layout.owner_cols}
 
     #** Set methods **#
 
-    def set_data(self, label: str, val: int) -> None: self.data[-1][self.get_label_index(label)] = val
-    def set_round(self, val: int) -> None: self.set_data(self.label_round(), val)
-    def set_money(self, plyr_idx: int, val: int) -> None: return self.set_data(self.label_bank_money() if plyr_idx == 0 else self.label_player_money(plyr_idx), val)
+    def set_data(self, label: str, val: int) -> None: self.row[self.get_label_index(label)] = val
+    def set_round(self, val: int) -> None: self.row[self.layout.round] = val
+    def set_money(self, plyr_idx: int, val: int) -> None: self.row[self.layout.money[plyr_idx]] = val
     def set_bank_money(self, val: int) -> None: return self.set_money(0, val)
     def set_player_money(self, plyr_idx: int, val: int) -> None: return self.set_money(plyr_idx, val)
-    def set_player_idx(self, val: int) -> None: return self.set_data(self.label_player_idx(), val)
-    def set_dice_value(self, val: int) -> None: return self.set_data(self.label_dice_value(), val)
-    def set_player_pos(self, plyr_idx: int, val: int) -> None: return self.set_data(self.label_player_pos(plyr_idx), val)
-    def set_card_owner(self, pos: int, plyr_idx: int) -> None: return self.set_data(self.pos_to_card(pos), plyr_idx)
-    def set_cc_jail_free_owner(self, plyr_idx: int) -> int: return self.get_data(self.label_cc_jail_free_owner(), plyr_idx)
-    def set_ch_jail_free_owner(self, plyr_idx: int) -> int: return self.get_data(self.label_ch_jail_free_owner(), plyr_idx)
-
-    def add_note_entry(self, note: str, end: str=';') -> None:
-        self.note_entry += note + end
-
-    def reset_note_entry(self) -> None: self.note_entry = ''
-
-    def add_note_to_list(self) -> None:
-        self.notes.append(self.note_entry)
-        self.reset_note_entry()
+    def set_player_idx(self, val: int) -> None: self.row[self.layout.player_idx] = val
+    def set_dice_value(self, val: int) -> None: self.row[self.layout.dice_value] = val
+    def set_player_pos(self, plyr_idx: int, val: int) -> None: self.row[self.layout.pos[plyr_idx]] = val
+
+    def set_card_owner(self, pos: int, plyr_idx: int) -> None:
+        self.unindex(pos)
+        self.row[self.layout.card_owner[pos]] = plyr_idx
+        self.index(pos)
+
+    def set_street_level(self, pos: int, val: int) -> None:
+        self.unindex(pos)
+        self.row[self.layout.street_level[pos]] = val
+        self.index(pos)
+
+    def set_mortgaged(self, pos: int, val: bool) -> None:
+        self.unindex(pos)
+        self.mortgaged[pos] = val
+        self.index(pos)
+
+    def set_cc_jail_free_owner(self, plyr_idx: int) -> None: self.row[self.layout.cc_jail_free_owner] = plyr_idx
+    def set_ch_jail_free_owner(self, plyr_idx: int) -> None: self.row[self.layout.ch_jail_free_owner] = plyr_idx
+
+    #** Index methods **#
+
+    def index(self, pos: int, sign: int=1) -> None:
+        owner: int = self.row[self.layout.card_owner[pos]]
+        sq: Square = BOARD[pos]
+        lvl: int = self.get_card_level(pos)
+        houses, hotels = self.num_houses(lvl), self.num_hotels(lvl)
+        if sign > 0:
+            self.owned[owner].add(pos)
+        else:
+            self.owned[owner].discard(pos)
+        self.group_owned[owner][sq.group[0]] += sign
+        self.houses[owner] += sign*houses
+        self.hotels[owner] += sign*hotels
+        self.property_value[owner] += sign*((0 if self.mortgaged[pos] else sq.mortgage) + (houses + 5*hotels)*sq.house_price)
+
+    def unindex(self, pos: int) -> None: self.index(pos, -1)
+
+    def reindex(self) -> None:
+        # rebuild from scratch after the row was replaced, e.g. by a snapshot or a logged row
+        n = self.num_players+1
+        self.owned = [set() for _ in range(n)]
+        self.group_owned = [[0] * 40 for _ in range(n)]
+        self.houses = [0] * n
+        self.hotels = [0] * n
+        self.property_value = [0] * n
+        for pos in PROPERTY_POSITIONS:
+            self.index(pos)
+
+    def notes(self) -> list[str]: return self.events.notes()
 
     #** Single liners **#
 
     def has_enough_money(self, plyr_idx: int, amt: int) -> bool: return self.get_money(plyr_idx) >= amt
-    def player_in_jail(self, plyr_idx: int, idx: int=-1) -> bool: return self.get_data(self.label_player_pos(plyr_idx), idx) == -1
+    def player_in_jail(self, plyr_idx: int, idx: int=-1) -> bool: return self.get_player_pos(plyr_idx, idx) == -1
     def sum_dice_value(self, dice_value: int | list[int]) -> int:
         if type(dice_value) == int:
             return (dice_value//10) + (dice_value%10)
@@ -171,77 +347,33 @@ class Game:
             return dice_value[0] + dice_value[1]
 
     def go_to_jail(self, plyr_idx: int) -> None:
+        pos = self.get_player_pos(plyr_idx)
         ret = self.move(plyr_idx, -1, False, False)
-        self.add_note_entry(f'gtj.p{plyr_idx}')
+        self.events.add(Event.GO_TO_JAIL, plyr_idx, square=pos)
         return ret
 
     #** Info methods **#
 
-    def street_id_to_street_idx(self, id: str) -> int:
-        color_idx = self.extract_card_color_idx_from_id(id)
-        return (3 * color_idx) + self.extract_card_idx_from_id(id) - 1
-
-    def cost(self, pos: int) -> int:
-        label = self.pos_to_card(pos)
-        typ = self.extract_card_type(label)
-        if typ == self.card_type_street:
-            d = [60, 60, None, 100, 100, 120, 140, 140, 160, 180, 180, 200,
-                 220, 220, 240, 260, 260, 280, 300, 300, 320, 350, 400, None]
-            return d[self.street_id_to_street_idx(self.extract_card_id(label))]
-        elif typ == self.card_type_railroad:
-            return 200
-        else: # utility
-            return 150
-        
+    def cost(self, pos: int) -> int: return BOARD[pos].price
+
+    def group_owned_count(self, pos: int, owner: int) -> int: return self.group_owned[owner][BOARD[pos].group[0]]
+
+    def has_group(self, pos: int, owner: int) -> bool: return self.group_owned_count(pos, owner) == len(BOARD[pos].group)
+
+    def group_built(self, pos: int) -> bool:
+        return BOARD[pos].kind == STREET and any(self.get_street_level(p) >= 2 for p in BOARD[pos].group)
+
     def rent(self, pos: int) -> int:
-        label = self.pos_to_card(pos)
-        typ = self.extract_card_type(label)
-        id = self.extract_card_id(label)
-        if typ == self.card_type_street:
-            d = [[2, 4, 10, 30, 90, 160, 250],
-                 [4, 8, 20, 60, 180, 320, 450],
-                 None,
-                 [6, 12, 30, 90, 270, 400, 550],
-                 [6, 12, 30, 90, 270, 400, 550],
-                 [8, 16, 40, 100, 300, 450, 600],
-                 [10, 20, 50, 150, 450, 625, 750],
-                 [10, 20, 50, 150, 450, 625, 750],
-                 [12, 24, 60, 180, 500, 700, 900],
-                 [14, 28, 70, 200, 550, 750, 950],
-                 [14, 28, 70, 200, 550, 750, 950],
-                 [16, 32, 80, 220, 600, 800, 1000],
-                 [18, 36, 90, 250, 700, 875, 1050],
-                 [18, 36, 90, 250, 700, 875, 1050],
-                 [20, 40, 100, 300, 750, 925, 1100],
-                 [22, 44, 110, 330, 800, 975, 1150],
-                 [22, 44, 110, 330, 800, 975, 1150],
-                 [24, 48, 120, 360, 850, 1025, 1200],
-                 [26, 52, 130, 390, 900, 1100, 1275],
-                 [26, 52, 130, 390, 900, 1100, 1275],
-                 [28, 56, 150, 450, 1000, 1200, 1400],
-                 [35, 70, 175, 500, 1100, 1300, 1500],
-                 [50, 100, 200, 600, 1400, 1700, 2000],
-                 None]
-            lvl = self.get_street_level(pos)
-            return d[self.street_id_to_street_idx(id)][lvl]
-        elif typ == self.card_type_railroad:
-            l = [1,2,3,4]
-            l.remove(self.extract_card_idx_from_id(id))
-            cnt = 1
-            owner = self.get_card_owner(pos)
-            for i in l:
-                cnt += int(self.get_data(self.label_railroad_owner(i)) == owner)
-            rl = [25, 50, 100, 200]
-            return rl[cnt-1]
-        else:
-            owner = self.get_card_owner(pos)
-            idx = self.extract_card_idx_from_id(id)
-            mul = 4 + 6 * int(self.get_data(self.label_utility_owner(1 if idx == 2 else 2)) == owner)
-            return mul * self.sum_dice_value(self.get_dice_value())
-        
-    def house_hotel_price(self, label: str) -> int:
-        color_idx = self.extract_card_color_idx_from_id(label)
-        return 50*((color_idx//2)+1)
+        sq: Square = BOARD[pos]
+        if sq.kind == STREET:
+            return sq.rent[self.get_street_level(pos)]
+        cnt = self.group_owned_count(pos, self.get_card_owner(pos))
+        if sq.kind == RAILROAD:
+            return sq.rent[cnt-1]
+        else: # utility
+            return sq.rent[cnt-1] * self.sum_dice_value(self.get_dice_value())
+
+    def house_hotel_price(self, pos: int) -> int: return BOARD[pos].house_price
         
     def num_houses(self, card_lvl: int) -> int:
         if card_lvl in [-1,0,1,6]:
@@ -251,64 +383,46 @@ class Game:
     def num_hotels(self, card_lvl: int) -> int:
         return card_lvl//6
     
-    def mortgage_value(self, label: str) -> int:
-        typ: str = self.extract_card_type(label)
-        if typ == self.card_type_street:
-            vals: list[int] = [30] * 2
-            for v in range(50, 170, 20):
-                vals += [v] * 2
-                vals.append(v+10)
-            vals += [175, 200]
-            vals[self.extract_card_idx_from_id(self.extract_card_id(label))]
-        elif typ == self.card_type_railroad:
-            return 100
-        else:
-            return 75
+    def mortgage_value(self, pos: int) -> int: return BOARD[pos].mortgage
 
     #** Pay methods **#
 
-    def pay(self, to, fr, amt, note_desc: str=''):
+    def pay(self, to, fr, amt, kind: Event=Event.PAY, pos: int=-1):
         assert not (to == 0 and fr == 0)
-        if not self.has_enough_money(fr, amt):
-            if fr == 0:
-                self.set_bank_money(amt)
-            else:
-                tot = self.total_assets(fr)
-            
+        if fr == 0 and not self.has_enough_money(fr, amt):
+            self.set_bank_money(amt)
         self.set_money(to, self.get_money(to) + amt)
         self.set_money(fr, self.get_money(fr) - amt)
-
-        if note_desc:
-            note_desc = f'({note_desc})'
-        self.add_note_entry(f'p{note_desc}.p{fr}>p{to}.${amt}')
+        self.events.add(kind, fr, to, amt, pos)
+        if fr > 0 and self.row[self.layout.money[fr]] < 0 and not self.passive[fr]:
+            self.raise_cash(fr)
 
     def pay_rent(self, plyr_idx: int, pos: int, ch: bool=False):
+        if self.mortgaged[pos]:
+            return
         if ch:
-            if pos in [5,15,25,35]: # Railroad
-                self.pay(self.get_card_owner(pos), plyr_idx, 2*self.rent(pos))
-            elif pos in [12,28]: # Utility
-                dice = self.roll_dice()
-                self.pay(self.get_card_owner(pos), plyr_idx, 10*self.sum_dice_value(dice))
+            kind = BOARD[pos].kind
+            if kind == RAILROAD:
+                self.pay(self.get_card_owner(pos), plyr_idx, 2*self.rent(pos), Event.CARD_RENT, pos)
+            elif kind == UTILITY:
+                dice = self.roll_dice()[0]
+                self.pay(self.get_card_owner(pos), plyr_idx, 10*self.sum_dice_value(dice), Event.CARD_RENT, pos)
         else:
-            self.pay(self.get_card_owner(pos), plyr_idx, self.rent(pos), 'r')
+            self.pay(self.get_card_owner(pos), plyr_idx, self.rent(pos), Event.RENT, pos)
+
+    def pay_tax(self, plyr_idx: int, pos: int):
+        sq: Square = BOARD[pos]
+        return self.pay(0, plyr_idx, sq.price, Event.TAX, pos)
 
     def pay_street_repairs(self, plyr_idx: int, val: list[int] | tuple[int]):
-        num_houses: int = 0
-        num_hotels: int = 0
-        owner_data: dict[str, int] = self.get_all_card_owner_data()
-        for label, owner in owner_data.items():
-            if owner == plyr_idx:
-                lvl: int = self.get_card_level(label)
-                num_houses += self.num_houses(lvl)
-                num_hotels += self.num_hotels(lvl)
-        amt: int = (num_houses * val[0]) + (num_hotels * val[1])
+        amt: int = (self.houses[plyr_idx] * val[0]) + (self.hotels[plyr_idx] * val[1])
         self.pay_bank(plyr_idx, amt)
     
     def pay_bank(self, plyr_idx: int, amt: int): return self.pay(0, plyr_idx, amt)
-    def pay_go(self, plyr_idx): return self.pay(plyr_idx, 0, 200, 'g')
-    def pay_jail(self, plyr_idx): return self.pay(0, plyr_idx, 50, 'j')
-    def pay_inctax(self, plyr_idx): return self.pay(0, plyr_idx, 200, 'it')
-    def pay_luxtax(self, plyr_idx): return self.pay(0, plyr_idx, 100, 'lt')
+    def pay_go(self, plyr_idx): return self.pay(plyr_idx, 0, 200, Event.SALARY)
+    def pay_jail(self, plyr_idx): return self.pay(0, plyr_idx, 50, Event.JAIL_FEE)
+    def pay_inctax(self, plyr_idx): return self.pay_tax(plyr_idx, 4)
+    def pay_luxtax(self, plyr_idx): return self.pay_tax(plyr_idx, 38)
 
     #** Other methods **#
 
@@ -316,19 +430,20 @@ class Game:
         cost: int = self.cost(pos)
         self.pay_bank(plyr_idx, cost)
         self.set_card_owner(pos, plyr_idx)
-        self.add_note_entry(f'b.p{plyr_idx}.c{pos}({self.extract_card_id(self.pos_to_card(pos))})')
+        self.events.add(Event.BUY, plyr_idx, 0, cost, pos)
 
     def buy_or_pay_rent(self, plyr_idx, ch: bool=False):
         pos: int = self.get_player_pos(plyr_idx)
         card_owner: int = self.get_card_owner(pos)
         if card_owner == 0: # Not owned
-            self.buy(plyr_idx, pos)
+            if self.strategies[plyr_idx].buy(self.view, plyr_idx, pos):
+                self.buy(plyr_idx, pos)
         else: # Owned
             self.pay_rent(plyr_idx, pos, ch)
 
     def ch(self, plyr_idx: int):
-        self.add_note_entry(f'ch.p{plyr_idx}', end='.')
         i = self.ch_lst.pop(0)
+        self.events.add(Event.CHANCE, plyr_idx, square=self.get_player_pos(plyr_idx), card=i)
         if self.eval_ch(i, plyr_idx):
             self.ch_lst.append(i)
         else:
@@ -337,47 +452,36 @@ class Game:
     def eval_ch(self, i: int, plyr_idx: int):
         match i:
             case 1: # get out of jail free card
-                self.add_note_entry('gjf')
+                pass
             case n if 1 < n < 7: # move to pos
-                d: dict[int, int] = {2:39, 3:0, 4:24, 5:11, 6:5}
-                self.add_note_entry(f'mv{d[i]}')
-                self.move_and_evaluate(plyr_idx, d[i], False)
+                self.move_and_evaluate(plyr_idx, CH_MOVE_TO[i], False)
             case n if 6 < n < 10:  # nearest railroad/utility
                 if i == 9:
-                    self.add_note_entry('nu')
-                    d: dict[int, int] = {7:12, 22:28, 36:12}
+                    d: dict[int, int] = NEAREST_UTILITY
                 else:
-                    self.add_note_entry('nrr')
-                    d: dict[int, int] = {7:15, 22:25, 36:5}
+                    d: dict[int, int] = NEAREST_RAILROAD
                 pos = d[self.get_player_pos(plyr_idx)]
                 self.move(plyr_idx, pos, False)
                 self.buy_or_pay_rent(plyr_idx, True)
             case 10 | 11: # collect money
-                d: dict[int, int] = {10:50, 11:150}
-                self.add_note_entry(f'g{d[i]}')
-                self.pay(plyr_idx, 0, d[i])
+                self.pay(plyr_idx, 0, CH_COLLECT[i])
             case 12: # move back 3
-                self.add_note_entry('bk3')
                 self.move_and_evaluate(plyr_idx, -3)
             case 13: # go to jail
-                self.add_note_entry('gtj')
                 self.go_to_jail(plyr_idx)
             case 14: # street repairs
-                self.add_note_entry('rep')
                 self.pay_street_repairs(plyr_idx, [25, 100])
             case 15: # pay 15
-                self.add_note_entry('p15')
-                self.pay_bank(plyr_idx, 15)
+                self.pay_bank(plyr_idx, CH_PAY[i])
             case 16: # pay each player 50
-                self.add_note_entry('pep')
                 for p in self.active_players:
                     if p != plyr_idx:
                         self.pay(p, plyr_idx, 50)
         return i > 1 # keep get out of jail free card
 
     def cc(self, plyr_idx: int):
-        self.add_note_entry(f'cc.p{plyr_idx}', end='.')
         i = self.cc_lst.pop(0)
+        self.events.add(Event.COMMUNITY_CHEST, plyr_idx, square=self.get_player_pos(plyr_idx), card=i)
         if self.eval_cc(i, plyr_idx):
             self.cc_lst.append(i)
         else:
@@ -386,28 +490,20 @@ class Game:
     def eval_cc(self, i: int, plyr_idx: int):
         match i:
             case 1: # get out of jail free card
-                self.add_note_entry('gjf')
+                pass
             case 2: # move to go
-                self.add_note_entry('mv0')
                 self.move_and_evaluate(plyr_idx, 0, False)
             case n if 2 < n < 11: # collect money
-                d: dict[int, int] = {3:200, 4:50, 5:100, 6:20, 7:100, 8:25, 9:10, 10:100}
-                self.add_note_entry(f'g{d[i]}')
-                self.pay(plyr_idx, 0, d[i])
+                self.pay(plyr_idx, 0, CC_COLLECT[i])
             case n if 10 < n < 14: # pay money
-                d: dict[int, int] = {11:50, 12:100, 13:50}
-                self.add_note_entry(f'p{d[i]}')
-                self.pay_bank(plyr_idx, d[i])
+                self.pay_bank(plyr_idx, CC_PAY[i])
             case 14: # go to jail
-                self.add_note_entry('gtj')
                 self.go_to_jail(plyr_idx)
             case 15: # collect 10 from each player
-                self.add_note_entry('cep')
                 for p in self.active_players:
                     if p != plyr_idx:
                         self.pay(plyr_idx, p, 10)
             case 16: # street repairs
-                self.add_note_entry('rep')
                 self.pay_street_repairs(plyr_idx, [40, 115])
         return i > 1 # keep get out of jail free card
 
@@ -422,16 +518,18 @@ class Game:
             self.pay_go(plyr_idx)
 
     def eval_pos(self, plyr_idx: int):
-        pos = self.get_data(self.label_player_pos(plyr_idx))
-        if pos in [10,20]: # jail/free parking
-            self.add_note_entry('pass')
-            pass
-        elif pos == 30: # go to jail
+        pos = self.get_player_pos(plyr_idx)
+        kind = BOARD[pos].kind
+        if kind in (GO, JAIL, FREE_PARKING):
+            self.events.add(Event.PASS, plyr_idx)
+        elif kind == GO_TO_JAIL:
             self.go_to_jail(plyr_idx)
-        elif pos in [2, 17, 33]:
+        elif kind == COMMUNITY_CHEST:
             self.cc(plyr_idx)
-        elif pos in [7, 22, 36]:
+        elif kind == CHANCE:
             self.ch(plyr_idx)
+        elif kind == TAX:
+            self.pay_tax(plyr_idx, pos)
         else:
             self.buy_or_pay_rent(plyr_idx)
 
@@ -440,44 +538,53 @@ class Game:
         self.eval_pos(plyr_idx)
     
     def pos_to_card(self, pos: int) -> str:
-        if pos in [5,15,25,35]:
-            return self.label_railroad_owner((pos//10)+1)
-        elif pos in [12,28]:
-            return self.label_utility_owner(pos//12)
-        else:
-            color: str = self.colors[pos//5]
-            if color in ['b', 'd']:
-                idx = int(pos in [3,39])+1
-            else:
-                if pos == (pos//5)*5+1:
-                    idx = 1
-                elif pos == (pos//5)*5+4:
-                    idx = 3
-                else:
-                    idx = 2
-            return self.label_street_owner(color + str(idx))
+        sq: Square = BOARD[pos]
+        if sq.kind == STREET:
+            return self.label_street_owner(sq.id)
+        elif sq.kind == RAILROAD:
+            return self.label_railroad_owner(sq.idx)
+        elif sq.kind == UTILITY:
+            return self.label_utility_owner(sq.idx)
+        raise ValueError(f'no card at position {pos}')
     
+    def draw_dice(self, k: int) -> list[int]:
+        if hasattr(self.rng, 'integers'): # numpy Generator
+            return self.rng.integers(1, 7, size=k).tolist()
+        if self.dice_block:
+            return self.rng.choices(DIE_FACES, k=k)
+        randint = self.rng.randint
+        return [randint(1,6) for _ in range(k)]
+
     def roll_dice(self, n=1):
-        l = []
-        for _ in range(n):
-            l.append([random.randint(1,6), random.randint(1,6)])
-        return l
+        if self.dice_block:
+            if self.dice_buf_pos + 2*n > len(self.dice_buf):
+                self.dice_buf = self.dice_buf[self.dice_buf_pos:] + self.draw_dice(max(self.dice_block, 2*n))
+                self.dice_buf_pos = 0
+            d = self.dice_buf[self.dice_buf_pos:self.dice_buf_pos+2*n]
+            self.dice_buf_pos += 2*n
+        else:
+            d = self.draw_dice(2*n)
+        return [d[i:i+2] for i in range(0, 2*n, 2)]
     
     def add_data_row(self, same_player: bool=False) -> None:
-        self.add_note_to_list()
-        self.data.append(self.data[-1].copy())
+        self.events.end_row()
+        if self.stats is not None:
+            self.stats.add_row(self)
+        if self.writer is not None:
+            self.writer.append(self.game_id, self.row, self.events.note(-1))
+        self.data.commit(self.row)
         self.increment_round(same_player)
     
     def increment_round(self, same_player: bool=False) -> None:
         if not same_player:
             next_idx = (self.active_players.index(self.get_player_idx()) + 1) % self.num_players
             next_player = self.active_players[next_idx]
-            self.set_data(self.label_player_idx(), next_player)
-            if next_player == self.get_data(self.label_player_idx(), 0):
+            self.set_player_idx(next_player)
+            if next_player == self.start_player:
                 self.set_round(self.get_round() + 1)
 
     def choose_jail_exit_method(self, plyr_idx: int):
-        return self.jail_exit_method_pay
+        return self.strategies[plyr_idx].jail_exit(self.view, plyr_idx)
 
     def get_out_of_jail(self, plyr_idx: int) -> tuple[bool,bool]:
         method = self.choose_jail_exit_method(plyr_idx)
@@ -488,12 +595,30 @@ class Game:
             self.set_player_pos(plyr_idx, 10)
             return True, True
         if method == self.jail_exit_method_card:
-            raise NotImplementedError
+            # the card goes back under its deck, paying is the fallback without one
+            if self.get_ch_jail_free_owner() == plyr_idx:
+                self.set_ch_jail_free_owner(0)
+                self.ch_lst.append(CARD_JAIL_FREE)
+            elif self.get_cc_jail_free_owner() == plyr_idx:
+                self.set_cc_jail_free_owner(0)
+                self.cc_lst.append(CARD_JAIL_FREE)
+            else:
+                self.pay_jail(plyr_idx)
+                self.set_player_pos(plyr_idx, 10)
+                return True, True
+            self.events.add(Event.JAIL_CARD, plyr_idx)
+            self.set_player_pos(plyr_idx, 10)
+            return True, True
         if method == self.jail_exit_method_roll_double:
-            dice = self.roll_dice()
-            if dice[0] == dice[1]:
-                self.set_player_pos(plyr_idx, 10 + self.sum_dice_value(dice))
-                return True, False
+            # a double moves the player out by its sum and ends the turn
+            dice = self.roll_dice()[0]
+            if dice[0] != dice[1]:
+                return False, False
+            self.set_player_pos(plyr_idx, 10)
+            self.set_dice_value(10*dice[0] + dice[1])
+            self.move_and_evaluate(plyr_idx, sum(dice))
+            return True, False
+        raise ValueError(f'unknown jail exit method {method}')
 
     def declare_bankrupcy(self, plyr_idx: int) -> None:
         self.active_players.remove(plyr_idx)
@@ -501,19 +626,101 @@ class Game:
     def is_bankrupt(self, plyr_idx: int) -> bool:
         return self.get_player_money(plyr_idx) < 0
     
-    def total_assets(self, plyr_idx: int) -> int:
-        tot: int = self.get_player_money(plyr_idx)
-        owner_data: dict[str, int] = self.get_all_card_owner_data()
-        for label, owner in owner_data.items():
-            if owner == plyr_idx:
-                lvl = self.get_card_level(label)
-                num_houses = self.num_houses(lvl)
-                num_hotels = self.num_hotels(lvl)
-                mortgage = self.mortgage_value(label)
-                tot += mortgage + (num_houses*self.house_hotel_price(label)) + ()
-                
+    def total_assets(self, plyr_idx: int) -> int: return self.get_player_money(plyr_idx) + self.property_value[plyr_idx]
+
+    def winner(self) -> int:
+        solvent = [p for p in range(1, self.num_players+1) if not self.is_bankrupt(p)]
+        if len(solvent) == 1:
+            return solvent[0]
+        return max(range(1, self.num_players+1), key=self.total_assets)
+
     def execute_non_turn_moves(self, plyr_idx: int):
-        pass
+        if self.passive[plyr_idx]:
+            return
+        s, view = self.strategies[plyr_idx], self.view
+        for pos in s.unmortgage(view, plyr_idx):
+            self.unmortgage(plyr_idx, pos)
+        for pos in s.build(view, plyr_idx):
+            self.build_house(plyr_idx, pos)
+        for trade in s.trade(view, plyr_idx):
+            self.offer_trade(plyr_idx, trade)
+
+    #** Strategy moves **#
+
+    # each move checks the rules and is skipped if the strategy asked for something illegal
+
+    def build_house(self, plyr_idx: int, pos: int) -> bool:
+        sq: Square = BOARD[pos]
+        if sq.kind != STREET or not self.has_group(pos, plyr_idx) or any(self.mortgaged[p] for p in sq.group):
+            return False
+        lvl = max(self.get_street_level(pos), 1)
+        if lvl >= 6 or lvl > min(max(self.get_street_level(p), 1) for p in sq.group): # build evenly
+            return False
+        if not self.has_enough_money(plyr_idx, sq.house_price):
+            return False
+        self.pay(0, plyr_idx, sq.house_price, Event.BUILD, pos)
+        self.set_street_level(pos, lvl + 1)
+        return True
+
+    def sell_house(self, plyr_idx: int, pos: int) -> bool:
+        # houses sell back at half price, without houses the level returns to 0
+        sq: Square = BOARD[pos]
+        if sq.kind != STREET or self.get_card_owner(pos) != plyr_idx:
+            return False
+        lvl = self.get_street_level(pos)
+        if lvl < 2 or lvl < max(self.get_street_level(p) for p in sq.group): # sell evenly
+            return False
+        self.set_street_level(pos, lvl - 1 if lvl > 2 else 0)
+        self.pay(plyr_idx, 0, sq.house_price // 2, Event.SELL_HOUSE, pos)
+        return True
+
+    def mortgage(self, plyr_idx: int, pos: int) -> bool:
+        if self.get_card_owner(pos) != plyr_idx or self.mortgaged[pos] or self.group_built(pos):
+            return False
+        self.set_mortgaged(pos, True)
+        self.pay(plyr_idx, 0, self.mortgage_value(pos), Event.MORTGAGE, pos)
+        return True
+
+    def unmortgage(self, plyr_idx: int, pos: int) -> bool:
+        cost = self.mortgage_value(pos) * 11 // 10
+        if self.get_card_owner(pos) != plyr_idx or not self.mortgaged[pos] or not self.has_enough_money(plyr_idx, cost):
+            return False
+        self.set_mortgaged(pos, False)
+        self.pay(0, plyr_idx, cost, Event.UNMORTGAGE, pos)
+        return True
+
+    def raise_cash(self, plyr_idx: int) -> None:
+        # after a payment left the player below zero
+        s = self.strategies[plyr_idx]
+        for pos in s.raise_cash(self.view, plyr_idx, -self.get_player_money(plyr_idx)):
+            if self.get_player_money(plyr_idx) >= 0:
+                break
+            if not self.sell_house(plyr_idx, pos):
+                self.mortgage(plyr_idx, pos)
+
+    def offer_trade(self, plyr_idx: int, trade: Trade) -> bool:
+        partner = trade.partner
+        if partner == plyr_idx or partner not in self.active_players:
+            return False
+        if any(self.get_card_owner(p) != plyr_idx for p in trade.give):
+            return False
+        if any(self.get_card_owner(p) != partner for p in trade.take):
+            return False
+        if any(self.group_built(p) for p in trade.give + trade.take):
+            return False
+        if not self.strategies[partner].accept_trade(self.view, partner, trade):
+            return False
+        for p in trade.give:
+            self.set_card_owner(p, partner)
+            self.events.add(Event.TRADE, plyr_idx, partner, 0, p)
+        for p in trade.take:
+            self.set_card_owner(p, plyr_idx)
+            self.events.add(Event.TRADE, partner, plyr_idx, 0, p)
+        if trade.cash > 0:
+            self.pay(partner, plyr_idx, trade.cash, Event.TRADE_CASH)
+        elif trade.cash < 0:
+            self.pay(plyr_idx, partner, -trade.cash, Event.TRADE_CASH)
+        return True
 
     def exit_loop(self) -> bool:
         cnt = 0
@@ -521,52 +728,106 @@ class Game:
             cnt += int(not self.is_bankrupt(plyr_idx))
         return cnt == 1
 
-    def run(self):
-        doubles = lambda l: l[0] == l[1]
-        dice_value = lambda l: int(f'{l[0]}{l[1]}')
-
-        while True:
-        # while not self.exit_loop() or self.get_round() > 100:
-            if self.exit_loop():
+    def finished(self) -> bool:
+        if self.exit_loop():
+            if self.verbose:
                 print('exit condition')
-                break
-            if self.get_round() > 30:
+            return True
+        if self.get_round() > self.max_rounds:
+            if self.verbose:
                 print('exit rounds')
-                break
+            return True
+        return False
 
-            roll_dice = True
-            plyr_idx = self.get_player_idx()
-
-            for p in self.active_players:
-                if p == plyr_idx:
-                    continue
-                self.execute_non_turn_moves(p) # trading, buying, selling
-
-            if self.player_in_jail(plyr_idx):
-                got_out, roll_dice = self.get_out_of_jail(plyr_idx)
-                if not got_out:
-                    self.add_data_row()
-                    continue
-            if roll_dice:
-                dice_rolls = self.roll_dice(3)
-                dbl = [doubles(l) for l in dice_rolls]
-                if all(dbl):
-                    self.go_to_jail(plyr_idx)
-                for i in range(len(dbl)):
-                    self.set_dice_value(dice_value(dice_rolls[i]))
-                    self.move_and_evaluate(plyr_idx, sum(dice_rolls[i]))
-                    if dbl[i] == False:
-                        break
-                    self.add_data_row(same_player=True)
-                self.add_data_row()
+    def step(self) -> None:
+        doubles = lambda l: l[0] == l[1]
+        dice_value = lambda l: 10*l[0] + l[1]
+
+        roll_dice = True
+        plyr_idx = self.get_player_idx()
 
-        self.data.pop()
-        self.save()
+        for p in self.active_players:
+            if p == plyr_idx:
+                continue
+            self.execute_non_turn_moves(p) # trading, buying, selling
+
+        if self.player_in_jail(plyr_idx):
+            got_out, roll_dice = self.get_out_of_jail(plyr_idx)
+            if not got_out:
+                self.add_data_row()
+                return
+        if roll_dice:
+            dice_rolls = self.roll_dice(3)
+            dbl = [doubles(l) for l in dice_rolls]
+            if all(dbl):
+                self.go_to_jail(plyr_idx)
+            for i in range(len(dbl)):
+                self.set_dice_value(dice_value(dice_rolls[i]))
+                self.move_and_evaluate(plyr_idx, sum(dice_rolls[i]))
+                if dbl[i] == False:
+                    break
+                self.add_data_row(same_player=True)
+        self.add_data_row()
+
+    #** States **#
+
+    def state(self) -> GameState:
+        # the live buffers, not a copy; they keep changing while the game is played
+        return GameState(self.row, self.ch_lst, self.cc_lst, self.mortgaged, self.active_players, self.start_player)
+
+    def attach(self, state: GameState) -> None:
+        # play on state in place, with an empty history; one game can step many held states in turn.
+        # Dice keep coming from this game's rng
+        self.row = state.row
+        self.ch_lst, self.cc_lst = state.ch, state.cc
+        self.mortgaged = state.mortgaged
+        self.active_players = state.active
+        self.start_player = state.start_player
+        self.reindex()
+        self.data = type(self.data)()
+        self.events = EventLog(self.events.history)
+
+    #** Snapshots **#
+
+    def snapshot(self, rng: bool=True) -> Snapshot: return snapshot.take(self, rng)
+
+    def restore(self, snap: Snapshot, seed: int | None=None) -> None:
+        # continue from snap with an empty history, e.g. to reuse one game for many rollouts
+        snapshot.restore(self, snap, seed)
+        self.reindex()
+        self.data = type(self.data)()
+        self.events = EventLog(self.events.history)
+
+    @classmethod
+    def fork(cls, snap: Snapshot, seed: int | None=None, log_mode: str='none', **kwargs) -> 'Game':
+        # a new game without history continuing from snap; kwargs as for Game, e.g. strategies or max_rounds
+        g = cls(snap.num_players, log_mode=log_mode, verbose=False, **kwargs)
+        g.restore(snap, seed)
+        return g
+
+    def run(self, save: bool=True):
+        # while not self.exit_loop() or self.get_round() > 100:
+        while not self.finished():
+            self.step()
+        if self.stats is not None:
+            self.stats.end_game(self)
+
+        if len(self.data):
+            self.row[:] = array('i', self.data[-1])
+        if save:
+            self.save()
         
     def save(self) -> None:
-        arr = pd.DataFrame(self.data, columns=self.cols)
-        arr['Notes'] = self.notes
-        arr.to_csv(self.file_name, index=False)
+        if self.writer is not None:
+            self.writer.flush()
+        else:
+            self.export_csv()
+
+    def export_csv(self, file_name: str | None=None) -> None:
+        import pandas as pd
+        arr = pd.DataFrame(map(list, self.data), columns=self.cols)
+        arr['Notes'] = self.notes()
+        arr.to_csv(file_name or self.file_name, index=False)
 
 if __name__ == '__main__':
     g = Game(2)
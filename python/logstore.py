@@ -0,0 +1,280 @@
+from typing import Callable, Iterable, Iterator
+
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+GAME_COL: str = 'Game'
+NOTES_COL: str = 'Notes'
+
+#** Writers **#
+
+class LogWriter:
+    ext: str = ''
+
+    def __init__(self, path: str, prefix: str='part', chunk_rows: int=8192):
+        self.path: str = path # dataset directory, one file per part
+        self.prefix: str = prefix
+        self.chunk_rows: int = chunk_rows
+        self.num_parts: int = 0
+
+        self.cols: list[str] = []
+        self.dtypes: list[str] = []
+        self.buf: np.ndarray = np.zeros((0, 0), np.int32)
+        self.game_ids: np.ndarray = np.zeros(chunk_rows, np.int32)
+        self.notes: list[str] = []
+        os.makedirs(path, exist_ok=True)
+
+    def set_columns(self, cols: list[str], dtypes: list[str]) -> None:
+        # a new schema (e.g. another player count) starts a new part
+        if cols == self.cols:
+            return
+        self.flush()
+        self.end_part()
+        self.cols = list(cols)
+        self.dtypes = list(dtypes)
+        self.buf = np.zeros((self.chunk_rows, len(cols)), np.int32)
+
+    def append(self, game_id: int, row: list[int], note: str) -> None:
+        n = len(self.notes)
+        self.buf[n] = row
+        self.game_ids[n] = game_id
+        self.notes.append(note)
+        if n+1 == self.chunk_rows:
+            self.flush()
+
+    def columns(self) -> dict[str, np.ndarray]:
+        n = len(self.notes)
+        ret = {GAME_COL: self.game_ids[:n].copy()}
+        for i, (col, dtype) in enumerate(zip(self.cols, self.dtypes)):
+            ret[col] = self.buf[:n, i].astype(dtype)
+        return ret
+
+    def flush(self) -> None:
+        if self.notes:
+            self.write(self.columns(), self.notes)
+            self.notes = []
+
+    def next_part_path(self) -> str:
+        # continue numbering after the parts already in the dataset
+        while True:
+            path = os.path.join(self.path, f'{self.prefix}-{self.num_parts:05d}{self.ext}')
+            self.num_parts += 1
+            if not os.path.exists(path):
+                return path
+
+    def write(self, columns: dict[str, np.ndarray], notes: list[str]) -> None:
+        raise NotImplementedError
+
+    def end_part(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+        self.end_part()
+
+    def __enter__(self) -> 'LogWriter': return self
+    def __exit__(self, *exc) -> None: self.close()
+
+def encode_notes(notes: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    categories, codes = np.unique(np.array(notes), return_inverse=True)
+    return codes.astype(np.int16 if len(categories) < 2**15 else np.int32), categories
+
+class NpzWriter(LogWriter):
+    # every flush is a self contained compressed .npz part, written atomically
+    ext: str = '.npz'
+
+    def write(self, columns: dict[str, np.ndarray], notes: list[str]) -> None:
+        codes, categories = encode_notes(notes)
+        path = self.next_part_path()
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, **columns, **{f'{NOTES_COL}.codes': codes, f'{NOTES_COL}.categories': categories})
+        os.replace(tmp, path)
+
+class ParquetWriter(LogWriter):
+    # every flush is a row group of one .parquet part per schema, needs pyarrow
+    ext: str = '.parquet'
+
+    def __init__(self, path: str, prefix: str='part', chunk_rows: int=8192):
+        import pyarrow
+        import pyarrow.parquet
+        super().__init__(path, prefix, chunk_rows)
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.file = None
+
+    def write(self, columns: dict[str, np.ndarray], notes: list[str]) -> None:
+        pa = self.pa
+        table = pa.table({
+            **{col: pa.array(val) for col, val in columns.items()},
+            NOTES_COL: pa.array(notes, pa.string()).dictionary_encode(),
+        })
+        if self.file is None:
+            self.file = self.pq.ParquetWriter(self.next_part_path(), table.schema)
+        self.file.write_table(table)
+
+    def end_part(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class CsvWriter(LogWriter):
+    # plain text export, one .csv part per schema
+    ext: str = '.csv'
+
+    def __init__(self, path: str, prefix: str='part', chunk_rows: int=8192):
+        super().__init__(path, prefix, chunk_rows)
+        self.file = None
+        self.csv = None
+
+    def write(self, columns: dict[str, np.ndarray], notes: list[str]) -> None:
+        if self.file is None:
+            self.file = open(self.next_part_path(), 'w', newline='')
+            self.csv = csv.writer(self.file)
+            self.csv.writerow([GAME_COL] + self.cols + [NOTES_COL])
+        n = len(notes)
+        rows = np.column_stack([self.game_ids[:n], self.buf[:n]]).tolist()
+        self.csv.writerows(row + [note] for row, note in zip(rows, notes))
+
+    def end_part(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+WRITERS: dict[str, type] = {'npz': NpzWriter, 'parquet': ParquetWriter, 'csv': CsvWriter}
+
+def make_writer(fmt: str, path: str, prefix: str='part', chunk_rows: int=8192) -> LogWriter:
+    if fmt not in WRITERS:
+        raise ValueError(f'unknown log format {fmt!r}, expected one of {list(WRITERS)}')
+    return WRITERS[fmt](path, prefix, chunk_rows)
+
+#** Readers **#
+
+Columns = list[str] | Callable[[str], bool] | None # all, a list of names or a predicate on names
+
+def log_parts(path: str) -> list[str]:
+    if not os.path.isdir(path):
+        return [path]
+    exts = tuple(w.ext for w in WRITERS.values())
+    return sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(exts))
+
+def part_columns(path: str) -> list[str]:
+    if path.endswith('.npz'):
+        with np.load(path) as f:
+            names = [k for k in f.files if not k.startswith(f'{NOTES_COL}.')]
+            return names + ([NOTES_COL] if f'{NOTES_COL}.codes' in f.files else [])
+    if path.endswith('.parquet'):
+        import pyarrow.parquet
+        return pyarrow.parquet.read_schema(path).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def select_columns(names: list[str], columns: Columns) -> list[str]:
+    # columns missing from a part (e.g. players of another player count) are skipped
+    if columns is None:
+        return names
+    if callable(columns):
+        return [c for c in names if columns(c)]
+    return [c for c in columns if c in names]
+
+def part_has_games(path: str, games: list[int]) -> bool:
+    # reads only the game column, so a lookup skips the parts of other games cheaply; CSVs are always read
+    if path.endswith('.npz'):
+        with np.load(path) as f:
+            return GAME_COL in f.files and bool(np.isin(f[GAME_COL], games).any())
+    if path.endswith('.parquet'):
+        import pyarrow.parquet
+        t = pyarrow.parquet.read_table(path, columns=[GAME_COL])
+        return bool(np.isin(t.column(GAME_COL).to_numpy(), games).any())
+    return True
+
+def iter_part(path: str, columns: Columns=None, chunk_rows: int=65536) -> Iterator[pd.DataFrame]:
+    cols = select_columns(part_columns(path), columns)
+    if path.endswith('.npz'):
+        # parts are compressed and already chunk sized, so each is decoded whole
+        with np.load(path) as f:
+            d = {}
+            for col in cols:
+                if col == NOTES_COL:
+                    d[col] = pd.Categorical.from_codes(f[f'{NOTES_COL}.codes'], f[f'{NOTES_COL}.categories'])
+                else:
+                    d[col] = f[col]
+        yield pd.DataFrame(d)
+    elif path.endswith('.parquet'):
+        import pyarrow.parquet
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches(chunk_rows, columns=cols):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=cols, chunksize=chunk_rows)
+
+def iter_log(path: str, columns: Columns=None, games: Iterable[int] | None=None) -> Iterator[pd.DataFrame]:
+    # path is a single log file or a dataset directory of parts; single game CSVs count as game 0
+    if games is not None:
+        games = list(games)
+    if callable(columns):
+        pred = columns
+        columns = lambda c: c == GAME_COL or pred(c)
+    elif columns is not None and GAME_COL not in columns:
+        columns = [GAME_COL] + list(columns)
+    for part in log_parts(path):
+        if games is not None and not part_has_games(part, games):
+            continue
+        for df in iter_part(part, columns):
+            if GAME_COL not in df:
+                df.insert(0, GAME_COL, 0)
+            if games is not None:
+                df = df[df[GAME_COL].isin(games)].reset_index(drop=True)
+            if len(df):
+                yield df
+
+def read_log(path: str, columns: Columns=None, games: Iterable[int] | None=None) -> pd.DataFrame:
+    dfs = list(iter_log(path, columns, games))
+    if not dfs:
+        return pd.DataFrame()
+    return pd.concat(dfs, ignore_index=True) if len(dfs) > 1 else dfs[0]
+
+if __name__ == '__main__':
+    # compare the end of game CSV with a streamed dataset for a batch of games
+    import shutil
+    import tempfile
+    import time
+
+    from game import Game
+
+    num_games = 200
+    tmp = tempfile.mkdtemp()
+    try:
+        csv_dir = os.path.join(tmp, 'game_csv')
+        os.makedirs(csv_dir)
+        t = time.perf_counter()
+        for i in range(num_games):
+            g = Game(4, seed=i, verbose=False)
+            g.file_name = os.path.join(csv_dir, f'{i}.csv')
+            g.run()
+        t_write = time.perf_counter() - t
+        size = sum(os.path.getsize(p) for p in log_parts(csv_dir))
+        t = time.perf_counter()
+        df = pd.concat([pd.read_csv(p) for p in log_parts(csv_dir)])
+        t_read = time.perf_counter() - t
+        print(f'  csv: write {t_write:6.2f}s read {t_read:6.3f}s {size/1024:8.1f} KiB ({len(df)} rows)')
+
+        for fmt in WRITERS:
+            try:
+                w = make_writer(fmt, os.path.join(tmp, fmt))
+            except ImportError as e:
+                print(f'{fmt:>5}: skipped ({e})')
+                continue
+            t = time.perf_counter()
+            with w:
+                for i in range(num_games):
+                    Game(4, seed=i, verbose=False, log_mode='delta', writer=w, game_id=i).run(save=False)
+            t_write = time.perf_counter() - t
+            size = sum(os.path.getsize(p) for p in log_parts(w.path))
+            t = time.perf_counter()
+            df = read_log(w.path)
+            t_read = time.perf_counter() - t
+            print(f'{fmt:>5}: write {t_write:6.2f}s read {t_read:6.3f}s {size/1024:8.1f} KiB ({len(df)} rows)')
+    finally:
+        shutil.rmtree(tmp)
@@ -1,12 +1,59 @@
+import argparse
+import os
+import time
+
+from batch import seat_strategies
 from game import Game
-from analysis import Analyser
+from strategy import STRATEGIES, make_strategy
+
+# csv is the single file Game.save writes, the others a dataset directory as batch.py streams them
+FORMATS: tuple[str, ...] = ('csv', 'npz', 'parquet', 'none')
+
+def main(argv: list[str] | None=None) -> None:
+    parser = argparse.ArgumentParser(description='Play one Monopoly game, save its log and plot the bank money.')
+    parser.add_argument('-p', '--players', type=int, default=4)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-r', '--rounds', type=int, default=30, help='round limit')
+    parser.add_argument('-S', '--strategies', nargs='+', choices=list(STRATEGIES), default=[],
+                        help='strategy names by seat, repeated to fill all seats')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='csv', help='log format, none to keep no log')
+    parser.add_argument('-o', '--out', default=None,
+                        help='log file or dataset directory (default: the csv name under ./log, or ./log/dataset)')
+    parser.add_argument('--no-plot', action='store_true', help='skip the plot, and with it matplotlib')
+    parser.add_argument('--plot-file', default=None, help='save the plot to this file instead of showing it')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not print why the game ended')
+    args = parser.parse_args(argv)
+
+    strategies = [make_strategy(name) for name in seat_strategies(args.strategies, args.players)] or None
+    writer = None
+    if args.format in ('npz', 'parquet'):
+        # numpy and pandas only come in with a writer
+        from logstore import make_writer
+        writer = make_writer(args.format, args.out or './log/dataset', prefix=f'game{args.seed}')
+    game = Game(args.players, seed=args.seed, max_rounds=args.rounds, verbose=not args.quiet, strategies=strategies,
+                writer=writer, log_mode='none' if args.format == 'none' else 'full')
+    out = None
+    if writer is not None:
+        out = writer.path
+    elif args.format == 'csv':
+        out = game.file_name = args.out or game.file_name
+        if os.path.dirname(out):
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+    start = time.perf_counter()
+    game.run(save=out is not None)
+    if writer is not None:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f'player {game.winner()} won after {game.get_round()} rounds, {len(game.data)} turns in {elapsed:.3f}s'
+          + (f', log in {out}' if out else ''))
+
+    if args.no_plot or out is None:
+        return
+    if args.plot_file:
+        import matplotlib
+        matplotlib.use('Agg')
+    from analysis import Analyser
+    Analyser(game).plot_bank_money(args.plot_file)
 
 if __name__ == '__main__':
-    game = Game(4)
-    try:
-        game.run()
-    except NotImplementedError:
-        print('not implemented error raised')
-        pass
-    analyser = Analyser(game)
-    
\ No newline at end of file
+    main()
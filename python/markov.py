@@ -0,0 +1,239 @@
+from typing import NamedTuple
+
+import functools
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from board import BOARD, STREET, RAILROAD, UTILITY, GO_TO_JAIL, CHANCE, COMMUNITY_CHEST
+from board import CARD_JAIL_FREE, NUM_CARDS, CH_MOVE_TO, CH_NEAREST_RAILROAD_CARDS, CH_NEAREST_UTILITY_CARD
+from board import CH_BACK_CARD, CH_GO_TO_JAIL_CARD, NEAREST_RAILROAD, NEAREST_UTILITY, CC_MOVE_TO, CC_GO_TO_JAIL_CARD
+
+MARKOV_VERSION: int = 1
+JAIL: int = 40 # state index of a player sitting in jail (position -1 in Game)
+NUM_STATES: int = 41
+
+class Landings(NamedTuple):
+    stationary: np.ndarray # turn start state probabilities, index 40 is jail
+    landing: np.ndarray # expected landings per turn by square, card moves included
+    dice_landing: np.ndarray # landings from a dice move weighted by the dice sum
+    chance_railroad: np.ndarray # landings from the nearest railroad card (double rent)
+    chance_utility: np.ndarray # landings from the nearest utility card (10x a fresh roll)
+
+#** Rules **#
+
+def rule_config(jail_free_in_deck: bool=False) -> dict:
+    # everything the transition matrix depends on, used as the cache key
+    return {
+        'version': MARKOV_VERSION,
+        'board': [sq.kind for sq in BOARD],
+        'num_cards': NUM_CARDS,
+        'jail_free_card': CARD_JAIL_FREE,
+        'ch_move_to': CH_MOVE_TO,
+        'ch_nearest_railroad_cards': CH_NEAREST_RAILROAD_CARDS,
+        'ch_nearest_utility_card': CH_NEAREST_UTILITY_CARD,
+        'ch_back_card': CH_BACK_CARD,
+        'ch_go_to_jail_card': CH_GO_TO_JAIL_CARD,
+        'nearest_railroad': NEAREST_RAILROAD,
+        'nearest_utility': NEAREST_UTILITY,
+        'cc_move_to': CC_MOVE_TO,
+        'cc_go_to_jail_card': CC_GO_TO_JAIL_CARD,
+        'jail_exit': 'pay',
+        'jail_free_in_deck': jail_free_in_deck,
+    }
+
+def config_key(config: dict) -> str:
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+def dice_probs() -> tuple[np.ndarray, np.ndarray]:
+    # probability of each sum, split into doubles and non doubles
+    dbl, non_dbl = np.zeros(13), np.zeros(13)
+    for a in range(1, 7):
+        for b in range(1, 7):
+            (dbl if a == b else non_dbl)[a+b] += 1/36
+    return dbl, non_dbl
+
+#** Transition model **#
+
+class Model:
+    def __init__(self, jail_free_in_deck: bool=False):
+        # the get out of jail free card leaves the deck once drawn, so it is absent in the long run
+        self.cards: list[int] = [c for c in range(1, NUM_CARDS+1) if jail_free_in_deck or c != CARD_JAIL_FREE]
+        dbl, non_dbl = dice_probs()
+        self.p_double: float = dbl.sum()
+        self.dbl: np.ndarray = dbl / self.p_double # dice sums given a double
+        self.non_dbl: np.ndarray = non_dbl / (1 - self.p_double)
+
+        # per landing square: state after evaluating it and landings it causes
+        self.post: np.ndarray = np.zeros((40, NUM_STATES))
+        self.land: np.ndarray = np.zeros((40, 40))
+        self.ch_rr: np.ndarray = np.zeros((40, 40))
+        self.ch_ut: np.ndarray = np.zeros((40, 40))
+        for sq in range(40):
+            self.eval_pos(sq, sq, 1.0)
+
+    def eval_pos(self, origin: int, pos: int, prob: float) -> None:
+        # mirrors Game.eval_pos, including the card moves of Game.eval_ch and Game.eval_cc
+        self.land[origin, pos] += prob
+        kind = BOARD[pos].kind
+        q = prob / len(self.cards)
+        if kind == GO_TO_JAIL:
+            self.post[origin, JAIL] += prob
+        elif kind == COMMUNITY_CHEST:
+            for card in self.cards:
+                if card in CC_MOVE_TO:
+                    self.eval_pos(origin, CC_MOVE_TO[card], q)
+                elif card == CC_GO_TO_JAIL_CARD:
+                    self.post[origin, JAIL] += q
+                else:
+                    self.post[origin, pos] += q
+        elif kind == CHANCE:
+            for card in self.cards:
+                if card in CH_MOVE_TO:
+                    self.eval_pos(origin, CH_MOVE_TO[card], q)
+                elif card in CH_NEAREST_RAILROAD_CARDS:
+                    dest = NEAREST_RAILROAD[pos]
+                    self.land[origin, dest] += q
+                    self.ch_rr[origin, dest] += q
+                    self.post[origin, dest] += q
+                elif card == CH_NEAREST_UTILITY_CARD:
+                    dest = NEAREST_UTILITY[pos]
+                    self.land[origin, dest] += q
+                    self.ch_ut[origin, dest] += q
+                    self.post[origin, dest] += q
+                elif card == CH_BACK_CARD:
+                    self.eval_pos(origin, (pos - 3) % 40, q)
+                elif card == CH_GO_TO_JAIL_CARD:
+                    self.post[origin, JAIL] += q
+                else:
+                    self.post[origin, pos] += q
+        else:
+            self.post[origin, pos] += prob
+
+    def roll(self, x: np.ndarray, probs: np.ndarray) -> tuple[np.ndarray, ...]:
+        # one dice move from state distribution x, followed by evaluation of the landing square
+        y = np.zeros(NUM_STATES)
+        land, dice_land, ch_rr, ch_ut = (np.zeros(40) for _ in range(4))
+        for d in range(2, 13):
+            if not probs[d]:
+                continue
+            moved = np.zeros(40)
+            moved += np.roll(x[:40], d) * probs[d]
+            moved[d-1] += x[JAIL] * probs[d] # moving out of jail starts from -1
+            y += moved @ self.post
+            land += moved @ self.land
+            dice_land += moved * d
+            ch_rr += moved @ self.ch_rr
+            ch_ut += moved @ self.ch_ut
+        return y, land, dice_land, ch_rr, ch_ut
+
+    def turn(self, x: np.ndarray) -> tuple[np.ndarray, ...]:
+        # Game.step: leave jail by paying, draw three rolls and play them out until one is not a
+        # double; three doubles send the player to jail first and all three are then played from there
+        x = x.copy()
+        x[10] += x[JAIL]
+        x[JAIL] = 0
+
+        p = self.p_double
+        end = np.zeros(NUM_STATES)
+        totals = [np.zeros(40) for _ in range(4)]
+        def add(acc, w):
+            for t, a in zip(totals, acc):
+                t += w * a
+
+        cur = x
+        for k in range(3):
+            # k doubles followed by a non double
+            y, *acc = self.roll(cur, self.non_dbl)
+            end += p**k * (1-p) * y
+            add(acc, p**k * (1-p))
+            if k < 2:
+                cur, *acc = self.roll(cur, self.dbl)
+                add(acc, p**(k+1) * (1 - p**(2-k))) # played unless the remaining rolls are doubles too
+
+        cur = np.zeros(NUM_STATES)
+        cur[JAIL] = x.sum()
+        for k in range(3):
+            cur, *acc = self.roll(cur, self.dbl)
+            add(acc, p**3)
+        end += p**3 * cur
+        return (end, *totals)
+
+    def transition_matrix(self) -> np.ndarray:
+        # column s is the distribution of the next turn start state given turn start state s
+        P = np.zeros((NUM_STATES, NUM_STATES))
+        for s in range(NUM_STATES):
+            e = np.zeros(NUM_STATES)
+            e[s] = 1
+            P[:, s] = self.turn(e)[0]
+        return P
+
+    def solve(self) -> Landings:
+        P = self.transition_matrix()
+        A = P - np.eye(NUM_STATES)
+        A[-1, :] = 1
+        b = np.zeros(NUM_STATES)
+        b[-1] = 1
+        pi = np.clip(np.linalg.solve(A, b), 0, None)
+        pi /= pi.sum()
+        _, land, dice_land, ch_rr, ch_ut = self.turn(pi)
+        return Landings(pi, land, dice_land, ch_rr, ch_ut)
+
+#** Cache **#
+
+CACHE_DIR: str = './log/markov'
+
+@functools.lru_cache(maxsize=None)
+def _landings(jail_free_in_deck: bool, cache_dir: str) -> Landings:
+    config = rule_config(jail_free_in_deck)
+    path = os.path.join(cache_dir, f'landings_{config_key(config)}.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            d = json.load(f)
+        return Landings(*(np.array(d[k]) for k in Landings._fields))
+    ret = Model(jail_free_in_deck).solve()
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'config': config, **{k: v.tolist() for k, v in ret._asdict().items()}}, f)
+    os.replace(tmp, path)
+    return ret
+
+def landings(jail_free_in_deck: bool=False, cache_dir: str=CACHE_DIR) -> Landings:
+    return _landings(jail_free_in_deck, cache_dir)
+
+#** Expected income **#
+
+def expected_rent(levels: dict[int, int] | None=None, railroads_owned: int=1, utilities_owned: int=1,
+                  jail_free_in_deck: bool=False, cache_dir: str=CACHE_DIR) -> np.ndarray:
+    # expected rent collected per opponent turn by square, for the given street levels (default 0)
+    # and number of railroads/utilities held by the same owner
+    l = landings(jail_free_in_deck, cache_dir)
+    levels = levels or {}
+    rent = np.zeros(40)
+    for sq in BOARD:
+        if sq.kind == STREET:
+            rent[sq.pos] = sq.rent[levels.get(sq.pos, 0)] * l.landing[sq.pos]
+        elif sq.kind == RAILROAD:
+            r = sq.rent[railroads_owned-1]
+            rent[sq.pos] = r * (l.landing[sq.pos] + l.chance_railroad[sq.pos])
+        elif sq.kind == UTILITY:
+            rent[sq.pos] = sq.rent[utilities_owned-1] * l.dice_landing[sq.pos] + 10 * 7 * l.chance_utility[sq.pos]
+    return rent
+
+def group_landings(jail_free_in_deck: bool=False, cache_dir: str=CACHE_DIR) -> dict[str, float]:
+    l = landings(jail_free_in_deck, cache_dir)
+    groups: dict[str, float] = {}
+    for sq in BOARD:
+        if sq.kind in (STREET, RAILROAD, UTILITY):
+            key = sq.color or sq.kind
+            groups[key] = groups.get(key, 0.0) + l.landing[sq.pos]
+    return groups
+
+if __name__ == '__main__':
+    l = landings()
+    for sq in BOARD:
+        print(f'{sq.pos:>2} {sq.kind:<16}{sq.id:<3} start {l.stationary[sq.pos]:.4f} landings/turn {l.landing[sq.pos]:.4f}')
+    print(f'   in jail at turn start {l.stationary[JAIL]:.4f}')
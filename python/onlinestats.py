@@ -0,0 +1,170 @@
+import numpy as np
+
+from board import BOARD
+from events import Event, NUM_FIELDS
+
+JAIL_SQUARE: int = 40 # landing index of position -1
+GO_TO_JAIL_SQUARE: int = 30
+BANK_BIN: int = 50 # dollars per bank money histogram bin
+BANK_BINS: int = 800 # up to 40000, larger balances go in the last bin
+
+def grow(a: np.ndarray, n: int) -> np.ndarray:
+    # pad the first axis with zeros up to n
+    if len(a) >= n:
+        return a
+    return np.concatenate([a, np.zeros((n - len(a),) + a.shape[1:], a.dtype)])
+
+class GameStats:
+    # summaries of any number of games in constant memory; fed row by row from Game.add_data_row,
+    # and mergeable, so every worker process keeps its own and the caller adds them up
+    def __init__(self):
+        self.games: dict[int, int] = {} # by player count
+        self.money_count: dict[int, np.ndarray] = {} # games that reached each round, by player count
+        self.money_mean: dict[int, np.ndarray] = {} # [round, player] money at the end of the round
+        self.money_m2: dict[int, np.ndarray] = {} # sum of squared deviations, for the variance
+        self.rounds: np.ndarray = np.zeros(0, np.int64) # histogram of game length in rounds
+        self.landings: np.ndarray = np.zeros(41, np.int64) # by board position, index 40 is jail; squares
+        # left again in the same move (card draws, go to jail) count as well as where the move ends
+        self.rent: np.ndarray = np.zeros(40, np.int64) # rent earned by each property, card rent included
+        self.bank: np.ndarray = np.zeros((0, BANK_BINS), np.int64) # [turn, bin] bank money histogram
+
+        # the game being played
+        self.round_money: list[list[int]] = []
+        self.bank_bins: list[int] = []
+        self.last_round: int = 0
+        self.last_money: list[int] = []
+
+    #** Feeding **#
+
+    def add_row(self, game) -> None:
+        row, layout = game.row, game.layout
+        rnd = row[layout.round]
+        if rnd != self.last_round and self.last_money:
+            self.round_money.append(self.last_money)
+        self.last_round = rnd
+        self.last_money = [row[i] for i in layout.money[1:]]
+        self.bank_bins.append(min(max(row[layout.money[0]] // BANK_BIN, 0), BANK_BINS-1))
+        # events of this row only, a game without history keeps no others
+        ev = game.events
+        rec = ev.records
+        last = None
+        for i in range(ev.offsets[-2]*NUM_FIELDS, ev.offsets[-1]*NUM_FIELDS, NUM_FIELDS):
+            kind = rec[i]
+            if kind == Event.RENT or kind == Event.CARD_RENT:
+                self.rent[rec[i+4]] += rec[i+3]
+            elif kind == Event.CHANCE or kind == Event.COMMUNITY_CHEST or (kind == Event.GO_TO_JAIL and rec[i+4] == GO_TO_JAIL_SQUARE):
+                last = rec[i+4]
+                self.landings[last] += 1
+        # the committed position, unless the card drawn there did not move the player
+        pos = row[layout.pos[row[layout.player_idx]]]
+        if pos != last:
+            self.landings[JAIL_SQUARE if pos == -1 else pos] += 1
+
+    def end_game(self, game) -> None:
+        n = game.num_players
+        if self.last_money:
+            self.round_money.append(self.last_money)
+        self.games[n] = self.games.get(n, 0) + 1
+        self.rounds = grow(self.rounds, self.last_round + 1)
+        self.rounds[self.last_round] += 1 # round of the last logged turn
+
+        money = np.array(self.round_money, np.float64).reshape(-1, n)
+        m = len(money)
+        count = grow(self.money_count.get(n, np.zeros(0, np.int64)), m)
+        mean = grow(self.money_mean.get(n, np.zeros((0, n))), m)
+        m2 = grow(self.money_m2.get(n, np.zeros((0, n))), m)
+        count[:m] += 1
+        delta = money - mean[:m]
+        mean[:m] += delta / count[:m, None]
+        m2[:m] += delta * (money - mean[:m])
+        self.money_count[n], self.money_mean[n], self.money_m2[n] = count, mean, m2
+
+        self.bank = grow(self.bank, len(self.bank_bins))
+        self.bank[np.arange(len(self.bank_bins)), self.bank_bins] += 1
+
+        self.round_money, self.bank_bins, self.last_round, self.last_money = [], [], 0, []
+
+    def merge(self, other: 'GameStats') -> None:
+        for n, games in other.games.items():
+            self.games[n] = self.games.get(n, 0) + games
+            m = max(len(self.money_count.get(n, ())), len(other.money_count[n]))
+            ca = grow(self.money_count.get(n, np.zeros(0, np.int64)), m)
+            cb = grow(other.money_count[n], m)
+            ma, mb = grow(self.money_mean.get(n, np.zeros((0, n))), m), grow(other.money_mean[n], m)
+            va, vb = grow(self.money_m2.get(n, np.zeros((0, n))), m), grow(other.money_m2[n], m)
+            count = ca + cb
+            w = np.divide(cb, count, out=np.zeros(m), where=count > 0)[:, None]
+            delta = mb - ma
+            self.money_count[n] = count
+            self.money_mean[n] = ma + delta * w
+            self.money_m2[n] = va + vb + delta**2 * (ca[:, None] * w)
+        self.rounds = grow(self.rounds, len(other.rounds))
+        self.rounds[:len(other.rounds)] += other.rounds
+        self.landings += other.landings
+        self.rent += other.rent
+        self.bank = grow(self.bank, len(other.bank))
+        self.bank[:len(other.bank)] += other.bank
+
+    #** Results **#
+
+    def num_games(self) -> int: return sum(self.games.values())
+    def money_std(self, n: int) -> np.ndarray: return np.sqrt(self.money_m2[n] / np.maximum(self.money_count[n] - 1, 1)[:, None])
+    def landing_frequency(self) -> np.ndarray: return self.landings / max(self.landings.sum(), 1)
+    def rent_per_game(self) -> np.ndarray: return self.rent / max(self.num_games(), 1)
+
+    def bank_quantiles(self, qs: tuple[float, ...]=(0.05, 0.25, 0.5, 0.75, 0.95)) -> np.ndarray:
+        # [turn, q] from the histograms, to within a bin; turns reached by no game are nan
+        cum = np.cumsum(self.bank, axis=1)
+        total = cum[:, -1:]
+        ret = np.full((len(self.bank), len(qs)), np.nan)
+        for j, q in enumerate(qs):
+            idx = (cum < q * total).sum(axis=1)
+            ret[:, j] = np.where(total[:, 0] > 0, (idx + 0.5) * BANK_BIN, np.nan)
+        return ret
+
+    def report(self) -> str:
+        lines = [f'{self.num_games()} games']
+        for n in sorted(self.games):
+            # the last round every game of this size got through
+            r = int((self.money_count[n] == self.games[n]).sum())
+            final = self.money_mean[n][r-1]
+            lines.append(f'{n} players: {self.games[n]} games, mean money after round {r}: '
+                         + ' '.join(f'{m:.0f}' for m in final))
+        r = np.arange(len(self.rounds))
+        mean = (r * self.rounds).sum() / max(self.rounds.sum(), 1)
+        lines.append(f'rounds: mean {mean:.2f}, ' + ' '.join(f'{i}:{c}' for i, c in enumerate(self.rounds) if c))
+        freq = self.landing_frequency()
+        top = np.argsort(freq)[::-1][:8]
+        # ids repeat between streets and railroads, so squares are named with their position
+        lines.append('most landed: ' + ' '.join(f'{f"{BOARD[i].id or BOARD[i].kind}@{i}" if i < 40 else "in jail"}:{freq[i]:.3f}'
+                                                for i in top))
+        rent = self.rent_per_game()
+        top = np.argsort(rent)[::-1][:8]
+        lines.append('rent per game: ' + ' '.join(f'{BOARD[i].id}:{rent[i]:.0f}' for i in top if rent[i]))
+        q = self.bank_quantiles((0.05, 0.5, 0.95))
+        for t in range(0, len(q), max(len(q) // 5, 1)):
+            lines.append(f'bank money turn {t}: 5% {q[t, 0]:.0f}, median {q[t, 1]:.0f}, 95% {q[t, 2]:.0f}')
+        return '\n'.join(lines)
+
+    #** Files **#
+
+    def save(self, path: str) -> None:
+        d = {'rounds': self.rounds, 'landings': self.landings, 'rent': self.rent, 'bank': self.bank}
+        for n in self.games:
+            d[f'games.{n}'] = np.array(self.games[n])
+            d[f'money_count.{n}'] = self.money_count[n]
+            d[f'money_mean.{n}'] = self.money_mean[n]
+            d[f'money_m2.{n}'] = self.money_m2[n]
+        np.savez_compressed(path, **d)
+
+    @classmethod
+    def load(cls, path: str) -> 'GameStats':
+        s = cls()
+        with np.load(path) as f:
+            s.rounds, s.landings, s.rent, s.bank = f['rounds'], f['landings'], f['rent'], f['bank']
+            for k in f.files:
+                if k.startswith('games.'):
+                    n = int(k.split('.')[1])
+                    s.games[n] = int(f[k])
+                    s.money_count[n], s.money_mean[n], s.money_m2[n] = (f[f'{a}.{n}'] for a in ('money_count', 'money_mean', 'money_m2'))
+        return s
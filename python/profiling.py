@@ -0,0 +1,75 @@
+import time
+
+# phase name -> Game method timed for it; nested phases (e.g. pay inside move) count towards both
+# the inclusive time of the outer phase and the self time of the inner one
+PHASES: dict[str, str] = {
+    'run': 'run',
+    'step': 'step',
+    'non_turn_moves': 'execute_non_turn_moves',
+    'jail': 'get_out_of_jail',
+    'dice': 'roll_dice',
+    'move': 'move_and_evaluate',
+    'chance': 'ch',
+    'community_chest': 'cc',
+    'pay': 'pay',
+    'log': 'add_data_row',
+}
+
+class PhaseProfile:
+    def __init__(self):
+        self.calls: dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.total_ns: dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.self_ns: dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.games: int = 0
+        self.stack: list[int] = [] # time spent in nested phases, by open phase
+
+    def instrument(self, game) -> None:
+        # shadows the phase methods on this game only, other games and the class are untouched,
+        # so a game without a profile runs exactly the uninstrumented code
+        for phase, method in PHASES.items():
+            setattr(game, method, self.wrap(phase, getattr(game, method)))
+        self.games += 1
+
+    def wrap(self, phase: str, func):
+        stack, calls, total_ns, self_ns = self.stack, self.calls, self.total_ns, self.self_ns
+        clock = time.perf_counter_ns
+        def timed(*args, **kwargs):
+            stack.append(0)
+            t = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                dt = clock() - t
+                nested = stack.pop()
+                calls[phase] += 1
+                total_ns[phase] += dt
+                self_ns[phase] += dt - nested
+                if stack:
+                    stack[-1] += dt
+        return timed
+
+    def merge(self, other: 'PhaseProfile') -> None:
+        for phase in PHASES:
+            self.calls[phase] += other.calls[phase]
+            self.total_ns[phase] += other.total_ns[phase]
+            self.self_ns[phase] += other.self_ns[phase]
+        self.games += other.games
+
+    def report(self) -> str:
+        # self time of run and step is the loop and turn logic outside the other phases
+        run = max(self.total_ns['run'], 1)
+        lines = [f'{self.games} games, {run/1e6:.1f} ms in run',
+                 f'{"phase":<16} {"calls":>10} {"total ms":>10} {"self ms":>10} {"self %":>7} {"ns/call":>9}']
+        for phase in sorted(PHASES, key=lambda p: -self.self_ns[p]):
+            calls = self.calls[phase]
+            lines.append(f'{phase:<16} {calls:>10} {self.total_ns[phase]/1e6:>10.1f} {self.self_ns[phase]/1e6:>10.1f} '
+                         f'{self.self_ns[phase]/run:>7.1%} {self.self_ns[phase]/max(calls, 1):>9.0f}')
+        return '\n'.join(lines)
+
+    def __getstate__(self) -> dict:
+        # profiles are sent back from worker processes, open phases never are
+        return {k: v for k, v in self.__dict__.items() if k != 'stack'}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.stack = []
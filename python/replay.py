@@ -0,0 +1,190 @@
+from typing import Iterable
+
+import argparse
+import os
+import re
+import struct
+
+import pandas as pd
+
+from batch import game_seeds, seat_strategies
+from game import Game
+from logstore import GAME_COL, NOTES_COL, read_log
+from snapshot import Snapshot, to_bytes, from_bytes
+from strategy import make_strategy
+
+class Replay:
+    # re-simulates one game from its seed; strategies are deterministic, so the seed and the strategy
+    # names are all the decisions there are to record
+    def __init__(self, num_players: int, seed: int, strategies: Iterable[str]=(), max_rounds: int=30,
+                 dice_block: int=0, log: pd.DataFrame | None=None, checkpoint_interval: int=256):
+        self.strategies: list[str] = list(strategies)
+        self.game: Game = Game(num_players, seed=seed, max_rounds=max_rounds, verbose=False, dice_block=dice_block,
+                               strategies=[make_strategy(s) for s in self.strategies] or None)
+        self.log: pd.DataFrame | None = None if log is None else log.reset_index(drop=True)
+        self.checkpoint_interval: int = checkpoint_interval
+        self.checkpoints: dict[int, Snapshot] = {0: self.game.snapshot()} # by number of rows committed before
+        self.base: int = 0 # rows committed before the ones held in game.data
+
+    def num_rows(self) -> int: return self.base + len(self.game.data) # rows simulated so far
+
+    #** Seeking **#
+
+    def advance(self) -> bool:
+        # one more turn, checkpointing at turn boundaries; False once the game is over
+        g = self.game
+        if g.finished():
+            return False
+        g.step()
+        n = self.num_rows()
+        last = max(self.checkpoints)
+        if n >= last + self.checkpoint_interval:
+            self.checkpoints[n] = g.snapshot()
+        return True
+
+    def seek(self, idx: int) -> list[int]:
+        # row idx as logged; restarts from the nearest checkpoint when going back or when a
+        # checkpoint is closer than the rows simulated so far
+        if idx < 0:
+            raise IndexError('replay rows are counted from the start of the game')
+        start = max(k for k in self.checkpoints if k <= idx)
+        if idx < self.base or start > self.num_rows():
+            self.game.restore(self.checkpoints[start])
+            self.base = start
+        while self.num_rows() <= idx:
+            if not self.advance():
+                raise IndexError(f'game ended after {self.num_rows()} rows')
+        return self.game.data[idx - self.base]
+
+    def note(self, idx: int) -> str:
+        self.seek(idx)
+        return self.game.events.note(idx - self.base)
+
+    def replay(self) -> int:
+        # simulate to the end, returns the number of rows
+        while self.advance():
+            pass
+        return self.num_rows()
+
+    #** Verification **#
+
+    def mismatches(self, idx: int) -> list[str]:
+        # labels where the re-simulated row differs from the log
+        if self.log is None:
+            raise ValueError('no log to verify against')
+        row = self.seek(idx)
+        logged = self.log.iloc[idx]
+        ret = [col for col, val in zip(self.game.cols, row) if col in logged and int(logged[col]) != val]
+        if NOTES_COL in logged and ('' if pd.isna(logged[NOTES_COL]) else str(logged[NOTES_COL])) != self.note(idx):
+            ret.append(NOTES_COL)
+        return ret
+
+    def verify(self) -> int | None:
+        # the first row that differs from the log, None if the whole game replays exactly
+        if self.log is None:
+            raise ValueError('no log to verify against')
+        logged = self.log[[c for c in self.game.cols if c in self.log]].to_numpy()
+        idx = self.game.col_idx
+        cols = [idx[c] for c in self.game.cols if c in self.log]
+        notes = self.log[NOTES_COL].fillna('').astype(str).tolist() if NOTES_COL in self.log else None
+        for i in range(len(logged)):
+            row = self.seek(i)
+            if [row[c] for c in cols] != logged[i].tolist() or (notes is not None and notes[i] != self.note(i)):
+                return i
+        if self.num_rows() != len(logged) or self.advance():
+            return len(logged)
+        return None
+
+    #** Checkpoint files **#
+
+    def save_checkpoints(self, path: str) -> None:
+        # (rows, length) then the snapshot bytes, for each checkpoint
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            for n, snap in sorted(self.checkpoints.items()):
+                b = to_bytes(snap)
+                f.write(struct.pack('<II', n, len(b)))
+                f.write(b)
+        os.replace(tmp, path)
+
+    def load_checkpoints(self, path: str) -> None:
+        with open(path, 'rb') as f:
+            b = f.read()
+        i = 0
+        while i < len(b):
+            n, size = struct.unpack_from('<II', b, i)
+            i += 8
+            self.checkpoints[n] = from_bytes(b[i:i+size], len(self.game.cols))
+            i += size
+
+#** Opening logs **#
+
+LOG_NAME = re.compile(r'data_ranseed(\d+)_strtplyr\d+\.csv$')
+
+def log_players(log: pd.DataFrame) -> int:
+    n = 0
+    while f'Player {n+1} Money' in log:
+        n += 1
+    return n
+
+def from_csv(path: str, strategies: Iterable[str]=(), max_rounds: int=30, **kwargs) -> Replay:
+    # a log written by Game.save, the seed is taken from the file name
+    m = LOG_NAME.search(path)
+    if m is None:
+        raise ValueError(f'no seed in log file name {path!r}, use Replay directly')
+    log = pd.read_csv(path)
+    n = log_players(log)
+    return Replay(n, int(m.group(1)), seat_strategies(strategies, n), max_rounds, log=log, **kwargs)
+
+def from_dataset(path: str, game_id: int, master_seed: int=0, strategies: Iterable[str]=(), max_rounds: int=30,
+                 **kwargs) -> Replay:
+    # a game streamed by batch.py; its seed is derived from the master seed like make_tasks does, so the
+    # game ids of a batch are consecutive over all its player counts
+    log = read_log(path, games=[game_id])
+    if not len(log):
+        raise ValueError(f'game {game_id} not found in {path!r}')
+    n = log_players(log)
+    seed = game_seeds(master_seed, game_id+1)[game_id]
+    return Replay(n, seed, seat_strategies(strategies, n), max_rounds, log=log.drop(columns=GAME_COL), **kwargs)
+
+#** CLI **#
+
+def main(argv: list[str] | None=None) -> int:
+    parser = argparse.ArgumentParser(description='Replay a logged game, seek to a row and verify it against the log.')
+    parser.add_argument('log', help='a CSV written by Game.save or a dataset directory written by batch.py')
+    parser.add_argument('-g', '--game', type=int, default=None, help='game id within a dataset')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed of the batch')
+    parser.add_argument('-r', '--rounds', type=int, default=30, help='round limit per game')
+    parser.add_argument('-S', '--strategies', nargs='+', default=[], help='strategy names by seat')
+    parser.add_argument('-t', '--turn', type=int, default=None, help='show this row')
+    parser.add_argument('-c', '--checkpoints', default=None, help='checkpoint file, read if it exists and written after')
+    parser.add_argument('--verify', action='store_true', help='replay the whole game against the log')
+    args = parser.parse_args(argv)
+
+    if args.game is None:
+        r = from_csv(args.log, args.strategies, args.rounds)
+    else:
+        r = from_dataset(args.log, args.game, args.seed, args.strategies, args.rounds)
+    if args.checkpoints and os.path.exists(args.checkpoints):
+        r.load_checkpoints(args.checkpoints)
+
+    ret = 0
+    if args.turn is not None:
+        row = r.seek(args.turn)
+        for col, val in zip(r.game.cols, row):
+            print(f'{col:<28} {val}')
+        print(f'{NOTES_COL:<28} {r.note(args.turn)}')
+        bad = r.mismatches(args.turn)
+        print('matches the log' if not bad else f'differs from the log in {bad}')
+        ret = int(bool(bad))
+    if args.verify:
+        i = r.verify()
+        print('replay matches the log' if i is None else f'replay differs from the log at row {i}')
+        ret = int(i is not None)
+    if args.checkpoints:
+        r.save_checkpoints(args.checkpoints)
+    return ret
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+CACHE_VERSION: int = 1
+CACHE_PATH: str = './log/cache/results.sqlite'
+# sources whose changes can change a result: game.py and every module it imports, and the modules
+# that turn games into cached results; their hash is part of every key
+CODE_FILES: tuple[str, ...] = ('board.py', 'game.py', 'strategy.py', 'events.py', 'turnlog.py', 'snapshot.py',
+                               'state.py', 'profiling.py', 'batch.py', 'server.py')
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    h = hashlib.sha1()
+    src = os.path.dirname(os.path.abspath(__file__))
+    for name in CODE_FILES:
+        with open(os.path.join(src, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+def config_key(kind: str, config: dict) -> str:
+    # content address of a result: what was computed, from what and by which code
+    d = {'kind': kind, 'version': CACHE_VERSION, 'code': code_version(), 'config': config}
+    return hashlib.sha1(json.dumps(d, sort_keys=True).encode()).hexdigest()
+
+class ResultCache:
+    # results by key in a single sqlite file, shared by runs; least recently used entries are
+    # evicted once the stored results outgrow max_bytes
+    def __init__(self, path: str=CACHE_PATH, max_bytes: int=64 << 20):
+        self.path: str = path
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db: sqlite3.Connection = sqlite3.connect(path, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, data BLOB, used REAL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+        self.size: int = self.db.execute('SELECT COALESCE(SUM(LENGTH(data)), 0) FROM results').fetchone()[0]
+
+    def get(self, key: str) -> bytes | None:
+        row = self.db.execute('SELECT data FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.db.execute('UPDATE results SET used = ? WHERE key = ?', (time.time(), key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, data: bytes) -> None:
+        old = self.db.execute('SELECT LENGTH(data) FROM results WHERE key = ?', (key,)).fetchone()
+        self.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)', (key, data, time.time()))
+        self.size += len(data) - (old[0] if old else 0)
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def get_json(self, key: str):
+        data = self.get(key)
+        return None if data is None else json.loads(data)
+
+    def put_json(self, key: str, obj) -> None: self.put(key, json.dumps(obj, separators=(',', ':')).encode())
+
+    def evict(self, target: float=0.9) -> int:
+        # least recently used first, down to target*max_bytes; returns the number of entries removed
+        removed = 0
+        rows = self.db.execute('SELECT key, LENGTH(data) FROM results ORDER BY used').fetchall()
+        keys: list[tuple[str]] = []
+        for key, n in rows:
+            if self.size <= target * self.max_bytes:
+                break
+            keys.append((key,))
+            self.size -= n
+            removed += 1
+        self.db.executemany('DELETE FROM results WHERE key = ?', keys)
+        return removed
+
+    def clear(self) -> None:
+        self.db.execute('DELETE FROM results')
+        self.size = 0
+
+    def stats(self) -> dict:
+        entries = self.db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': self.size}
+
+    def close(self) -> None: self.db.close()
+
+    def __enter__(self) -> 'ResultCache': return self
+    def __exit__(self, *exc) -> None: self.close()
@@ -0,0 +1,355 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+
+from batch import BatchSummary, make_tasks, play_chunk, seat_strategies
+from game import Game
+from resultcache import CACHE_PATH, ResultCache, config_key
+from strategy import STRATEGIES, make_strategy
+
+HTML_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'html')
+MAX_GAMES: int = 100000
+MAX_ROUNDS: int = 1000
+MAX_BODY: int = 65536
+
+class JobConfig(NamedTuple):
+    players: int = 4
+    games: int = 100
+    seed: int = 0 # master seed for batches, game seed for single games
+    rounds: int = 30
+    strategies: tuple[str, ...] = ()
+
+    def key(self) -> str: return json.dumps(self._asdict(), sort_keys=True)
+
+def parse_config(d: dict) -> JobConfig:
+    # raises ValueError on anything the simulator would not accept
+    if not isinstance(d, dict):
+        raise ValueError('expected a JSON object')
+    unknown = set(d) - set(JobConfig._fields)
+    if unknown:
+        raise ValueError(f'unknown fields {sorted(unknown)}')
+    try:
+        strategies = d.get('strategies', ())
+        if isinstance(strategies, str):
+            strategies = strategies.split(',') if strategies else ()
+        c = JobConfig(int(d.get('players', 4)), int(d.get('games', 100)), int(d.get('seed', 0)),
+                      int(d.get('rounds', 30)), tuple(str(s) for s in strategies))
+    except (TypeError, ValueError):
+        raise ValueError('players, games, seed and rounds must be integers, strategies a list of names')
+    if not 2 <= c.players <= 8:
+        raise ValueError('players must be between 2 and 8')
+    if not 1 <= c.games <= MAX_GAMES:
+        raise ValueError(f'games must be between 1 and {MAX_GAMES}')
+    if not 1 <= c.rounds <= MAX_ROUNDS:
+        raise ValueError(f'rounds must be between 1 and {MAX_ROUNDS}')
+    for s in c.strategies:
+        if s not in STRATEGIES:
+            raise ValueError(f'unknown strategy {s!r}, expected one of {list(STRATEGIES)}')
+    return c
+
+def game_turns(c: JobConfig) -> dict:
+    # one game with its full log, run in a worker process
+    strategies = [make_strategy(s) for s in seat_strategies(c.strategies, c.players)] or None
+    g = Game(c.players, seed=c.seed, max_rounds=c.rounds, verbose=False, strategies=strategies)
+    g.run(save=False)
+    return {'columns': g.cols, 'rows': [r.tolist() for r in g.data], 'notes': g.notes(), 'winner': g.winner()}
+
+#** Jobs **#
+
+class Job:
+    def __init__(self, id: str, config: JobConfig):
+        self.id: str = id
+        self.config: JobConfig = config
+        self.done: int = 0
+        self.summary: BatchSummary = BatchSummary()
+        self.result: dict | None = None # summary.to_dict() once finished
+        self.status: str = 'queued' # running, finished or failed
+        self.error: str | None = None
+        self.changed: asyncio.Condition = asyncio.Condition()
+
+    def state(self) -> dict:
+        ret = {'id': self.id, 'status': self.status, 'config': self.config._asdict(),
+               'done': self.done, 'total': self.config.games}
+        if self.result is not None:
+            ret['result'] = self.result
+        if self.error is not None:
+            ret['error'] = self.error
+        return ret
+
+    async def notify(self) -> None:
+        async with self.changed:
+            self.changed.notify_all()
+
+class Simulator:
+    # CPU bound games run in a process pool; the event loop only schedules chunks and reports progress
+    def __init__(self, workers: int | None=None, chunk: int=32, cache_size: int=256, cache: ResultCache | None=None):
+        self.pool: ProcessPoolExecutor = ProcessPoolExecutor(workers)
+        self.chunk: int = chunk
+        self.cache_size: int = cache_size # jobs and games kept in memory
+        self.cache: ResultCache | None = cache # finished results on disk, across restarts
+        self.jobs: OrderedDict[str, Job] = OrderedDict() # by configuration key, least recently used first
+        self.by_id: dict[str, Job] = {}
+        self.games: OrderedDict[str, asyncio.Future] = OrderedDict()
+        self.ids = itertools.count(1)
+
+    def submit(self, c: JobConfig) -> tuple[Job, bool]:
+        # a job with the same configuration is shared, finished or not
+        key = c.key()
+        if key in self.jobs:
+            self.jobs.move_to_end(key)
+            return self.jobs[key], True
+        job = Job(str(next(self.ids)), c)
+        self.jobs[key] = job
+        self.by_id[job.id] = job
+        self.evict()
+        asyncio.get_running_loop().create_task(self.run(job))
+        return job, False
+
+    def evict(self) -> None:
+        # failed jobs, only kept to be looked up by id, go first, then finished ones least recently
+        # used first; jobs still queued or running are skipped, not waited for
+        for id, job in list(self.by_id.items()):
+            if len(self.by_id) <= self.cache_size:
+                return
+            if job.status == 'failed':
+                del self.by_id[id]
+        for key, job in list(self.jobs.items()):
+            if len(self.by_id) <= self.cache_size:
+                return
+            if job.status != 'finished':
+                continue
+            del self.jobs[key]
+            del self.by_id[job.id]
+
+    async def run(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        c = job.config
+        key = config_key('batch', c._asdict())
+        if self.cache is not None and (result := self.cache.get_json(key)) is not None:
+            job.result, job.done, job.status = result, c.games, 'finished'
+            await job.notify()
+            return
+        tasks = make_tasks(c.games, [c.players], c.seed, c.rounds, c.strategies)
+        chunks = [(tasks[i:i+self.chunk], None, 'npz', False, False) for i in range(0, len(tasks), self.chunk)]
+        job.status = 'running'
+        try:
+            for fut in asyncio.as_completed([loop.run_in_executor(self.pool, play_chunk, ch) for ch in chunks]):
+                results, _, _ = await fut
+                for r in results:
+                    job.summary.add(r)
+                job.done += len(results)
+                await job.notify()
+            job.result = json.loads(json.dumps(job.summary.to_dict())) # as read back from the cache
+            if self.cache is not None:
+                self.cache.put_json(key, job.result)
+            job.status = 'finished'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = f'{type(e).__name__}: {e}'
+            # no longer shared, the next request for this configuration runs it again
+            if self.jobs.get(c.key()) is job:
+                del self.jobs[c.key()]
+        await job.notify()
+
+    def game(self, c: JobConfig) -> asyncio.Future:
+        # games is ignored for single games, as by the disk cache
+        key = c._replace(games=1).key()
+        if key not in self.games:
+            fut = self.games[key] = asyncio.ensure_future(self.play_game(c))
+            fut.add_done_callback(lambda f: self.forget_failed_game(key, f))
+            while len(self.games) > self.cache_size:
+                self.games.popitem(last=False)
+        self.games.move_to_end(key)
+        return self.games[key]
+
+    def forget_failed_game(self, key: str, fut: asyncio.Future) -> None:
+        # requests waiting on it get the error, later ones play the game again
+        if (fut.cancelled() or fut.exception() is not None) and self.games.get(key) is fut:
+            del self.games[key]
+
+    async def play_game(self, c: JobConfig) -> dict:
+        key = config_key('turns', c._replace(games=1)._asdict())
+        if self.cache is not None and (game := self.cache.get_json(key)) is not None:
+            return game
+        game = await asyncio.get_running_loop().run_in_executor(self.pool, game_turns, c)
+        if self.cache is not None:
+            self.cache.put_json(key, game)
+        return game
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
+
+#** HTTP **#
+
+REASONS: dict[int, str] = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+                           405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+CONTENT_TYPES: dict[str, str] = {'.html': 'text/html; charset=utf-8', '.css': 'text/css', '.js': 'text/javascript',
+                                 '.svg': 'image/svg+xml', '.png': 'image/png'}
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status: int = status
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: dict[str, str]
+    body: bytes
+
+async def read_request(reader: asyncio.StreamReader) -> Request | None:
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split()
+    except ValueError:
+        raise HttpError(400, 'malformed request line')
+    headers: dict[str, str] = {}
+    while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0) or 0)
+    if length > MAX_BODY:
+        raise HttpError(413, 'request body too large')
+    body = await reader.readexactly(length) if length else b''
+    url = urlsplit(target)
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    return Request(method, url.path, query, body)
+
+def response(status: int, body: bytes, content_type: str='application/json') -> bytes:
+    head = (f'HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\nAccess-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n')
+    return head.encode('latin-1') + body
+
+def json_response(status: int, obj) -> bytes: return response(status, json.dumps(obj).encode())
+
+def sse(event: str, data) -> bytes: return f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode()
+
+SSE_HEAD: bytes = (b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n'
+                   b'Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n')
+
+class Server:
+    def __init__(self, sim: Simulator):
+        self.sim: Simulator = sim
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            req = await read_request(reader)
+            if req is not None:
+                await self.route(req, writer)
+        except HttpError as e:
+            writer.write(json_response(e.status, {'error': str(e)}))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            writer.write(json_response(500, {'error': f'{type(e).__name__}: {e}'}))
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def route(self, req: Request, writer: asyncio.StreamWriter) -> None:
+        parts = [p for p in req.path.split('/') if p]
+        if req.method == 'POST' and parts == ['jobs']:
+            try:
+                c = parse_config(json.loads(req.body or b'{}'))
+            except ValueError as e:
+                raise HttpError(400, str(e))
+            job, cached = self.sim.submit(c)
+            writer.write(json_response(200 if cached else 202, {**job.state(), 'cached': cached}))
+            return
+        if req.method != 'GET':
+            raise HttpError(405, f'{req.method} not allowed on {req.path}')
+        if parts[:1] == ['jobs'] and len(parts) in (2, 3):
+            job = self.sim.by_id.get(parts[1])
+            if job is None:
+                raise HttpError(404, f'no job {parts[1]}')
+            if len(parts) == 2:
+                writer.write(json_response(200, job.state()))
+            elif parts[2] == 'events':
+                await self.stream_job(job, writer)
+            else:
+                raise HttpError(404, f'not found: {req.path}')
+        elif parts == ['game']:
+            try:
+                c = parse_config(req.query)
+            except ValueError as e:
+                raise HttpError(400, str(e))
+            await self.stream_game(c, writer)
+        else:
+            self.static(parts, writer)
+
+    async def stream_job(self, job: Job, writer: asyncio.StreamWriter) -> None:
+        # progress events until the job is over, then its result
+        writer.write(SSE_HEAD)
+        done = -1
+        while True:
+            async with job.changed:
+                if job.done == done and job.status in ('queued', 'running'):
+                    await job.changed.wait()
+            if job.done != done:
+                done = job.done
+                writer.write(sse('progress', {'done': done, 'total': job.config.games}))
+                await writer.drain()
+            if job.status not in ('queued', 'running'):
+                writer.write(sse('result' if job.status == 'finished' else 'error', job.state()))
+                return
+
+    async def stream_game(self, c: JobConfig, writer: asyncio.StreamWriter) -> None:
+        # one event per logged turn of a single game
+        game = await self.sim.game(c)
+        writer.write(SSE_HEAD)
+        cols = game['columns']
+        for i, (row, note) in enumerate(zip(game['rows'], game['notes'])):
+            writer.write(sse('turn', {'turn': i, 'row': dict(zip(cols, row)), 'notes': note}))
+            if i % 64 == 63:
+                await writer.drain()
+        writer.write(sse('end', {'turns': len(game['rows']), 'winner': game['winner']}))
+
+    def static(self, parts: list[str], writer: asyncio.StreamWriter) -> None:
+        root = os.path.realpath(HTML_DIR)
+        path = os.path.realpath(os.path.join(root, *parts) if parts else os.path.join(root, 'index.html'))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            raise HttpError(404, 'not found')
+        with open(path, 'rb') as f:
+            writer.write(response(200, f.read(), CONTENT_TYPES.get(os.path.splitext(path)[1], 'application/octet-stream')))
+
+async def serve(host: str, port: int, workers: int | None, cache: str | None) -> None:
+    sim = Simulator(workers, cache=ResultCache(cache) if cache else None)
+    server = await asyncio.start_server(Server(sim).handle, host, port)
+    print(f'serving on http://{host}:{port}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        sim.close()
+
+#** CLI **#
+
+def main(argv: list[str] | None=None) -> None:
+    parser = argparse.ArgumentParser(description='Local HTTP/JSON simulation service for the web front end.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('-p', '--port', type=int, default=8000)
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('-c', '--cache', default=CACHE_PATH, help='result cache file')
+    parser.add_argument('--no-cache', dest='cache', action='store_const', const=None, help='always simulate')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.cache))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+from array import array
+
+import sys
+
+class GameState:
+    # the mutable part of a game in typed buffers: the state row (see Game.cols), both card decks,
+    # mortgaged flags by board position and the players still in the game. About 800 bytes for
+    # 4 players, so tens of thousands can be held for rollouts and stepped by one Game
+    # (Game.attach), which updates the buffers in place
+    __slots__ = ('row', 'ch', 'cc', 'mortgaged', 'active', 'start_player')
+
+    def __init__(self, row: array, ch: array, cc: array, mortgaged: bytearray, active: array, start_player: int):
+        self.row: array = row # 'i', money needs 32 bits
+        self.ch: array = ch # 'b' card numbers, next card first
+        self.cc: array = cc
+        self.mortgaged: bytearray = mortgaged
+        self.active: array = active # 'b' player indexes
+        self.start_player: int = start_player
+
+    def copy(self) -> 'GameState':
+        return GameState(self.row[:], self.ch[:], self.cc[:], self.mortgaged[:], self.active[:], self.start_player)
+
+    def buffer(self) -> memoryview: return memoryview(self.row) # the row without a copy, e.g. for np.frombuffer
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self) + sum(sys.getsizeof(getattr(self, k)) for k in self.__slots__[:-1])
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GameState) and all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+if __name__ == '__main__':
+    # memory of held states against whole games, and stepping held states with one game
+    import time
+    import tracemalloc
+
+    from game import Game
+
+    n = 10000
+    tracemalloc.start()
+    games = [Game(4, seed=i, verbose=False, log_mode='none') for i in range(1000)]
+    per_game = tracemalloc.get_traced_memory()[0] / len(games)
+    del games
+    tracemalloc.stop()
+    g = Game(4, seed=0, verbose=False, log_mode='none')
+    tracemalloc.start()
+    states = [g.state().copy() for _ in range(n)]
+    per_state = tracemalloc.get_traced_memory()[0] / n
+    tracemalloc.stop()
+    print(f'{per_game:.0f} bytes per game, {per_state:.0f} bytes per held state ({states[0].nbytes()} by getsizeof)')
+
+    start = time.perf_counter()
+    for s in states:
+        g.attach(s)
+        while g.get_round() <= 5 and not g.finished():
+            g.step()
+    elapsed = time.perf_counter() - start
+    print(f'{n} held states stepped through 5 rounds in {elapsed:.2f}s, '
+          f'{len({s.row[g.layout.money[1]] for s in states})} distinct player 1 balances')
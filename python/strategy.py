@@ -0,0 +1,157 @@
+from typing import Callable, NamedTuple
+
+from board import BOARD, STREET
+
+# jail exit methods, see Game.get_out_of_jail
+JAIL_STAY: int = -1
+JAIL_PAY: int = 0
+JAIL_CARD: int = 1
+JAIL_ROLL_DOUBLE: int = 2
+
+class Trade(NamedTuple):
+    partner: int
+    give: tuple[int, ...] = () # positions handed to the partner
+    take: tuple[int, ...] = () # positions received from the partner
+    cash: int = 0 # paid to the partner, negative if the partner pays
+
+#** State view **#
+
+class StateView:
+    # read only access to the live state row of a game, shared by all of its strategies
+    __slots__ = ('_game', '_layout')
+
+    def __init__(self, game):
+        self._game = game
+        self._layout = game.layout
+
+    def round(self) -> int: return self._game.row[self._layout.round]
+    def player(self) -> int: return self._game.row[self._layout.player_idx]
+    def num_players(self) -> int: return self._game.num_players
+    def active_players(self) -> tuple[int, ...]: return tuple(self._game.active_players)
+    def money(self, plyr_idx: int) -> int: return self._game.row[self._layout.money[plyr_idx]]
+    def pos(self, plyr_idx: int) -> int: return self._game.row[self._layout.pos[plyr_idx]]
+    def in_jail(self, plyr_idx: int) -> bool: return self.pos(plyr_idx) == -1
+    def owner(self, pos: int) -> int: return self._game.row[self._layout.card_owner[pos]]
+    def level(self, pos: int) -> int: return self._game.get_card_level(pos)
+    def mortgaged(self, pos: int) -> bool: return self._game.mortgaged[pos]
+    def rent(self, pos: int) -> int: return self._game.rent(pos)
+
+    def owned(self, plyr_idx: int) -> list[int]: return sorted(self._game.owned[plyr_idx])
+
+    def group_owned_count(self, pos: int, plyr_idx: int) -> int: return self._game.group_owned_count(pos, plyr_idx)
+    def has_group(self, pos: int, plyr_idx: int) -> bool: return self._game.has_group(pos, plyr_idx)
+
+    def jail_free_cards(self, plyr_idx: int) -> int:
+        row, layout = self._game.row, self._layout
+        return (row[layout.cc_jail_free_owner] == plyr_idx) + (row[layout.ch_jail_free_owner] == plyr_idx)
+
+#** Strategies **#
+
+class Strategy:
+    # the built in rules: always buy, always pay to leave jail, never build, mortgage or trade
+    name: str = 'default'
+
+    def buy(self, view: StateView, plyr_idx: int, pos: int) -> bool: return True
+    def jail_exit(self, view: StateView, plyr_idx: int) -> int: return JAIL_PAY
+    def build(self, view: StateView, plyr_idx: int) -> list[int]: return [] # one house per entry
+    def raise_cash(self, view: StateView, plyr_idx: int, amount: int) -> list[int]: return [] # sell or mortgage
+    def unmortgage(self, view: StateView, plyr_idx: int) -> list[int]: return []
+    def trade(self, view: StateView, plyr_idx: int) -> list[Trade]: return []
+    def accept_trade(self, view: StateView, plyr_idx: int, trade: Trade) -> bool: return False
+
+class ReserveStrategy(Strategy):
+    # buys and builds while keeping a cash reserve, sells houses then mortgages when short
+    def __init__(self, reserve: int, name: str):
+        self.reserve: int = reserve
+        self.name: str = name
+
+    def buy(self, view: StateView, plyr_idx: int, pos: int) -> bool:
+        return view.money(plyr_idx) - BOARD[pos].price >= self.reserve
+
+    def jail_exit(self, view: StateView, plyr_idx: int) -> int:
+        return JAIL_CARD if view.jail_free_cards(plyr_idx) else JAIL_PAY
+
+    def build(self, view: StateView, plyr_idx: int) -> list[int]:
+        budget = view.money(plyr_idx) - self.reserve
+        ret: list[int] = []
+        for pos in view.owned(plyr_idx):
+            sq = BOARD[pos]
+            if sq.kind != STREET or pos != sq.group[0] or not view.has_group(pos, plyr_idx):
+                continue
+            if any(view.mortgaged(p) for p in sq.group):
+                continue
+            # build evenly, one house at a time on the least developed street
+            levels = {p: max(view.level(p), 1) for p in sq.group}
+            while budget >= sq.house_price:
+                p = min(levels, key=levels.get)
+                if levels[p] >= 6:
+                    break
+                levels[p] += 1
+                budget -= sq.house_price
+                ret.append(p)
+        return ret
+
+    def raise_cash(self, view: StateView, plyr_idx: int, amount: int) -> list[int]:
+        # houses first, one at a time from the most developed street so every sale is an even one,
+        # then the cheapest squares, which are all unimproved by the time they are reached
+        owned = view.owned(plyr_idx)
+        levels = {p: view.level(p) for p in sorted(owned, key=view.level, reverse=True) if view.level(p) >= 2}
+        ret: list[int] = []
+        while levels:
+            p = max(levels, key=levels.get)
+            ret.append(p)
+            levels[p] -= 1
+            if levels[p] < 2:
+                del levels[p]
+        ret += sorted((p for p in owned if not view.mortgaged(p)), key=lambda p: BOARD[p].price)
+        return ret
+
+    def unmortgage(self, view: StateView, plyr_idx: int) -> list[int]:
+        budget = view.money(plyr_idx) - self.reserve
+        ret: list[int] = []
+        for p in view.owned(plyr_idx):
+            cost = BOARD[p].mortgage * 11 // 10
+            if view.mortgaged(p) and budget >= cost:
+                budget -= cost
+                ret.append(p)
+        return ret
+
+class TraderStrategy(ReserveStrategy):
+    # offers cash for the last street it is missing from a color group
+    def __init__(self, reserve: int, name: str, premium: float=2.0):
+        super().__init__(reserve, name)
+        self.premium: float = premium
+
+    def trade(self, view: StateView, plyr_idx: int) -> list[Trade]:
+        ret: list[Trade] = []
+        budget = view.money(plyr_idx) - self.reserve
+        groups: set[tuple[int, ...]] = set()
+        for pos in view.owned(plyr_idx):
+            sq = BOARD[pos]
+            if sq.kind != STREET or sq.group in groups or view.group_owned_count(pos, plyr_idx) != len(sq.group) - 1:
+                continue
+            groups.add(sq.group)
+            for p in sq.group:
+                owner = view.owner(p)
+                price = int(self.premium * BOARD[p].price)
+                if owner not in (0, plyr_idx) and view.level(p) < 2 and budget >= price:
+                    ret.append(Trade(owner, take=(p,), cash=price))
+                    budget -= price
+        return ret
+
+    def accept_trade(self, view: StateView, plyr_idx: int, trade: Trade) -> bool:
+        value = sum(BOARD[p].price for p in trade.take) - sum(BOARD[p].price for p in trade.give)
+        breaks_group = any(view.has_group(p, plyr_idx) for p in trade.take)
+        return not breaks_group and trade.cash >= self.premium * value
+
+STRATEGIES: dict[str, Callable[[], Strategy]] = {
+    'default': Strategy,
+    'cautious': lambda: ReserveStrategy(300, 'cautious'),
+    'aggressive': lambda: ReserveStrategy(50, 'aggressive'),
+    'trader': lambda: TraderStrategy(150, 'trader'),
+}
+
+def make_strategy(name: str) -> Strategy:
+    if name not in STRATEGIES:
+        raise ValueError(f'unknown strategy {name!r}, expected one of {list(STRATEGIES)}')
+    return STRATEGIES[name]()
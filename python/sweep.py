@@ -0,0 +1,333 @@
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
+
+import argparse
+import datetime
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+
+from batch import BatchSummary, BatchTask, GameResult, game_seeds, iter_batch, read_results, seat_strategies, write_results
+from resultcache import code_version
+from strategy import STRATEGIES
+
+MANIFEST_VERSION: int = 1
+LEASE: float = 3600.0 # seconds without a heartbeat before a claim on an unfinished shard may be taken over
+
+class SweepConfig(NamedTuple):
+    games: int = 1000 # per player count and round cap
+    players: tuple[int, ...] = (4,)
+    rounds: tuple[int, ...] = (30,)
+    seed: int = 0
+    strategies: tuple[str, ...] = ()
+    shard_size: int = 1000 # games per shard
+    log_format: str | None = None # also keep every turn, in this format
+
+def config_from_json(d: dict) -> SweepConfig:
+    return SweepConfig(d['games'], tuple(d['players']), tuple(d['rounds']), d['seed'], tuple(d['strategies']),
+                       d['shard_size'], d['log_format'])
+
+def make_sweep_tasks(c: SweepConfig) -> list[BatchTask]:
+    # every round cap plays the same seeds, so caps are compared on common games
+    per_cap = c.games * len(c.players)
+    seeds = game_seeds(c.seed, per_cap)
+    ret: list[BatchTask] = []
+    for j, rounds in enumerate(c.rounds):
+        for i, n in enumerate(n for n in c.players for _ in range(c.games)):
+            ret.append(BatchTask(j*per_cap + i, seeds[i], n, rounds, seat_strategies(c.strategies, n)))
+    return ret
+
+def host_id() -> str: return f'{socket.gethostname()}:{os.getpid()}'
+
+@contextmanager
+def locked(path: str, stale: float=60.0) -> Iterator[None]:
+    # a lock file created exclusively, which works across machines sharing a filesystem;
+    # a lock left behind by a crash is broken after stale seconds
+    lock = path + '.lock'
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) > stale:
+                    os.remove(lock)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.05)
+    try:
+        os.write(fd, host_id().encode())
+        os.close(fd)
+        yield
+    finally:
+        os.remove(lock)
+
+@contextmanager
+def heartbeat(path: str, interval: float) -> Iterator[None]:
+    # touches path every interval seconds while the body runs, so a live claim never outlasts its lease;
+    # stops if the file is gone, i.e. the claim was taken over
+    stop = threading.Event()
+    def beat() -> None:
+        while not stop.wait(interval):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                return
+    t = threading.Thread(target=beat, daemon=True)
+    t.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        t.join()
+
+def write_json(path: str, obj) -> None:
+    # atomic: readers see the old or the new file, never a partial one
+    tmp = f'{path}.tmp-{host_id().replace(":", "-")}'
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, indent=1)
+    os.replace(tmp, path)
+
+class Sweep:
+    # a directory holding a sweep split into shards:
+    #   manifest.json          configuration, code version and the shards finished so far
+    #   shards/shardNNNNN.csv  results of a finished shard, written atomically
+    #   shards/shardNNNNN.claim  a shard being played, by host:pid, touched as a heartbeat
+    #   logs/shardNNNNN/       turn logs of a finished shard, if kept
+    # any number of processes, on any machines that share the directory, can run the same sweep
+    def __init__(self, path: str, config: SweepConfig | None=None):
+        self.path: str = path
+        self.manifest_path: str = os.path.join(path, 'manifest.json')
+        os.makedirs(os.path.join(path, 'shards'), exist_ok=True)
+        with locked(self.manifest_path):
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+                if manifest['version'] != MANIFEST_VERSION:
+                    raise ValueError(f'manifest version {manifest["version"]}, expected {MANIFEST_VERSION}')
+                if config is not None and config != config_from_json(manifest['config']):
+                    raise ValueError(f'{path!r} holds a sweep with another configuration')
+                self.config: SweepConfig = config_from_json(manifest['config'])
+            elif config is None:
+                raise ValueError(f'no sweep in {path!r}')
+            else:
+                self.config = config
+                write_json(self.manifest_path, {'version': MANIFEST_VERSION, 'code': code_version(),
+                                                'config': config._asdict(), 'shards': {}})
+        self.tasks: list[BatchTask] = make_sweep_tasks(self.config)
+
+    def num_shards(self) -> int: return -(-len(self.tasks) // self.config.shard_size)
+    def shard_tasks(self, k: int) -> list[BatchTask]: return self.tasks[k*self.config.shard_size:(k+1)*self.config.shard_size]
+    def shard_path(self, k: int) -> str: return os.path.join(self.path, 'shards', f'shard{k:05d}.csv')
+    def claim_path(self, k: int) -> str: return os.path.join(self.path, 'shards', f'shard{k:05d}.claim')
+    def log_path(self, k: int) -> str: return os.path.join(self.path, 'logs', f'shard{k:05d}')
+    def done(self, k: int) -> bool: return os.path.exists(self.shard_path(k))
+
+    def manifest(self) -> dict:
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    #** Claiming **#
+
+    def claim(self, k: int, lease: float=LEASE) -> bool:
+        # True if this process may play shard k; claims not touched for lease seconds are taken to be dead
+        path = self.claim_path(k)
+        while True:
+            if self.done(k):
+                return False
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) <= lease:
+                        return False
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            os.write(fd, host_id().encode())
+            os.close(fd)
+            return True
+
+    def release(self, k: int) -> None:
+        try:
+            os.remove(self.claim_path(k))
+        except FileNotFoundError:
+            pass
+
+    def clean(self, k: int) -> None:
+        # temporary files of earlier attempts at shard k, which crashed or lost their claim
+        for d, prefix in ((os.path.join(self.path, 'shards'), f'shard{k:05d}.csv.tmp-'),
+                          (os.path.join(self.path, 'logs'), f'.shard{k:05d}.tmp-')):
+            if os.path.isdir(d):
+                for name in os.listdir(d):
+                    if name.startswith(prefix):
+                        path = os.path.join(d, name)
+                        if os.path.isdir(path):
+                            shutil.rmtree(path)
+                        else:
+                            os.remove(path)
+
+    #** Running **#
+
+    def run_shard(self, k: int, workers: int | None=None) -> list[GameResult]:
+        # results and logs go to temporary names first and are renamed into place when complete,
+        # so a crash leaves either a finished shard or none
+        tag = host_id().replace(':', '-')
+        tasks = self.shard_tasks(k)
+        self.clean(k)
+        log_tmp = None
+        if self.config.log_format is not None:
+            log_tmp = os.path.join(self.path, 'logs', f'.shard{k:05d}.tmp-{tag}')
+        start = time.perf_counter()
+        results = sorted(iter_batch(tasks, workers, log_dir=log_tmp, log_format=self.config.log_format or 'npz'),
+                         key=lambda r: r.game_id)
+        elapsed = time.perf_counter() - start
+
+        if log_tmp is not None:
+            try:
+                os.rename(log_tmp, self.log_path(k))
+            except OSError:
+                # finished elsewhere in the meantime, the games are the same
+                shutil.rmtree(log_tmp, ignore_errors=True)
+        tmp = f'{self.shard_path(k)}.tmp-{tag}'
+        write_results(results, tmp)
+        os.replace(tmp, self.shard_path(k))
+        with locked(self.manifest_path):
+            manifest = self.manifest()
+            manifest['shards'][str(k)] = {'games': len(results), 'seconds': round(elapsed, 3), 'host': host_id(),
+                                         'finished': datetime.datetime.now().isoformat(timespec='seconds')}
+            write_json(self.manifest_path, manifest)
+        return results
+
+    def run(self, workers: int | None=None, max_shards: int | None=None, lease: float=LEASE,
+            verbose: bool=False) -> int:
+        # plays unclaimed shards until none are left; returns the number of shards played here
+        played = 0
+        for k in range(self.num_shards()):
+            if max_shards is not None and played >= max_shards:
+                break
+            if not self.claim(k, lease):
+                continue
+            try:
+                with heartbeat(self.claim_path(k), lease / 4):
+                    results = self.run_shard(k, workers)
+            finally:
+                self.release(k)
+            played += 1
+            if verbose:
+                print(f'shard {k+1}/{self.num_shards()}: {len(results)} games')
+        return played
+
+    #** Progress **#
+
+    def status(self) -> dict:
+        # from the shard files, which are authoritative; finished shards missing from the manifest
+        # (a crash right after the rename) are recorded
+        done = [k for k in range(self.num_shards()) if self.done(k)]
+        claimed = [k for k in range(self.num_shards()) if not self.done(k) and os.path.exists(self.claim_path(k))]
+        with locked(self.manifest_path):
+            manifest = self.manifest()
+            missing = [k for k in done if str(k) not in manifest['shards']]
+            for k in missing:
+                manifest['shards'][str(k)] = {'games': len(self.shard_tasks(k))}
+            if missing:
+                write_json(self.manifest_path, manifest)
+        seconds = sum(s.get('seconds', 0) for s in manifest['shards'].values())
+        return {'shards': self.num_shards(), 'done': len(done), 'claimed': claimed, 'games': len(self.tasks),
+                'games_done': sum(len(self.shard_tasks(k)) for k in done), 'seconds': seconds,
+                'code_changed': manifest['code'] != code_version()}
+
+    #** Merging **#
+
+    def results(self) -> Iterator[GameResult]:
+        for k in range(self.num_shards()):
+            if self.done(k):
+                yield from read_results(self.shard_path(k))
+
+    def merge(self, out: str | None=None, dataset: str | None=None) -> BatchSummary:
+        # one results CSV over all shards and, if turns were logged, one dataset directory whose
+        # parts are hard links to the shard logs
+        unfinished = [k for k in range(self.num_shards()) if not self.done(k)]
+        if unfinished:
+            raise ValueError(f'{len(unfinished)} shards are not finished, the first is {unfinished[0]}')
+        summary = BatchSummary()
+        results = list(self.results())
+        for r in results:
+            summary.add(r)
+        out = out or os.path.join(self.path, 'results.csv')
+        write_results(results, out + '.tmp')
+        os.replace(out + '.tmp', out)
+        if self.config.log_format is not None:
+            from logstore import log_parts
+            dataset = dataset or os.path.join(self.path, 'dataset')
+            os.makedirs(dataset, exist_ok=True)
+            for k in range(self.num_shards()):
+                for part in log_parts(self.log_path(k)):
+                    dst = os.path.join(dataset, os.path.basename(part))
+                    if os.path.exists(dst):
+                        continue
+                    try:
+                        os.link(part, dst)
+                    except OSError:
+                        shutil.copyfile(part, dst)
+        return summary
+
+#** CLI **#
+
+def main(argv: list[str] | None=None) -> None:
+    from logstore import WRITERS
+
+    parser = argparse.ArgumentParser(description='Long running sweeps in resumable shards.')
+    parser.add_argument('path', help='sweep directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help='play unfinished shards, starting the sweep if the directory has none')
+    run.add_argument('-n', '--games', type=int, default=1000, help='games per player count and round cap')
+    run.add_argument('-p', '--players', type=int, nargs='+', default=[4])
+    run.add_argument('-r', '--rounds', type=int, nargs='+', default=[30], help='round caps')
+    run.add_argument('-s', '--seed', type=int, default=0, help='master seed')
+    run.add_argument('-S', '--strategies', nargs='+', choices=list(STRATEGIES), default=[],
+                     help='strategy names by seat, repeated to fill all seats')
+    run.add_argument('--shard-size', type=int, default=1000, help='games per shard')
+    run.add_argument('-f', '--log-format', choices=list(WRITERS), default=None, help='also keep every turn')
+    run.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    run.add_argument('-m', '--max-shards', type=int, default=None, help='stop after this many shards')
+    run.add_argument('--lease', type=float, default=LEASE, help='seconds without a heartbeat before a claimed shard is taken over')
+    run.add_argument('--resume', action='store_true', help='continue the sweep in the directory, whatever its configuration')
+    sub.add_parser('status', help='show progress')
+    merge = sub.add_parser('merge', help='merge finished shards into one results CSV and one dataset')
+    merge.add_argument('-o', '--out', default=None, help='results CSV (default: results.csv in the sweep)')
+    merge.add_argument('-d', '--dataset', default=None, help='dataset directory (default: dataset in the sweep)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        config = None if args.resume else SweepConfig(args.games, tuple(args.players), tuple(args.rounds), args.seed,
+                                                      tuple(args.strategies), args.shard_size, args.log_format)
+        try:
+            s = Sweep(args.path, config)
+        except ValueError as e:
+            parser.error(f'{e}, pass --resume to continue it')
+        start = time.perf_counter()
+        played = s.run(args.workers, args.max_shards, args.lease, verbose=True)
+        elapsed = time.perf_counter() - start
+        print(f'{played} shards in {elapsed:.2f}s')
+    else:
+        try:
+            s = Sweep(args.path)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command in ('run', 'status'):
+        st = s.status()
+        print(f'{st["done"]}/{st["shards"]} shards, {st["games_done"]}/{st["games"]} games done, '
+              f'{st["seconds"]:.0f}s of play; claimed: {st["claimed"] or "none"}')
+        if st['code_changed']:
+            print('warning: the simulator changed since the sweep started')
+    elif args.command == 'merge':
+        print(s.merge(args.out, args.dataset).report())
+
+if __name__ == '__main__':
+    main()
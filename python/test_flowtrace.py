@@ -0,0 +1,10 @@
+from flowtrace import ENTRY, RETURN, TRACED, node_ids, source_lines
+
+def test_node_ids_follow_the_statements():
+    src = source_lines()
+    ids = node_ids(src)
+    assert len(set(ids.values())) == len(ids) == len(src) + 2*len(TRACED)
+    assert ids['run', ENTRY] == 'run__call' and ids['run', RETURN] == 'run__return'
+    # lines added above a method move its lines, not its ids
+    shifted = node_ids({(name, line+7): text for (name, line), text in src.items()})
+    assert [shifted[name, line+7] for name, line in src] == [ids[n] for n in src]
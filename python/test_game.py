@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from board import BOARD, PROPERTY_POSITIONS
+from game import Game
+from strategy import make_strategy
+
+# rng and dice_block variants; each game owns its stream, so stepping games in turn must not change them
+VARIANTS: dict[str, dict] = {
+    'default': {},
+    'dice_block': {'dice_block': 64},
+    'generator': {'rng': 'numpy'},
+    'generator_block': {'rng': 'numpy', 'dice_block': 64},
+}
+
+def make_game(seed: int, variant: str, num_players: int=4) -> Game:
+    kwargs = dict(VARIANTS[variant])
+    if kwargs.get('rng') == 'numpy':
+        np = pytest.importorskip('numpy')
+        kwargs['rng'] = np.random.default_rng(seed)
+    return Game(num_players, seed=seed, verbose=False, **kwargs)
+
+def solo(seed: int, variant: str) -> Game:
+    g = make_game(seed, variant)
+    g.run(save=False)
+    return g
+
+@pytest.mark.parametrize('variant', VARIANTS)
+def test_interleaved_games_match_solo(variant: str):
+    seeds = (3, 11)
+    games = [make_game(seed, variant) for seed in seeds]
+    # noise on the global generator must not reach the games either
+    random.seed(12345)
+    while not all(g.finished() for g in games):
+        for g in games:
+            if not g.finished():
+                g.step()
+                random.random()
+    for g in games:
+        g.run(save=False)
+
+    for g, seed in zip(games, seeds):
+        ref = solo(seed, variant)
+        assert list(g.row) == list(ref.row)
+        assert [list(r) for r in g.data] == [list(r) for r in ref.data]
+        assert g.winner() == ref.winner()
+    assert [list(r) for r in games[0].data] != [list(r) for r in games[1].data]
+
+#** Ownership indexes **#
+
+def recompute_indexes(g: Game) -> tuple:
+    # the indexes Game keeps up to date, rebuilt from the row and the mortgage flags alone
+    n = g.num_players+1
+    owned = [set() for _ in range(n)]
+    group_owned = [[0] * 40 for _ in range(n)]
+    houses, hotels, value = [0] * n, [0] * n, [0] * n
+    for pos in PROPERTY_POSITIONS:
+        sq = BOARD[pos]
+        owner = g.row[g.layout.card_owner[pos]]
+        lvl = g.row[g.layout.street_level[pos]] if g.layout.street_level[pos] >= 0 else 0
+        h, H = (lvl - 1 if 2 <= lvl <= 5 else 0), int(lvl == 6)
+        owned[owner].add(pos)
+        group_owned[owner][sq.group[0]] += 1
+        houses[owner] += h
+        hotels[owner] += H
+        value[owner] += (0 if g.mortgaged[pos] else sq.mortgage) + (h + 5*H) * sq.house_price
+    return owned, group_owned, houses, hotels, value
+
+def test_indexes_match_a_recompute_after_every_turn():
+    names = ('trader', 'aggressive', 'cautious', 'trader')
+    built = mortgaged = 0
+    for seed in range(6):
+        g = Game(4, seed=seed, max_rounds=80, verbose=False, strategies=[make_strategy(s) for s in names])
+        while not g.finished():
+            g.step()
+            assert (g.owned, g.group_owned, g.houses, g.hotels, g.property_value) == recompute_indexes(g), seed
+            built = max(built, sum(g.houses) + sum(g.hotels))
+            mortgaged = max(mortgaged, sum(g.mortgaged))
+    # the games did build and mortgage, so the checks saw those changes
+    assert built > 0 and mortgaged > 0
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from game import Game
+from logstore import GAME_COL, NOTES_COL, encode_notes, iter_log, log_parts, make_writer, read_log
+
+GAMES: list[tuple[int, int]] = [(1, 4), (2, 2), (3, 4), (4, 2)] # game id and player count, schemas alternate
+
+@pytest.fixture(params=['npz', 'parquet', 'csv'])
+def fmt(request) -> str:
+    if request.param == 'parquet':
+        pytest.importorskip('pyarrow')
+    return request.param
+
+def write_games(fmt: str, path: str) -> dict[int, Game]:
+    games = {}
+    # a small chunk size so every game spans several flushes
+    with make_writer(fmt, path, chunk_rows=50) as w:
+        for game_id, num_players in GAMES:
+            g = Game(num_players, seed=game_id, max_rounds=40, verbose=False, writer=w, game_id=game_id)
+            g.run(save=False)
+            games[game_id] = g
+    return games
+
+def test_encode_notes():
+    notes = ['pass;', 'buy 1;', '', 'pass;']
+    codes, categories = encode_notes(notes)
+    assert codes.dtype == np.int16
+    assert list(categories[codes]) == notes
+
+def test_round_trip(fmt: str, tmp_path):
+    path = str(tmp_path)
+    games = write_games(fmt, path)
+    assert len(log_parts(path)) > 1
+    for game_id, g in games.items():
+        df = read_log(path, games=[game_id])
+        assert list(df.columns) == [GAME_COL] + g.cols + [NOTES_COL]
+        assert (df[GAME_COL] == game_id).all()
+        assert df[g.cols].values.tolist() == [list(r) for r in g.data]
+        assert df[NOTES_COL].fillna('').astype(str).tolist() == g.notes()
+
+def test_column_projection(fmt: str, tmp_path):
+    path = str(tmp_path)
+    games = write_games(fmt, path)
+    g = games[3]
+    cols = ['Round', 'Player 4 Money', NOTES_COL]
+    df = read_log(path, columns=cols, games=[3])
+    assert list(df.columns) == [GAME_COL] + cols
+    assert df['Player 4 Money'].tolist() == [r[g.col_idx['Player 4 Money']] for r in g.data]
+    assert df[NOTES_COL].fillna('').astype(str).tolist() == g.notes()
+
+    # a predicate on names, players missing from the 2 player games are skipped
+    df = read_log(path, columns=lambda c: c.endswith(' Money'), games=[2, 3])
+    assert set(df[GAME_COL]) == {2, 3}
+    assert len(df) == len(games[2].data) + len(games[3].data)
+    assert df.loc[df[GAME_COL] == 2, 'Player 4 Money'].isna().all()
+    assert df.loc[df[GAME_COL] == 2, 'Bank Money'].tolist() == [r[games[2].col_idx['Bank Money']] for r in games[2].data]
+
+    assert sum(len(df) for df in iter_log(path, games=[99])) == 0
+    assert read_log(path, games=[99]).empty
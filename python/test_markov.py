@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pytest
+
+import markov
+from batch import iter_batch, make_tasks
+from board import BOARD, CH_MOVE_TO
+from onlinestats import GO_TO_JAIL_SQUARE, GameStats
+
+@pytest.fixture
+def cache_dir(tmp_path) -> str:
+    markov._landings.cache_clear()
+    yield str(tmp_path)
+    markov._landings.cache_clear()
+
+def test_group_landings_match_a_simulation(cache_dir: str):
+    # default strategies pay to leave jail, as the model assumes
+    stats = GameStats()
+    list(iter_batch(make_tasks(100, [4], 1, 100, ()), 1, stats=stats))
+    sim = stats.landings[:40] / stats.landings[:40].sum()
+    l = markov.landings(cache_dir=cache_dir)
+    model = l.landing / l.landing.sum()
+
+    groups = markov.group_landings(cache_dir=cache_dir)
+    assert len(groups) == 10
+    for key, p in groups.items():
+        squares = [sq.pos for sq in BOARD if (sq.color or sq.kind) == key]
+        assert abs(p / l.landing.sum() - sim[squares].sum()) < 0.005, key
+    # squares left in the same move count in both
+    for pos in (GO_TO_JAIL_SQUARE, 7, 22, 36, 2, 17, 33):
+        assert abs(model[pos] - sim[pos]) < 0.002, pos
+    assert np.abs(model - sim).max() < 0.002
+
+def test_card_rules_change_the_key(cache_dir: str, monkeypatch):
+    base = markov.config_key(markov.rule_config())
+    assert markov.config_key(markov.rule_config()) == base
+    assert markov.config_key(markov.rule_config(jail_free_in_deck=True)) != base
+    before = markov.landings(cache_dir=cache_dir)
+
+    # chance sends the player to St. Charles Place (11) from Reading Railroad (5) instead
+    monkeypatch.setattr(markov, 'CH_MOVE_TO', {**CH_MOVE_TO, 6: 11})
+    key = markov.config_key(markov.rule_config())
+    assert key != base
+    markov._landings.cache_clear()
+    after = markov.landings(cache_dir=cache_dir)
+    assert after.landing[5] < before.landing[5] and after.landing[11] > before.landing[11]
+    assert sorted(os.listdir(cache_dir)) == sorted(f'landings_{k}.json' for k in (base, key))
+
+    monkeypatch.setattr(markov, 'CC_GO_TO_JAIL_CARD', 0)
+    assert markov.config_key(markov.rule_config()) not in (base, key)
+    monkeypatch.undo()
+    markov._landings.cache_clear()
+    assert (markov.landings(cache_dir=cache_dir).landing == before.landing).all()
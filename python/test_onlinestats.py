@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from batch import make_tasks, play
+from events import Event
+from game import Game
+from onlinestats import GO_TO_JAIL_SQUARE, JAIL_SQUARE, GameStats
+
+TASKS = make_tasks(24, [2, 4], 3, 60, ('trader', 'aggressive', 'cautious'))
+
+def stats_of(tasks) -> GameStats:
+    s = GameStats()
+    for t in tasks:
+        play(t, stats=s)
+    return s
+
+def assert_same(a: GameStats, b: GameStats) -> None:
+    assert a.games == b.games
+    for n in a.games:
+        assert (a.money_count[n] == b.money_count[n]).all()
+        np.testing.assert_allclose(a.money_mean[n], b.money_mean[n], rtol=1e-9)
+        np.testing.assert_allclose(a.money_m2[n], b.money_m2[n], rtol=1e-9, atol=1e-6)
+    assert (a.rounds == b.rounds).all()
+    assert (a.landings == b.landings).all()
+    assert (a.rent == b.rent).all()
+    assert (a.bank == b.bank).all()
+
+@pytest.mark.parametrize('chunks', [1, 3, 7])
+def test_merged_chunks_equal_a_single_pass(chunks: int):
+    single = stats_of(TASKS)
+    merged = GameStats()
+    size = -(-len(TASKS) // chunks)
+    for i in range(0, len(TASKS), size):
+        merged.merge(stats_of(TASKS[i:i+size]))
+    assert merged.num_games() == len(TASKS)
+    assert_same(merged, single)
+
+def test_money_moments_match_the_logs():
+    s = GameStats()
+    money: dict[int, list[np.ndarray]] = {2: [], 4: []}
+    for seed in range(10):
+        n = 2 + 2*(seed % 2)
+        g = Game(n, seed=seed, max_rounds=40, verbose=False, stats=s)
+        g.run(save=False)
+        rows = np.array([list(r) for r in g.data])
+        rnd = rows[:, g.layout.round]
+        # money at the end of every round, from the last row of the round
+        last = np.flatnonzero(np.append(rnd[1:] != rnd[:-1], True))
+        money[n].append(rows[last][:, list(g.layout.money[1:])])
+    for n, games in money.items():
+        for r in range(int((s.money_count[n] == s.games[n]).sum())):
+            m = np.array([a[r] for a in games], np.float64)
+            np.testing.assert_allclose(s.money_mean[n][r], m.mean(axis=0))
+            np.testing.assert_allclose(s.money_std(n)[r], m.std(axis=0, ddof=1), atol=1e-6)
+
+def test_landings_include_squares_left_in_the_same_move():
+    s = GameStats()
+    g = Game(4, seed=1, max_rounds=80, verbose=False, stats=s)
+    g.run(save=False)
+    ev = g.events.frame()
+    sent = ev[(ev['Kind'] == Event.GO_TO_JAIL) & (ev['Square'] == GO_TO_JAIL_SQUARE)]
+    assert len(sent) > 0
+    assert s.landings[GO_TO_JAIL_SQUARE] == len(sent)
+    for kind in (Event.CHANCE, Event.COMMUNITY_CHEST):
+        drawn = ev[ev['Kind'] == kind]['Square'].value_counts()
+        assert len(drawn) == 3
+        for sq, count in drawn.items():
+            assert s.landings[sq] >= count
+    # one landing per row at least, every jail row included
+    assert s.landings.sum() > len(g.data)
+    assert s.landings[JAIL_SQUARE] == sum(1 for r in g.data if r[g.layout.pos[r[g.layout.player_idx]]] == -1)
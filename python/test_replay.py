@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+pytest.importorskip('pandas')
+
+from batch import iter_batch, make_tasks
+from replay import Replay, from_dataset
+
+STRATEGIES: tuple[str, ...] = ('trader', 'aggressive')
+MASTER_SEED: int = 9
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory) -> str:
+    # a batch streamed as batch.py does, games are replayed from their ids and the master seed
+    path = str(tmp_path_factory.mktemp('dataset'))
+    tasks = make_tasks(3, [2, 4], MASTER_SEED, 60, STRATEGIES)
+    list(iter_batch(tasks, 1, log_dir=path, log_format='npz'))
+    return path
+
+def open_replay(path: str, game_id: int) -> Replay:
+    return from_dataset(path, game_id, MASTER_SEED, STRATEGIES, 60, checkpoint_interval=32)
+
+@pytest.mark.parametrize('game_id', [1, 4])
+def test_seek_across_checkpoints(dataset: str, game_id: int):
+    r = open_replay(dataset, game_id)
+    n = len(r.log)
+    assert n > 4 * 32
+    cols = list(r.game.cols)
+    rng = random.Random(game_id)
+    # forwards, backwards and far jumps, crossing checkpoints both ways
+    for idx in [n-1, 0, 100, 40, 33, 31, n//2] + [rng.randrange(n) for _ in range(30)]:
+        assert list(r.seek(idx)) == r.log.loc[idx, cols].tolist()
+        assert r.note(idx) == r.log.loc[idx, 'Notes']
+        assert r.mismatches(idx) == []
+    assert len(r.checkpoints) > 3
+    assert r.verify() is None
+    with pytest.raises(IndexError):
+        r.seek(n + 1)
+
+def test_verify_reports_a_corrupted_row(dataset: str):
+    r = open_replay(dataset, 2)
+    r.seek(len(r.log) - 1)
+    bad = 77
+    r.log.loc[bad, 'Bank Money'] += 1
+    assert r.verify() == bad
+    assert r.mismatches(bad) == ['Bank Money']
+
+def test_verify_reports_a_corrupted_note(dataset: str):
+    r = open_replay(dataset, 3)
+    bad = 50
+    r.log.loc[bad, 'Notes'] = 'pass;'
+    assert r.verify() == bad
+    assert r.mismatches(bad) == ['Notes']
+
+def test_unknown_game(dataset: str):
+    with pytest.raises(ValueError):
+        open_replay(dataset, 99)
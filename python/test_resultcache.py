@@ -0,0 +1,66 @@
+import itertools
+
+import pytest
+
+import resultcache
+from batch import iter_batch, make_tasks
+from resultcache import ResultCache, code_version, config_key
+
+@pytest.fixture
+def clock(monkeypatch):
+    # a strictly increasing clock, so use order never ties
+    t = itertools.count(1000)
+    monkeypatch.setattr(resultcache.time, 'time', lambda: float(next(t)))
+
+@pytest.fixture
+def fresh_code_version():
+    code_version.cache_clear()
+    yield
+    code_version.cache_clear()
+
+def test_least_recently_used_are_evicted(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite')
+    with ResultCache(path, max_bytes=1000) as c:
+        for i in range(8):
+            c.put(f'k{i}', bytes(100))
+        assert c.get('k0') is not None # now the most recently used
+        assert c.stats()['entries'] == 8 and c.stats()['bytes'] == 800
+        c.put('k8', bytes(100))
+        c.put('k9', bytes(100))
+        c.put('k10', bytes(100))
+        # over 1000 bytes: evicted oldest first down to 900
+        assert c.stats()['bytes'] <= 900
+        assert [c.get(f'k{i}') is None for i in range(11)] == [False, True, True, False, False, False, False, False,
+                                                               False, False, False]
+        # replacing an entry counts its size once
+        c.put('k10', bytes(50))
+        assert c.stats()['bytes'] == 850
+        assert c.misses == 2 and c.hits == 10
+    # the size is read back from the file
+    with ResultCache(path, max_bytes=1000) as c:
+        assert c.stats() == {'hits': 0, 'misses': 0, 'entries': 9, 'bytes': 850}
+        assert c.evict(0.5) == 4
+        assert c.stats()['bytes'] == 450
+
+def test_changed_code_misses(tmp_path, monkeypatch, fresh_code_version):
+    config = {'players': 4, 'seed': 1}
+    with ResultCache(str(tmp_path / 'cache.sqlite')) as c:
+        key = config_key('game', config)
+        c.put_json(key, [1, 2])
+        assert c.get_json(config_key('game', config)) == [1, 2]
+        assert config_key('batch', config) != key
+        assert config_key('game', {**config, 'seed': 2}) != key
+
+        version = code_version()
+        monkeypatch.setattr(resultcache, 'CODE_FILES', resultcache.CODE_FILES[:-1])
+        code_version.cache_clear()
+        assert code_version() != version
+        assert c.get_json(config_key('game', config)) is None
+
+def test_batch_results_come_from_the_cache(tmp_path):
+    tasks = make_tasks(6, [2, 4], 5, 20, ('trader',))
+    with ResultCache(str(tmp_path / 'cache.sqlite')) as c:
+        played = sorted(iter_batch(tasks, 1, cache=c), key=lambda r: r.game_id)
+        assert c.stats()['entries'] == len(tasks) == c.misses and c.hits == 0
+        assert sorted(iter_batch(tasks, 1, cache=c), key=lambda r: r.game_id) == played
+        assert c.hits == len(tasks)
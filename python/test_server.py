@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import server
+from server import MAX_GAMES, MAX_ROUNDS, HttpError, JobConfig, Server, Simulator, parse_config
+
+@pytest.mark.parametrize('d', [
+    [], 'players=4', {'player': 4}, {'players': 'four'}, {'games': None}, {'seed': [1]},
+    {'players': 1}, {'players': 9}, {'games': 0}, {'games': MAX_GAMES+1}, {'rounds': 0}, {'rounds': MAX_ROUNDS+1},
+    {'strategies': ['default', 'reckless']}, {'strategies': 'trader,'},
+])
+def test_parse_config_rejects(d):
+    with pytest.raises(ValueError):
+        parse_config(d)
+
+def test_parse_config():
+    assert parse_config({}) == JobConfig()
+    # query strings arrive as text
+    assert parse_config({'players': '3', 'games': '5', 'seed': '-1', 'rounds': '7', 'strategies': 'trader,cautious'}) \
+        == JobConfig(3, 5, -1, 7, ('trader', 'cautious'))
+    assert parse_config({'strategies': ''}).strategies == ()
+
+async def finish(job) -> None:
+    async with job.changed:
+        await job.changed.wait_for(lambda: job.status in ('finished', 'failed'))
+
+def test_job_eviction():
+    async def main():
+        sim = Simulator(1, cache_size=2)
+        try:
+            configs = [JobConfig(2, 2, seed, 5) for seed in range(4)]
+            # queued and running jobs are never evicted, however many there are
+            jobs = [sim.submit(c)[0] for c in configs[:3]]
+            assert len(sim.by_id) == 3
+            for job in jobs:
+                await finish(job)
+            assert all(job.status == 'finished' for job in jobs)
+            assert sim.submit(configs[1]) == (jobs[1], True) # now most recently used
+
+            job, cached = sim.submit(configs[3])
+            assert not cached
+            assert set(sim.by_id) == {jobs[1].id, job.id}
+            assert configs[0].key() not in sim.jobs and configs[2].key() not in sim.jobs
+            await finish(job)
+            # an evicted configuration runs again as a new job
+            again, cached = sim.submit(configs[0])
+            assert not cached and again.id not in (j.id for j in jobs)
+            await finish(again)
+        finally:
+            sim.close()
+    asyncio.run(main())
+
+def test_game_eviction_and_key():
+    async def main():
+        sim = Simulator(1, cache_size=2)
+        try:
+            g0 = await sim.game(JobConfig(2, 1, 0, 5))
+            # the number of games does not matter to a single game
+            assert sim.game(JobConfig(2, 50, 0, 5)) is sim.game(JobConfig(2, 1, 0, 5))
+            assert len(sim.games) == 1
+            await sim.game(JobConfig(2, 1, 1, 5))
+            await sim.game(JobConfig(2, 1, 0, 5)) # most recently used again
+            await sim.game(JobConfig(2, 1, 2, 5))
+            assert [JobConfig(**json.loads(k)).seed for k in sim.games] == [0, 2]
+            assert (await sim.game(JobConfig(2, 1, 0, 5))) is g0
+        finally:
+            sim.close()
+    asyncio.run(main())
+
+class Writer:
+    def __init__(self):
+        self.data: bytes = b''
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+def test_static_stays_in_the_html_dir(tmp_path, monkeypatch):
+    html = tmp_path / 'html'
+    html.mkdir()
+    (html / 'index.html').write_text('<p>index</p>')
+    (html / 'app.js').write_text('run()')
+    (tmp_path / 'secret.txt').write_text('secret')
+    (tmp_path / 'html2').mkdir()
+    (tmp_path / 'html2' / 'x.html').write_text('sibling')
+    os.symlink(tmp_path / 'secret.txt', html / 'link.txt')
+    monkeypatch.setattr(server, 'HTML_DIR', str(html))
+    s = Server(None)
+
+    w = Writer()
+    s.static([], w)
+    assert w.data.startswith(b'HTTP/1.1 200') and w.data.endswith(b'<p>index</p>')
+    w = Writer()
+    s.static(['app.js'], w)
+    assert b'Content-Type: text/javascript' in w.data
+
+    for parts in (['..', 'secret.txt'], ['link.txt'], ['..', 'html2', 'x.html'], ['missing.html'], ['..', 'html'],
+                  ['%2e%2e', 'secret.txt']):
+        with pytest.raises(HttpError) as e:
+            s.static(parts, Writer())
+        assert e.value.status == 404
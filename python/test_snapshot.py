@@ -0,0 +1,70 @@
+import pytest
+
+import snapshot
+from game import Game
+from strategy import make_strategy
+
+STRATEGIES: tuple[str, ...] = ('trader', 'aggressive', 'cautious', 'trader')
+
+def make_game(seed: int, **kwargs) -> Game:
+    return Game(4, seed=seed, max_rounds=60, verbose=False, strategies=[make_strategy(s) for s in STRATEGIES], **kwargs)
+
+def indexes(g: Game) -> tuple:
+    return g.owned, g.group_owned, g.houses, g.hotels, g.property_value
+
+def play_to(g: Game, rnd: int) -> None:
+    while g.get_round() < rnd and not g.finished():
+        g.step()
+
+@pytest.mark.parametrize('dice_block', [0, 32])
+@pytest.mark.parametrize('seed', [1, 7])
+def test_fork_continues_like_the_original(seed: int, dice_block: int):
+    g = make_game(seed, dice_block=dice_block)
+    play_to(g, 15)
+    k = len(g.data)
+    snap = g.snapshot()
+    rng_state = g.rng.getstate()
+    b = snapshot.to_bytes(snap)
+    assert snapshot.from_bytes(b, len(g.cols)) == snap
+
+    f = Game.fork(snapshot.from_bytes(b, len(g.cols)), log_mode='full', max_rounds=60, dice_block=dice_block,
+                  strategies=[make_strategy(s) for s in STRATEGIES])
+    assert f.rng.getstate() == rng_state
+    assert list(f.row) == list(g.row)
+    assert indexes(f) == indexes(g)
+
+    g.run(save=False)
+    f.run(save=False)
+    assert [list(r) for r in f.data] == [list(r) for r in list(g.data)[k:]]
+    assert f.notes() == g.notes()[k:]
+    assert f.rng.getstate() == g.rng.getstate()
+    assert f.winner() == g.winner()
+
+def test_restore_into_a_used_game_rebuilds_the_indexes():
+    g = make_game(3)
+    play_to(g, 20)
+    snap = g.snapshot()
+    expected = indexes(g)
+
+    # a game played to the end with other owners and buildings
+    r = make_game(11)
+    r.run(save=False)
+    assert indexes(r) != expected
+    r.restore(snap)
+    assert indexes(r) == expected
+    assert len(r.data) == 0 and len(r.events) == 0
+
+def test_reseeded_rollouts():
+    g = make_game(5)
+    play_to(g, 10)
+    snap = g.snapshot(rng=False)
+    with pytest.raises(ValueError):
+        Game.fork(snap)
+    r = Game.fork(snap, seed=0)
+    finals = []
+    for seed in (0, 1, 0):
+        r.restore(snap, seed)
+        r.run(save=False)
+        finals.append(list(r.row))
+    assert finals[0] == finals[2]
+    assert finals[0] != finals[1]
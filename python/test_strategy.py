@@ -0,0 +1,106 @@
+import pytest
+
+from board import BOARD
+from game import Game
+from strategy import (JAIL_CARD, JAIL_PAY, STRATEGIES, ReserveStrategy, Strategy, StateView, Trade, TraderStrategy,
+                      make_strategy)
+
+BROWN, LIGHT_BLUE = BOARD[1].group, BOARD[6].group # (1, 3) and (6, 8, 9)
+
+def make_game(num_players: int=2) -> Game:
+    g = Game(num_players, verbose=False)
+    for p in range(1, num_players+1):
+        g.set_player_money(p, 0)
+    return g
+
+def give(g: Game, plyr_idx: int, *positions: int, level: int=1) -> None:
+    for pos in positions:
+        g.set_card_owner(pos, plyr_idx)
+        if BOARD[pos].kind == 'Street':
+            g.set_street_level(pos, level)
+
+@pytest.mark.parametrize('name, reserve', [('cautious', 300), ('aggressive', 50)])
+def test_buy_keeps_the_reserve(name: str, reserve: int):
+    s, g = make_strategy(name), make_game()
+    view = StateView(g)
+    price = BOARD[1].price
+    g.set_player_money(1, price + reserve)
+    assert s.buy(view, 1, 1)
+    g.set_player_money(1, price + reserve - 1)
+    assert not s.buy(view, 1, 1)
+
+def test_default_always_buys_and_pays():
+    s, g = make_strategy('default'), make_game()
+    view = StateView(g)
+    assert s.buy(view, 1, 39)
+    g.set_cc_jail_free_owner(1)
+    assert s.jail_exit(view, 1) == JAIL_PAY
+    assert s.build(view, 1) == s.trade(view, 1) == []
+
+@pytest.mark.parametrize('name', ['cautious', 'aggressive', 'trader'])
+def test_jail_exit_uses_a_card_when_held(name: str):
+    s, g = make_strategy(name), make_game()
+    view = StateView(g)
+    assert s.jail_exit(view, 1) == JAIL_PAY
+    g.set_ch_jail_free_owner(1)
+    assert s.jail_exit(view, 1) == JAIL_CARD
+    g.set_ch_jail_free_owner(0)
+    g.set_cc_jail_free_owner(2)
+    assert s.jail_exit(view, 1) == JAIL_PAY
+
+@pytest.mark.parametrize('name, reserve', [('cautious', 300), ('aggressive', 50)])
+def test_build_keeps_the_reserve_and_builds_evenly(name: str, reserve: int):
+    s, g = make_strategy(name), make_game()
+    view = StateView(g)
+    give(g, 1, *LIGHT_BLUE)
+    house = BOARD[6].house_price
+    g.set_player_money(1, reserve + 3*house - 1)
+    assert s.build(view, 1) == [6, 8]
+    g.set_player_money(1, reserve + 4*house)
+    assert s.build(view, 1) == [6, 8, 9, 6]
+    give(g, 1, 9, level=1)
+    g.set_mortgaged(9, True)
+    assert s.build(view, 1) == []
+
+def test_raise_cash_sells_evenly_before_mortgaging():
+    s, g = make_strategy('aggressive'), make_game()
+    view = StateView(g)
+    give(g, 1, *LIGHT_BLUE, level=3)
+    give(g, 1, 5)
+    assert s.raise_cash(view, 1, 100) == [6, 8, 9, 6, 8, 9, 6, 8, 9, 5]
+
+def test_trader_offers_at_the_premium():
+    s, g = make_strategy('trader'), make_game()
+    view = StateView(g)
+    assert isinstance(s, TraderStrategy) and s.reserve == 150
+    give(g, 1, 6, 8)
+    give(g, 2, 9)
+    price = int(s.premium * BOARD[9].price)
+    g.set_player_money(1, 150 + price)
+    assert s.trade(view, 1) == [Trade(2, take=(9,), cash=price)]
+    g.set_player_money(1, 150 + price - 1)
+    assert s.trade(view, 1) == []
+    # a built street is not bought away
+    g.set_player_money(1, 10000)
+    give(g, 2, 9, level=2)
+    assert s.trade(view, 1) == []
+
+def test_trader_accepts_only_at_the_premium():
+    s, g = make_strategy('trader'), make_game()
+    view = StateView(g)
+    give(g, 1, 39)
+    value = BOARD[39].price
+    assert s.accept_trade(view, 1, Trade(2, take=(39,), cash=int(s.premium * value)))
+    assert not s.accept_trade(view, 1, Trade(2, take=(39,), cash=int(s.premium * value) - 1))
+    # never breaks up its own group
+    give(g, 1, 37)
+    assert not s.accept_trade(view, 1, Trade(2, take=(39,), cash=10**6))
+
+def test_make_strategy():
+    for name in STRATEGIES:
+        s = make_strategy(name)
+        assert isinstance(s, Strategy) and s.name == name
+    assert type(make_strategy('default')) is Strategy
+    assert type(make_strategy('cautious')) is ReserveStrategy
+    with pytest.raises(ValueError, match='unknown strategy'):
+        make_strategy('reckless')
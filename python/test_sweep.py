@@ -0,0 +1,68 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from batch import iter_batch
+from sweep import Sweep, SweepConfig, heartbeat
+
+HERE: str = os.path.dirname(os.path.abspath(__file__))
+
+def test_heartbeat_keeps_a_claim(tmp_path):
+    s = Sweep(str(tmp_path), SweepConfig(games=4, shard_size=2))
+    other = Sweep(str(tmp_path))
+    assert s.claim(0, lease=0.3)
+    path = s.claim_path(0)
+    with heartbeat(path, 0.05):
+        os.utime(path, (0, 0))
+        time.sleep(0.5)
+        assert not other.claim(0, lease=0.3)
+    time.sleep(0.5)
+    assert other.claim(0, lease=0.3)
+    # a heartbeat on a claim taken over stops quietly
+    s.release(0)
+    with heartbeat(path, 0.01):
+        time.sleep(0.05)
+    assert not os.path.exists(path)
+
+def test_resume_after_a_kill(tmp_path):
+    pytest.importorskip('pandas')
+    from logstore import read_log
+
+    path = str(tmp_path / 'sweep')
+    cmd = [sys.executable, 'sweep.py', path, 'run', '-n', '60', '-p', '2', '4', '-r', '60', '-S', 'trader', 'cautious',
+           '--shard-size', '8', '-f', 'npz', '-w', '1', '--lease', '0.5']
+    proc = subprocess.Popen(cmd, cwd=HERE, stdout=subprocess.DEVNULL)
+    try:
+        # killed while playing the second shard, after the first finished
+        second = os.path.join(path, 'shards', 'shard00001.claim')
+        deadline = time.time() + 60
+        while not os.path.exists(second) and time.time() < deadline:
+            time.sleep(0.01)
+        proc.send_signal(signal.SIGKILL)
+    finally:
+        proc.wait()
+
+    s = Sweep(path)
+    status = s.status()
+    assert 0 < status['done'] < status['shards']
+    # the killed claim is left behind and taken over once its lease is out
+    assert status['claimed']
+    time.sleep(0.6)
+    assert s.run(workers=1, lease=0.5) == status['shards'] - status['done']
+
+    manifest = s.manifest()
+    assert sorted(map(int, manifest['shards'])) == list(range(s.num_shards()))
+    assert sorted(os.listdir(os.path.join(path, 'logs'))) == [f'shard{k:05d}' for k in range(s.num_shards())]
+    assert not any('.tmp' in f or f.endswith('.claim') for f in os.listdir(os.path.join(path, 'shards')))
+    s.merge()
+    results = list(s.results())
+    assert [r.game_id for r in results] == [t.game_id for t in s.tasks]
+    assert results == sorted(iter_batch(s.tasks, 1), key=lambda r: r.game_id)
+
+    # every game is in the merged dataset once, with all of its turns
+    turns = read_log(os.path.join(path, 'dataset'), columns=['Round']).groupby('Game').size()
+    assert turns.to_dict() == {r.game_id: r.turns for r in results}
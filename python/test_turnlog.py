@@ -0,0 +1,68 @@
+from array import array
+
+import pytest
+
+from game import Game
+from turnlog import DeltaLog, FullLog, LastLog, make_log
+
+SEEDS: tuple[int, ...] = (0, 1, 2, 3, 4)
+
+def game_rows(seed: int, num_players: int=4) -> list[array]:
+    g = Game(num_players, seed=seed, max_rounds=60, verbose=False)
+    g.run(save=False)
+    return list(g.data)
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_delta_log_matches_full_log(seed: int):
+    rows = game_rows(seed)
+    assert len(rows) > 2 * 64
+    full, delta = FullLog(), DeltaLog()
+    for r in rows:
+        full.commit(r)
+        delta.commit(r)
+    assert len(delta) == len(full)
+    assert list(delta) == list(full)
+    # random access rebuilds from the keyframe before the row, on either side of a keyframe
+    for idx in (0, 1, 62, 63, 64, 65, 127, 128, 129, len(rows)-1, -1):
+        assert delta[idx] == full[idx]
+
+def test_delta_log_pop():
+    rows = game_rows(5)
+    delta = DeltaLog()
+    for r in rows:
+        delta.commit(r)
+    # undo back across a keyframe, then commit the same rows again
+    n = len(rows)
+    for i in range(n-1, 60, -1):
+        assert delta.pop() == rows[i]
+        assert len(delta) == i
+        assert delta[-1] == rows[i-1]
+    for r in rows[61:]:
+        delta.commit(r)
+    assert list(delta) == rows
+    with pytest.raises(IndexError):
+        delta[n]
+
+def test_delta_log_commit_keeps_a_copy():
+    row = array('i', [1, 2, 3])
+    delta = DeltaLog(keyframe_interval=2)
+    for v in range(5):
+        row[1] = v
+        delta.commit(row)
+    assert [r[1] for r in delta] == [0, 1, 2, 3, 4]
+
+def test_none_mode_keeps_only_the_last_row():
+    log = make_log('none')
+    assert isinstance(log, LastLog)
+    rows = game_rows(6)
+    for r in rows:
+        log.commit(r)
+    assert len(log) == len(rows)
+    assert log[-1] == rows[-1]
+    assert list(log) == [rows[-1]]
+    with pytest.raises(IndexError):
+        log[0]
+
+def test_unknown_log_mode():
+    with pytest.raises(ValueError):
+        make_log('sparse')
@@ -0,0 +1,203 @@
+from typing import Iterable, NamedTuple
+
+import argparse
+import itertools
+import math
+import multiprocessing as mp
+import random
+import statistics
+import time
+
+from batch import BatchTask, GameResult, game_seeds, play, seat_strategies
+from strategy import STRATEGIES
+
+class Pairing(NamedTuple):
+    a: str
+    b: str
+
+class PairingStats:
+    def __init__(self, pairing: Pairing, seed: int):
+        self.pairing: Pairing = pairing
+        self.rng = random.Random(seed) # game seeds, drawn in order so results do not depend on scheduling
+        self.games: int = 0
+        self.wins_a: int = 0
+        self.done: bool = False
+
+    def win_rate(self) -> float: return self.wins_a / self.games if self.games else 0.5
+
+def wilson(wins: int, n: int, z: float) -> tuple[float, float]:
+    # score interval for a win rate, usable at 0 or n wins
+    if n == 0:
+        return 0.0, 1.0
+    p = wins / n
+    d = 1 + z*z/n
+    mid = (p + z*z/(2*n)) / d
+    half = z * math.sqrt(p*(1-p)/n + z*z/(4*n*n)) / d
+    return mid - half, mid + half
+
+#** Scheduling **#
+
+def make_pairings(strategies: Iterable[str]) -> list[Pairing]:
+    return [Pairing(a, b) for a, b in itertools.combinations(strategies, 2)]
+
+def seat_orders(pairing: Pairing, num_players: int) -> list[tuple[str, ...]]:
+    # both strategies alternate around the table, once starting with each; player 1 always moves first
+    return [seat_strategies(pairing, num_players), seat_strategies(pairing[::-1], num_players)]
+
+class Tournament:
+    def __init__(self, strategies: Iterable[str], num_players: int=2, master_seed: int=0, max_rounds: int=30,
+                 confidence: float=0.95, precision: float=0.05, min_games: int=100, max_games: int=5000,
+                 block: int=100):
+        # each pairing plays blocks of games until the confidence interval of its win rate is at most
+        # 2*precision wide, or max_games is reached
+        self.strategies: list[str] = list(strategies)
+        self.num_players: int = num_players
+        self.max_rounds: int = max_rounds
+        self.z: float = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        self.precision: float = precision
+        self.min_games: int = min_games
+        self.max_games: int = max_games
+        self.block: int = block + block % 2 # every seat order equally often
+
+        pairings = make_pairings(self.strategies)
+        self.stats: list[PairingStats] = [PairingStats(p, s) for p, s in zip(pairings, game_seeds(master_seed, len(pairings)))]
+        self.seat_wins: list[int] = [0] * (num_players+1)
+        self.num_games: int = 0
+        self.next_id: int = 0
+
+    def interval(self, s: PairingStats) -> tuple[float, float]: return wilson(s.wins_a, s.games, self.z)
+
+    def converged(self, s: PairingStats) -> bool:
+        if s.games >= self.max_games:
+            return True
+        lo, hi = self.interval(s)
+        return s.games >= self.min_games and (hi - lo) / 2 <= self.precision
+
+    def tasks(self, k: int) -> list[BatchTask]:
+        # the next block of a pairing, the same seed played with both seat orders; an odd remainder
+        # of max_games plays its last seed with the first order only
+        s = self.stats[k]
+        n = min(self.block, self.max_games - s.games)
+        ret: list[BatchTask] = []
+        for _ in range(0, n, 2):
+            seed = s.rng.getrandbits(63)
+            for seats in seat_orders(s.pairing, self.num_players)[:n - len(ret)]:
+                ret.append(BatchTask(self.next_id, seed, self.num_players, self.max_rounds, seats))
+                self.next_id += 1
+        return ret
+
+    def add(self, k: int, r: GameResult) -> None:
+        s = self.stats[k]
+        s.games += 1
+        s.wins_a += r.strategies[r.winner-1] == s.pairing.a
+        self.seat_wins[r.winner] += 1
+        self.num_games += 1
+
+    def run(self, workers: int | None=None, verbose: bool=False) -> None:
+        pool = mp.Pool(workers) if workers != 1 else None
+        try:
+            while True:
+                pending = [k for k, s in enumerate(self.stats) if not s.done]
+                if not pending:
+                    break
+                owner: dict[int, int] = {}
+                tasks: list[BatchTask] = []
+                for k in pending:
+                    for t in self.tasks(k):
+                        owner[t.game_id] = k
+                        tasks.append(t)
+                results = map(play, tasks) if pool is None else pool.imap_unordered(play, tasks, 16)
+                for r in results:
+                    self.add(owner[r.game_id], r)
+                for k in pending:
+                    self.stats[k].done = self.converged(self.stats[k])
+                if verbose:
+                    print(f'{self.num_games} games, {len(pending)} pairings were open')
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    #** Ratings **#
+
+    def ratings(self, iterations: int=1000) -> dict[str, float]:
+        # Bradley-Terry strengths fitted by minorization-maximization, on the Elo scale around 1500;
+        # half a win for each side keeps strategies that never won or never lost finite
+        idx = {name: i for i, name in enumerate(self.strategies)}
+        m = len(self.strategies)
+        wins = [0.0] * m
+        games = [[0] * m for _ in range(m)]
+        for s in self.stats:
+            a, b = idx[s.pairing.a], idx[s.pairing.b]
+            wins[a] += s.wins_a + 0.5
+            wins[b] += s.games - s.wins_a + 0.5
+            games[a][b] = games[b][a] = s.games + 1
+        p = [1.0] * m
+        for _ in range(iterations):
+            new = [wins[i] / (sum(games[i][j] / (p[i] + p[j]) for j in range(m) if games[i][j]) or 1)
+                   for i in range(m)]
+            mean = math.exp(statistics.fmean(math.log(x) for x in new))
+            new = [x / mean for x in new]
+            if max(abs(x - y) for x, y in zip(new, p)) < 1e-9:
+                p = new
+                break
+            p = new
+        return {name: 1500 + 400 * math.log10(p[i]) for name, i in idx.items()}
+
+    def seat_bias(self) -> list[tuple[int, float, float, float]]:
+        # seat, win rate and its interval; without a seat advantage every seat wins 1/num_players
+        ret = []
+        for seat in range(1, self.num_players+1):
+            w = self.seat_wins[seat]
+            ret.append((seat, w / max(self.num_games, 1), *wilson(w, self.num_games, self.z)))
+        return ret
+
+    def report(self) -> str:
+        lines: list[str] = []
+        for s in self.stats:
+            lo, hi = self.interval(s)
+            lines.append(f'{s.pairing.a} vs {s.pairing.b}: {s.games} games, {s.pairing.a} wins {s.win_rate():.3f} '
+                         f'[{lo:.3f}, {hi:.3f}]')
+        lines.append('ratings:')
+        for name, r in sorted(self.ratings().items(), key=lambda kv: -kv[1]):
+            lines.append(f'  {name:<12} {r:7.1f}')
+        lines.append(f'seat bias (fair share {1/self.num_players:.3f}):')
+        for seat, rate, lo, hi in self.seat_bias():
+            lines.append(f'  seat {seat}: win rate {rate:.3f} [{lo:.3f}, {hi:.3f}]')
+        budget = self.max_games * len(self.stats)
+        lines.append(f'{self.num_games} games played, {self.num_games/budget:.0%} of the fixed budget of {budget}')
+        return '\n'.join(lines)
+
+#** CLI **#
+
+def main(argv: list[str] | None=None) -> None:
+    parser = argparse.ArgumentParser(description='Round robin tournament between player strategies.')
+    parser.add_argument('strategies', nargs='*', help=f'strategies to pair up (default: all of {list(STRATEGIES)})')
+    parser.add_argument('-p', '--players', type=int, default=2, help='players per game, seats alternate between the pair')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed')
+    parser.add_argument('-r', '--rounds', type=int, default=30, help='round limit per game')
+    parser.add_argument('-c', '--confidence', type=float, default=0.95)
+    parser.add_argument('-e', '--precision', type=float, default=0.05, help='target half width of the win rate interval')
+    parser.add_argument('--min-games', type=int, default=100)
+    parser.add_argument('--max-games', type=int, default=5000)
+    parser.add_argument('-b', '--block', type=int, default=100, help='games per pairing between stopping checks')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+    strategies = args.strategies or list(STRATEGIES)
+    for name in strategies:
+        if name not in STRATEGIES:
+            parser.error(f'unknown strategy {name!r}, expected one of {list(STRATEGIES)}')
+    if len(strategies) < 2:
+        parser.error('a tournament needs at least two strategies')
+
+    t = Tournament(strategies, args.players, args.seed, args.rounds, args.confidence, args.precision,
+                   args.min_games, args.max_games, args.block)
+    start = time.perf_counter()
+    t.run(args.workers, args.verbose)
+    elapsed = time.perf_counter() - start
+    print(t.report())
+    print(f'{t.num_games} games in {elapsed:.2f}s ({t.num_games/elapsed:.0f} games/s)')
+
+if __name__ == '__main__':
+    main()
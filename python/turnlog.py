@@ -0,0 +1,125 @@
+from array import array
+from typing import Iterator
+
+# rows are array('i') state rows; a commit keeps a copy, the game goes on changing its row in place
+
+class FullLog:
+    def __init__(self):
+        self.rows: list[array] = []
+
+    def commit(self, row: array) -> array:
+        self.rows.append(row[:])
+        return row
+
+    def pop(self) -> array: return self.rows.pop()
+    def __getitem__(self, idx: int) -> array: return self.rows[idx]
+    def __len__(self) -> int: return len(self.rows)
+    def __iter__(self) -> Iterator[array]: return iter(self.rows)
+
+class DeltaLog:
+    def __init__(self, keyframe_interval: int=64):
+        self.keyframe_interval: int = keyframe_interval
+        self.keyframes: list[array] = []
+        self.changes: array = array('i') # flat (col, val) pairs
+        self.offsets: array = array('I', [0]) # row i owns changes[2*offsets[i]:2*offsets[i+1]]
+        self.last: array = array('i')
+
+    def commit(self, row: array) -> array:
+        n = len(self)
+        if n % self.keyframe_interval == 0:
+            self.keyframes.append(array('i', row))
+        else:
+            last = self.last
+            for col, val in enumerate(row):
+                if val != last[col]:
+                    self.changes.append(col)
+                    self.changes.append(val)
+        self.offsets.append(len(self.changes)//2)
+        self.last = row[:]
+        return row
+
+    def apply(self, row: array, idx: int) -> None:
+        changes = self.changes
+        for i in range(2*self.offsets[idx], 2*self.offsets[idx+1], 2):
+            row[changes[i]] = changes[i+1]
+
+    def pop(self) -> array:
+        idx = len(self) - 1
+        row = self[idx]
+        if idx % self.keyframe_interval == 0:
+            self.keyframes.pop()
+        self.offsets.pop()
+        del self.changes[2*self.offsets[-1]:]
+        self.last = self[idx-1] if idx > 0 else array('i')
+        return row
+
+    def __getitem__(self, idx: int) -> array:
+        n = len(self)
+        if idx < 0:
+            idx += n
+        if not 0 <= idx < n:
+            raise IndexError('turn log index out of range')
+        k = idx // self.keyframe_interval
+        row = self.keyframes[k][:]
+        for i in range(k*self.keyframe_interval+1, idx+1):
+            self.apply(row, i)
+        return row
+
+    def __len__(self) -> int: return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[array]:
+        row = array('i')
+        for idx in range(len(self)):
+            if idx % self.keyframe_interval == 0:
+                row = self.keyframes[idx // self.keyframe_interval][:]
+            else:
+                self.apply(row, idx)
+            yield row[:]
+
+class LastLog:
+    # no history, only the last committed row; for rollouts and other throwaway games
+    def __init__(self):
+        self.count: int = 0
+        self.last: array = array('i')
+
+    def commit(self, row: array) -> array:
+        self.count += 1
+        self.last[:] = row
+        return row
+
+    def __getitem__(self, idx: int) -> array:
+        if idx not in (-1, self.count-1) or not self.count:
+            raise IndexError('only the last row is kept')
+        return self.last[:]
+
+    def __len__(self) -> int: return self.count
+    def __iter__(self) -> Iterator[array]: return iter([self.last[:]] if self.count else [])
+
+LOG_MODES: dict[str, type] = {'full': FullLog, 'delta': DeltaLog, 'none': LastLog}
+
+def make_log(mode: str) -> FullLog | DeltaLog | LastLog:
+    if mode not in LOG_MODES:
+        raise ValueError(f'unknown log mode {mode!r}, expected one of {list(LOG_MODES)}')
+    return LOG_MODES[mode]()
+
+if __name__ == '__main__':
+    # memory benchmark: keep the logs of a batch of games alive in both modes
+    import io
+    import contextlib
+    import tracemalloc
+
+    from game import Game
+
+    num_games = 200
+    for mode in LOG_MODES:
+        logs = []
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(num_games):
+                g = Game(4, log_mode=mode)
+                g.run(save=False)
+                logs.append(g.data)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows = sum(len(l) for l in logs)
+        print(f'{mode:>5}: {size/num_games/1024:8.1f} KiB/game {size/rows:7.1f} B/row ({rows} rows)')
@@ -0,0 +1,414 @@
+from typing import Iterable
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+import board
+from board import BOARD, PROPERTY_POSITIONS, RAILROADS, UTILITIES, TAXES
+from board import STREET, RAILROAD, UTILITY, GO_TO_JAIL, CHANCE, COMMUNITY_CHEST, TAX
+from batch import GameResult, BatchSummary, run_batch
+
+#** Board tables **#
+
+K_NONE, K_PROPERTY, K_TAX, K_GO_TO_JAIL, K_CHANCE, K_COMMUNITY_CHEST = range(6)
+
+def square_kind(kind: str) -> int:
+    if kind in (STREET, RAILROAD, UTILITY): return K_PROPERTY
+    if kind == TAX: return K_TAX
+    if kind == GO_TO_JAIL: return K_GO_TO_JAIL
+    if kind == CHANCE: return K_CHANCE
+    if kind == COMMUNITY_CHEST: return K_COMMUNITY_CHEST
+    return K_NONE
+
+KIND: np.ndarray = np.array([square_kind(sq.kind) for sq in BOARD], dtype=np.int8)
+PRICE: np.ndarray = np.array([sq.price for sq in BOARD], dtype=np.int32)
+BASE_RENT: np.ndarray = np.array([sq.rent[0] if sq.kind == STREET else 0 for sq in BOARD], dtype=np.int32)
+MORTGAGE: np.ndarray = np.array([sq.mortgage for sq in BOARD], dtype=np.int32)
+IS_RAILROAD: np.ndarray = np.array([sq.kind == RAILROAD for sq in BOARD])
+IS_UTILITY: np.ndarray = np.array([sq.kind == UTILITY for sq in BOARD])
+RAILROAD_POS: np.ndarray = np.array(RAILROADS)
+UTILITY_POS: np.ndarray = np.array(UTILITIES)
+RAILROAD_RENT: np.ndarray = np.array((0,) + BOARD[RAILROADS[0]].rent, dtype=np.int32) # by count owned
+UTILITY_RENT: np.ndarray = np.array((0,) + BOARD[UTILITIES[0]].rent, dtype=np.int32)
+TAX_AMOUNT: np.ndarray = np.zeros(40, dtype=np.int32)
+for pos, (_, amt) in TAXES.items():
+    TAX_AMOUNT[pos] = amt
+
+# card tables follow Game.eval_ch and Game.eval_cc
+CH_MOVE_TO: np.ndarray = np.full(17, -1, dtype=np.int8)
+CH_MOVE_TO[list(board.CH_MOVE_TO)] = list(board.CH_MOVE_TO.values())
+NEAREST_RAILROAD: np.ndarray = np.zeros(40, dtype=np.int8)
+NEAREST_RAILROAD[list(board.NEAREST_RAILROAD)] = list(board.NEAREST_RAILROAD.values())
+NEAREST_UTILITY: np.ndarray = np.zeros(40, dtype=np.int8)
+NEAREST_UTILITY[list(board.NEAREST_UTILITY)] = list(board.NEAREST_UTILITY.values())
+CH_COLLECT: np.ndarray = np.zeros(17, dtype=np.int32)
+CH_COLLECT[list(board.CH_COLLECT)] = list(board.CH_COLLECT.values())
+CC_COLLECT: np.ndarray = np.zeros(17, dtype=np.int32)
+CC_COLLECT[list(board.CC_COLLECT)] = list(board.CC_COLLECT.values())
+CC_PAY: np.ndarray = np.zeros(17, dtype=np.int32)
+CC_PAY[list(board.CC_PAY)] = list(board.CC_PAY.values())
+
+DICE_SUM: np.ndarray = np.array([c//6 + c%6 + 2 for c in range(36)], dtype=np.int16) # by pair code 0..35
+DICE_DOUBLE: np.ndarray = np.array([c//6 == c%6 for c in range(36)])
+
+class VectorGames:
+    def __init__(self, num_games: int, num_players: int, seed: int=0, max_rounds: int=30):
+        self.num_games: int = num_games
+        self.num_players: int = num_players
+        self.max_rounds: int = max_rounds
+        self.seed: int = seed
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+
+        # every game advances one player per step, so the turn order is shared by all games
+        self.player: int = 1
+        self.round: int = 1
+
+        # state of the games still running, row i is game ids[i]
+        k, n = num_games, num_players
+        self.w: int = n+1
+        self.ids: np.ndarray = np.arange(k)
+        self.money: np.ndarray = np.zeros((k, n+1), dtype=np.int32) # column 0 is the bank
+        self.money[:, 0] = 20580 - n*1500
+        self.money[:, 1:] = 1500
+        self.pos: np.ndarray = np.zeros((k, n+1), dtype=np.int8) # -1 is jail, column 0 unused
+        self.owner: np.ndarray = np.zeros((k, 40), dtype=np.int8)
+        self.turns: np.ndarray = np.zeros(k, dtype=np.int32)
+        self.dice_sum: np.ndarray = np.zeros(k, dtype=np.int16)
+
+        # decks are circular queues, the get out of jail free card (1) leaves the deck when drawn
+        cards = np.tile(np.arange(1, 17, dtype=np.int8), (k, 1))
+        self.ch_deck: np.ndarray = self.rng.permuted(cards, axis=1)
+        self.cc_deck: np.ndarray = self.rng.permuted(cards, axis=1)
+        self.ch_head: np.ndarray = np.zeros(k, dtype=np.int8)
+        self.cc_head: np.ndarray = np.zeros(k, dtype=np.int8)
+        self.ch_size: np.ndarray = np.full(k, 16, dtype=np.int8)
+        self.cc_size: np.ndarray = np.full(k, 16, dtype=np.int8)
+        self.ch_jail_free_owner: np.ndarray = np.zeros(k, dtype=np.int8)
+        self.cc_jail_free_owner: np.ndarray = np.zeros(k, dtype=np.int8)
+        self.flatten()
+
+        # final state by game id
+        self.final_money: np.ndarray = np.zeros((k, n+1), dtype=np.int32)
+        self.final_owner: np.ndarray = np.zeros((k, 40), dtype=np.int8)
+        self.final_turns: np.ndarray = np.zeros(k, dtype=np.int32)
+        self.final_round: np.ndarray = np.zeros(k, dtype=np.int16)
+
+    def flatten(self) -> None:
+        # flat views, player p of row g lives at g*w + p and square s of row g at g*40 + s
+        self.money_flat: np.ndarray = self.money.reshape(-1)
+        self.pos_flat: np.ndarray = self.pos.reshape(-1)
+        self.owner_flat: np.ndarray = self.owner.reshape(-1)
+
+    #** Primitives **#
+
+    def pay(self, g: np.ndarray, to, fr, amt) -> None:
+        if not len(g):
+            return
+        m = self.money_flat
+        gw = g * self.w
+        if isinstance(fr, int) and fr == 0:
+            short = m[gw] < amt
+            if short.any():
+                m[gw[short]] = amt[short] if np.ndim(amt) else amt
+        m[gw + to] += amt
+        m[gw + fr] -= amt
+
+    def get_pos(self, g: np.ndarray, p) -> np.ndarray: return self.pos_flat[g*self.w + p]
+    def set_pos(self, g: np.ndarray, p, val) -> None: self.pos_flat[g*self.w + p] = val
+
+    def move(self, g: np.ndarray, p, n, rel: bool=True, collect_go: bool=True) -> None:
+        i = g*self.w + p
+        old = self.pos_flat[i].astype(np.int16)
+        new = (old + n) % 40 if rel else np.broadcast_to(n, g.shape).astype(np.int16)
+        self.pos_flat[i] = new
+        if collect_go:
+            passed = new < old
+            if passed.any():
+                self.pay(g[passed], p, 0, 200)
+
+    def go_to_jail(self, g: np.ndarray, p) -> None:
+        self.set_pos(g, p, -1)
+
+    def draw(self, g: np.ndarray, deck: np.ndarray, head: np.ndarray, size: np.ndarray) -> np.ndarray:
+        h = head[g]
+        card = deck[g, h]
+        h = (h + 1) % 16
+        head[g] = h
+        keep = card != 1
+        gk = g[keep]
+        deck[gk, (h[keep] + size[gk] - 1) % 16] = card[keep]
+        size[g[~keep]] -= 1
+        return card
+
+    def group_count(self, g: np.ndarray, owner: np.ndarray, members: np.ndarray) -> np.ndarray:
+        return (self.owner_flat[(g*40)[:, None] + members] == owner[:, None]).sum(axis=1)
+
+    #** Landing **#
+
+    def buy_or_pay_rent(self, g: np.ndarray, p: int, ch: bool=False) -> None:
+        pos = self.get_pos(g, p)
+        oi = g*40 + pos
+        owner = self.owner_flat[oi]
+        buy = owner == 0
+        if buy.any():
+            self.pay(g[buy], 0, p, PRICE[pos[buy]])
+            self.owner_flat[oi[buy]] = p
+
+        rent = ~buy
+        if not rent.any():
+            return
+        g, pos, owner = g[rent], pos[rent], owner[rent]
+        rent = BASE_RENT[pos]
+        rr = IS_RAILROAD[pos]
+        if rr.any():
+            rent[rr] = RAILROAD_RENT[self.group_count(g[rr], owner[rr], RAILROAD_POS)] * (2 if ch else 1)
+        ut = IS_UTILITY[pos]
+        if ut.any():
+            if ch:
+                rent[ut] = 10 * DICE_SUM[self.rng.integers(0, 36, int(ut.sum()))]
+            else:
+                rent[ut] = UTILITY_RENT[self.group_count(g[ut], owner[ut], UTILITY_POS)] * self.dice_sum[g[ut]]
+        self.pay(g, owner, p, rent)
+
+    def eval_pos(self, g: np.ndarray, p: int, pos: np.ndarray | None=None) -> None:
+        kind = KIND[self.get_pos(g, p) if pos is None else pos]
+        m = kind == K_PROPERTY
+        if m.any():
+            self.buy_or_pay_rent(g[m], p)
+        m = kind == K_TAX
+        if m.any():
+            self.pay(g[m], 0, p, TAX_AMOUNT[self.get_pos(g[m], p)])
+        m = kind == K_GO_TO_JAIL
+        if m.any():
+            self.go_to_jail(g[m], p)
+        m = kind == K_COMMUNITY_CHEST
+        if m.any():
+            self.cc(g[m], p)
+        m = kind == K_CHANCE
+        if m.any():
+            self.ch(g[m], p)
+
+    def pay_each_player(self, g: np.ndarray, p: int, amt: int, collect: bool) -> None:
+        for other in range(1, self.num_players+1):
+            if other == p:
+                continue
+            if collect:
+                self.pay(g, p, other, amt)
+            else:
+                self.pay(g, other, p, amt)
+
+    def ch(self, g: np.ndarray, p: int) -> None:
+        card = self.draw(g, self.ch_deck, self.ch_head, self.ch_size)
+
+        m = card == 1
+        self.ch_jail_free_owner[g[m]] = p
+        m = (card > 1) & (card < 7)
+        if m.any():
+            self.move(g[m], p, CH_MOVE_TO[card[m]], rel=False)
+            self.eval_pos(g[m], p)
+        for c, nearest in ((7, NEAREST_RAILROAD), (8, NEAREST_RAILROAD), (9, NEAREST_UTILITY)):
+            m = card == c
+            if m.any():
+                gm = g[m]
+                self.move(gm, p, nearest[self.get_pos(gm, p)], rel=False)
+                self.buy_or_pay_rent(gm, p, ch=True)
+        m = (card == 10) | (card == 11)
+        self.pay(g[m], p, 0, CH_COLLECT[card[m]])
+        m = card == 12
+        if m.any():
+            self.move(g[m], p, -3)
+            self.eval_pos(g[m], p)
+        m = card == 13
+        self.go_to_jail(g[m], p)
+        # 14: street repairs, nothing is ever built so the bill is 0
+        m = card == 15
+        self.pay(g[m], 0, p, 15)
+        m = card == 16
+        if m.any():
+            self.pay_each_player(g[m], p, 50, collect=False)
+
+    def cc(self, g: np.ndarray, p: int) -> None:
+        card = self.draw(g, self.cc_deck, self.cc_head, self.cc_size)
+
+        m = card == 1
+        self.cc_jail_free_owner[g[m]] = p
+        m = card == 2
+        self.move(g[m], p, 0, rel=False) # lands on go
+        m = (card > 2) & (card < 11)
+        self.pay(g[m], p, 0, CC_COLLECT[card[m]])
+        m = (card > 10) & (card < 14)
+        self.pay(g[m], 0, p, CC_PAY[card[m]])
+        m = card == 14
+        self.go_to_jail(g[m], p)
+        m = card == 15
+        if m.any():
+            self.pay_each_player(g[m], p, 10, collect=True)
+        # 16: street repairs, nothing is ever built so the bill is 0
+
+    #** Turns **#
+
+    def retire(self, done: np.ndarray) -> None:
+        ids = self.ids[done]
+        self.final_money[ids] = self.money[done]
+        self.final_owner[ids] = self.owner[done]
+        self.final_turns[ids] = self.turns[done]
+        self.final_round[ids] = self.round - (self.player == 1) # round of the last recorded turn
+
+        keep = ~done
+        for name in ('ids', 'money', 'pos', 'owner', 'turns', 'dice_sum', 'ch_deck', 'cc_deck', 'ch_head',
+                     'cc_head', 'ch_size', 'cc_size', 'ch_jail_free_owner', 'cc_jail_free_owner'):
+            setattr(self, name, getattr(self, name)[keep])
+        self.flatten()
+
+    def finished(self) -> np.ndarray:
+        if self.round > self.max_rounds:
+            return np.ones(len(self.ids), dtype=bool)
+        return (self.money[:, 1:] >= 0).sum(axis=1) == 1
+
+    def step(self) -> None:
+        p = self.player
+        k = len(self.ids)
+        g = np.arange(k)
+        pos = self.pos[:, p]
+        money = self.money[:, p]
+
+        jail = pos == -1
+        if jail.any():
+            money[jail] -= 50
+            self.money[jail, 0] += 50
+            pos[jail] = 10
+
+        # three rolls per turn as in Game.step, each a pair code 0..35
+        dice = self.rng.integers(0, 36, (k, 3), dtype=np.int16)
+        dbl = DICE_DOUBLE[dice]
+        triple = dbl[:, 0] & dbl[:, 1] & dbl[:, 2]
+        if triple.any():
+            pos[triple] = -1
+
+        # first roll for every game, on column views
+        s = DICE_SUM[dice[:, 0]]
+        self.dice_sum[:] = s
+        old = pos.astype(np.int16)
+        new = (old + s) % 40
+        pos[:] = new
+        passed = new < old
+        if passed.any():
+            self.pay(g[passed], p, 0, 200)
+        self.eval_pos(g, p, new)
+
+        idx = g[dbl[:, 0]]
+        for i in (1, 2):
+            if not len(idx):
+                break
+            self.turns[idx] += 1
+            s = DICE_SUM[dice[idx, i]]
+            self.dice_sum[idx] = s
+            self.move(idx, p, s)
+            self.eval_pos(idx, p)
+            idx = idx[dbl[idx, i]]
+        self.turns[idx] += 1
+
+        self.turns += 1
+        self.player = p % self.num_players + 1
+        self.round += int(self.player == 1)
+
+    def run(self) -> None:
+        while len(self.ids):
+            done = self.finished()
+            if done.any():
+                self.retire(done)
+            if len(self.ids):
+                self.step()
+
+    #** Results **#
+
+    def winners(self) -> np.ndarray:
+        money = self.final_money[:, 1:]
+        solvent = money >= 0
+        assets = money.astype(np.int64)
+        for p in range(1, self.num_players+1):
+            assets[:, p-1] += np.where(self.final_owner == p, MORTGAGE, 0).sum(axis=1)
+        winner = assets.argmax(axis=1) + 1
+        single = solvent.sum(axis=1) == 1
+        winner[single] = solvent[single].argmax(axis=1) + 1
+        return winner
+
+    def results(self, first_game_id: int=0) -> list[GameResult]:
+        owners = self.final_owner[:, list(PROPERTY_POSITIONS)].tolist()
+        money = self.final_money[:, 1:].tolist()
+        return [GameResult(first_game_id + i, self.seed, self.num_players, w, r, t, tuple(m), tuple(o))
+                for i, (w, r, t, m, o) in enumerate(zip(self.winners().tolist(), self.final_round.tolist(),
+                                                        self.final_turns.tolist(), money, owners))]
+
+def run_vector(num_games: int, num_players: int, seed: int=0, max_rounds: int=30,
+               block: int=100000) -> list[GameResult]:
+    results: list[GameResult] = []
+    seeds = np.random.SeedSequence(seed).spawn(math.ceil(num_games / block))
+    for i, ss in enumerate(seeds):
+        k = min(block, num_games - i*block)
+        v = VectorGames(k, num_players, int(ss.generate_state(1)[0]), max_rounds)
+        v.run()
+        results += v.results(i*block)
+    return results
+
+#** Equivalence check **#
+
+def outcome_stats(results: Iterable[GameResult], num_players: int) -> dict[str, np.ndarray]:
+    results = list(results)
+    stats = {
+        'rounds': np.array([r.rounds for r in results], dtype=float),
+        'turns': np.array([r.turns for r in results], dtype=float),
+    }
+    winners = np.array([r.winner for r in results])
+    money = np.array([r.money for r in results], dtype=float)
+    owners = np.array([r.owners for r in results])
+    for p in range(1, num_players+1):
+        stats[f'p{p} wins'] = (winners == p).astype(float)
+        stats[f'p{p} money'] = money[:, p-1]
+    for i, pos in enumerate(PROPERTY_POSITIONS):
+        stats[f'c{pos} owned'] = (owners[:, i] != 0).astype(float)
+    return stats
+
+def z_scores(num_games: int, num_players: int, seed: int=0, max_rounds: int=30) -> dict[str, tuple[float, float, float]]:
+    # scalar mean, vector mean and the z score of their difference for every outcome statistic
+    scalar = outcome_stats(run_batch(num_games, [num_players], seed, max_rounds, workers=1), num_players)
+    vector = outcome_stats(run_vector(num_games, num_players, seed, max_rounds), num_players)
+    ret: dict[str, tuple[float, float, float]] = {}
+    for key in scalar:
+        a, b = scalar[key], vector[key]
+        se = math.sqrt(a.var(ddof=1)/len(a) + b.var(ddof=1)/len(b))
+        ret[key] = a.mean(), b.mean(), 0.0 if se == 0 else (a.mean() - b.mean()) / se
+    return ret
+
+def compare(num_games: int, num_players: int, seed: int=0, max_rounds: int=30, z_max: float=4.0) -> bool:
+    ok = True
+    for key, (a, b, z) in z_scores(num_games, num_players, seed, max_rounds).items():
+        flag = abs(z) > z_max
+        ok &= not flag
+        print(f'{key:>12}: scalar {a:10.3f} vector {b:10.3f} z {z:6.2f}{"  <--" if flag else ""}')
+    return ok
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Lockstep NumPy engine for many games at once.')
+    parser.add_argument('-n', '--games', type=int, default=100000)
+    parser.add_argument('-p', '--players', type=int, default=4)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-r', '--rounds', type=int, default=30)
+    parser.add_argument('--compare', type=int, default=0, metavar='N',
+                        help='check outcome distributions against N scalar games')
+    args = parser.parse_args()
+
+    if args.compare:
+        ok = compare(args.compare, args.players, args.seed, args.rounds)
+        print('distributions match' if ok else 'distributions differ')
+    else:
+        t = time.perf_counter()
+        summary = BatchSummary()
+        for r in run_vector(args.games, args.players, args.seed, args.rounds):
+            summary.add(r)
+        elapsed = time.perf_counter() - t
+        print(summary.report())
+        print(f'{args.games} games in {elapsed:.2f}s ({args.games/elapsed:.0f} games/s)')
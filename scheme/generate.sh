@@ -3,6 +3,9 @@
 filenames=("run")
 basedir=$(cd $(dirname $0) && pwd)
 
+# run.dot is drawn from traced games, see python/flowtrace.py
+(cd "${basedir}/../python" && python flowtrace.py -o "${basedir}/run.dot")
+
 for f in "${filenames[@]}"; do
     dot -Tsvg "${basedir}/${f}.dot" -o "${basedir}/${f}.svg"
-done
\ No newline at end of file
+done